@@ -29,6 +29,11 @@ import ArcHydroTools
 import xml.dom.minidom
 from arcpy import env
 import xml.etree.ElementTree as ET
+import json
+import RegionContext
+from ParameterCache import ParameterCache
+from ParameterGroups import ParameterGroups
+from ZonalStatistics import ZonalStatistics, ArcpyRaster, basinRings
 #endregion
 
 
@@ -59,6 +64,15 @@ class BasinParameters(object):
         self.__logger__.setLevel(logging.INFO)
         self.__logger__.addHandler(handler)
         handler.setFormatter(formatter)
+
+        #region context of a delineation already run in this process, if any
+        self.__context__ = RegionContext.findContext(regionID, self.__sm__)
+
+        with open(os.path.join(os.path.dirname( __file__ ), 'config.json')) as c:
+            config = json.load(c)
+            self.__cacheSettings__ = config[0].get("parameterCache", {})
+            self.__groupWorkers__ = config[0].get("parameterGroups", {}).get("workers", 1)
+            self.__zonalSettings__ = config[0].get("zonalStatistics", {})
         
          #Test if workspace exists before run   
         if(not self.__workspaceValid__(os.path.join(self.__MainDirectory__, self.WorkspaceID+".gdb","Layers"))):
@@ -76,40 +90,70 @@ class BasinParameters(object):
         try:
             # Set overwrite option
             arcpy.env.overwriteOutput = True
-            arcpy.env.scratchWorkspace = self.__setScratchWorkspace__(os.path.join(self.__MainDirectory__, "Temp"))
+            if self.__context__ != None:
+                arcpy.env.scratchWorkspace = self.__context__.ScratchWorkspace(os.path.join(self.__MainDirectory__, "Temp"))
+            else:
+                arcpy.env.scratchWorkspace = self.__setScratchWorkspace__(os.path.join(self.__MainDirectory__, "Temp"))
 
             workspace = os.path.join(self.__MainDirectory__, self.WorkspaceID+".gdb","Layers")
             self.__sm__('workspace set: '+self.WorkspaceID)
             outputFile = os.path.join(self.__MainDirectory__, "Temp","parameterFile{0}")
 
-            xmlfile = self.__SSXMLPath__("StreamStats{0}.xml".format(self.RegionID), self.__TempLocation__)
+            if self.__context__ != None:
+                xmlfile = self.__context__.XMLFile(self.__TempLocation__, self.__TempLocation__)
+            else:
+                xmlfile = self.__SSXMLPath__("StreamStats{0}.xml".format(self.RegionID), self.__TempLocation__)
            
             if parameters == '':
-                parametersList = self.__allParams__(xmlfile)
+                parametersList = self.__context__.Parameters() if self.__context__ != None else self.__allParams__(xmlfile)
                 seperator = ';'
                 parameters = seperator.join(parametersList)
                 self.__sm__('parameters list: ' + parameters)
                 arcpy.AddMessage('parameters list: ' + parameters)
 
-            arcpy.CheckOutExtension("Spatial")
-            self.__sm__("Started calc params")
-            arcpy.AddMessage("Started calc params")
+            #only the codes not cached for this basin and data are computed
+            basin = input_basin if input_basin != "none" else os.path.join(workspace,"GlobalWatershed")
+            codes = [code.strip() for code in parameters.split(';') if code.strip() != '']
+            cache, key, cached = self.__cachedParameters__(basin, xmlfile, codes)
+            missing = [code for code in codes if code.upper() not in cached]
 
-            if input_basin != "none":
-                if arcpy.Exists(input_basin):
-                    ArcHydroTools.StreamstatsGlobalParametersServer(input_basin, os.path.join(workspace,"GlobalWatershedPoint"), 
-                                                                parameters, outputFile.format(".xml"), outputFile.format(".htm"), 
-                                                                xmlfile,"", self.WorkspaceID )
-            else:
-                ArcHydroTools.StreamstatsGlobalParametersServer(os.path.join(workspace,"GlobalWatershed"), 
-                                                                os.path.join(workspace,"GlobalWatershedPoint"), 
-                                                                parameters, outputFile.format(".xml"), outputFile.format(".htm"), 
-                                                                xmlfile,"", self.WorkspaceID )
+            computed = []
+            if missing:
+                #plain zonal statistics are computed with NumPy, the rest with ArcHydro
+                zonal, missing = self.__zonalParameters__(basin, missing, xmlfile)
+                computed.extend(zonal)
+            if missing or not codes:
+                if codes: parameters = ';'.join(missing)
+                #a parameterFile.xml left by an earlier run would be read, and cached, as this basin's
+                if os.path.exists(outputFile.format(".xml")): os.remove(outputFile.format(".xml"))
+                arcpy.CheckOutExtension("Spatial")
+                self.__sm__("Started calc params")
+                arcpy.AddMessage("Started calc params")
+
+                if self.__groupWorkers__ > 1 and len(missing) > 1:
+                    #characteristics split by the layers they read, on a process pool
+                    if input_basin == "none" or arcpy.Exists(input_basin):
+                        ParameterGroups(self.__groupWorkers__, self.__sm__).Compute(missing, basin, os.path.join(workspace,"GlobalWatershedPoint"),
+                                                                                    xmlfile, self.WorkspaceID, self.__TempLocation__)
+                elif input_basin != "none":
+                    if arcpy.Exists(input_basin):
+                        ArcHydroTools.StreamstatsGlobalParametersServer(input_basin, os.path.join(workspace,"GlobalWatershedPoint"), 
+                                                                    parameters, outputFile.format(".xml"), outputFile.format(".htm"), 
+                                                                    xmlfile,"", self.WorkspaceID )
+                else:
+                    ArcHydroTools.StreamstatsGlobalParametersServer(os.path.join(workspace,"GlobalWatershed"), 
+                                                                    os.path.join(workspace,"GlobalWatershedPoint"), 
+                                                                    parameters, outputFile.format(".xml"), outputFile.format(".htm"), 
+                                                                    xmlfile,"", self.WorkspaceID )
 
-            self.__sm__(arcpy.GetMessages(),'AHMSG')
-            arcpy.CheckInExtension("Spatial")
+                self.__sm__(arcpy.GetMessages(),'AHMSG')
+                arcpy.CheckInExtension("Spatial")
 
-            plist = self.__parseParameterXML__(outputFile.format(".xml"))
+                computed.extend(self.__parseParameterXML__(outputFile.format(".xml")) or [])
+            if key != None and computed: cache.Put(key, computed)
+            if cache != None: self.__sm__(cache.Summary())
+
+            plist = self.__mergeParameters__(codes, cached, computed)
             if (len(plist) < 1):
                 raise Exception("No parameters returned")
            
@@ -134,6 +178,53 @@ class BasinParameters(object):
             param = apField.get('AliasName')
             xmlParams.append(param.lower())
         return xmlParams
+    def __cachedParameters__(self, basin, xmlfile, codes):
+        # (cache, key, {CODE: parameter}) of the codes already computed, nothing cached when the basin can't be keyed
+        if not self.__cacheSettings__.get("enabled", True) or not codes: return None, None, {}
+        try:
+            cache = ParameterCache(self.RegionID, self.__cacheSettings__.get("folder") or None, self.__sm__)
+            key = cache.Key(basin, xmlfile)
+            if key == None: return cache, None, {}
+            return cache, key, cache.Get(key, codes)
+        except:
+            tb = traceback.format_exc()
+            self.__sm__("Not using the parameter cache "+tb,"ERROR")
+            return None, None, {}
+    def __zonalParameters__(self, basin, codes, xmlfile):
+        # ([parameter], codes left) computing the codes with a zonalStatistics definition from the bc_layers rasters
+        definitions = self.__zonalSettings__.get("characteristics", {})
+        if not self.__zonalSettings__.get("enabled", False) or not definitions: return [], codes
+        try:
+            bcLayers = ET.parse(xmlfile).getroot().find('.//RASTERDATAPATH').text.strip()
+            paths = {}
+            for code in codes:
+                layer = definitions.get(code.upper(), {}).get('layer')
+                if layer and layer not in paths:
+                    paths[layer] = next((os.path.join(bcLayers, name) for name in (layer, layer + '.tif', layer + '.img')
+                                         if arcpy.Exists(os.path.join(bcLayers, name))), None)
+            found = [path for path in paths.values() if path != None]
+            if not found: return [], codes
+
+            #basin projected once, to the first raster; rasters in another projection are left for ArcHydro
+            sr = arcpy.Describe(found[0]).spatialReference
+            engine = ZonalStatistics(basinRings(basin, sr), definitions, self.__sm__)
+            def rasterFor(layer):
+                if paths.get(layer) == None: return None
+                raster = ArcpyRaster(paths[layer])
+                return raster if raster.SpatialReference.name == sr.name else None
+            return engine.Characteristics(codes, rasterFor)
+        except:
+            tb = traceback.format_exc()
+            self.__sm__("Not using zonal statistics "+tb,"ERROR")
+            return [], codes
+    def __mergeParameters__(self, codes, cached, computed):
+        # requested codes in the order asked, then anything else ArcHydro returned
+        byCode = dict(cached)
+        for parameter in computed:
+            byCode.setdefault(parameter['code'].upper(), parameter)
+        plist = [byCode.pop(code.upper()) for code in codes if code.upper() in byCode]
+        plist.extend(parameter for parameter in computed if parameter['code'].upper() in byCode)
+        return plist
     def __parseParameterXML__(self, xmlfile):
         paramList = []
         try:
@@ -0,0 +1,237 @@
+#------------------------------------------------------------------------------
+#----- BatchDelineation.py ----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Delineates many pour points of one region in a single session
+#
+#discussion:  Pour points come as a GeoJSON FeatureCollection, a list of
+#             [x, y] or {"id", "coordinates"}, or a json file of either.
+#             Each worker process prepares one Delineation session (xml,
+#             feature classes, Spatial extension) and keeps it for all of its
+#             points; arcpy and ArcHydro are not thread safe, so workers are
+#             processes with their own workspace.  Every watershed lands in
+#             one GlobalWatershedBatch feature class with the point's BatchID,
+#             Status, Seconds and Error, failed points as rows without shape.
+#             A worker that cannot prepare its session fails its points
+#             instead of dying, which would leave the pool respawning it.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import traceback
+import os
+import json
+import time
+import argparse
+from multiprocessing import util
+import arcpy
+from Delineation import Delineation
+from FileWorkers import processPool
+#endregion
+
+try:
+    basestring
+except NameError:
+    basestring = str
+
+BATCH_FIELDS = (("BatchID", "TEXT", 50), ("Status", "TEXT", 10), ("Seconds", "DOUBLE", None), ("Error", "TEXT", 255))
+
+def readPourPoints(source):
+    """readPourPoints(source)
+        Pour points as [{'id', 'coordinates'}] from a FeatureCollection, a list, or a json string or file of either
+    """
+    if isinstance(source, basestring):
+        if os.path.isfile(source):
+            with open(source) as f:
+                source = json.load(f)
+        else:
+            source = json.loads(source)
+    if isinstance(source, dict):
+        if source.get('type') == 'FeatureCollection': source = source.get('features', [])
+        else: source = [source]
+
+    points = []
+    for i, item in enumerate(source):
+        pointID = str(i + 1)
+        if isinstance(item, dict):
+            properties = item.get('properties') or {}
+            pointID = str(item.get('id') or properties.get('id') or properties.get('Name') or pointID)
+            geometry = item.get('geometry', item)
+            if geometry.get('type', 'Point') != 'Point': raise ValueError('pour point ' + pointID + ' is not a Point')
+            item = geometry['coordinates']
+        if len(item) < 2: raise ValueError('pour point ' + pointID + ' has no x, y coordinates')
+        points.append({'id': pointID, 'coordinates': [float(item[0]), float(item[1])]})
+    return points
+
+class BatchDelineation(object):
+    #region Constructor
+    def __init__(self, regionID, schemas, xml, workspaceID, state_folder, workers=1, wkid=4326):
+        self.RegionID = regionID
+        self.Workers = max(1, workers)
+        self.WKID = wkid
+        self.Results = []
+        self.Output = None
+        self.isComplete = False
+        self.__args__ = (regionID, schemas, xml, workspaceID, state_folder)
+        self.__workspace__ = workspaceID
+        self.__session__ = Delineation(regionID, schemas, xml, workspaceID, state_folder)
+    #endregion
+
+    #region Methods
+    def Execute(self, pourPoints):
+        """Execute(pourPoints)
+            Delineates every pour point (see readPourPoints) into GlobalWatershedBatch, returns the per point results
+        """
+        started = time.time()
+        points = readPourPoints(pourPoints)
+        session = self.__session__
+        try:
+            session.Prepare()
+            self.Output = os.path.join(session.__featurePath__, "GlobalWatershedBatch")
+            session.__sm__("Batch delineation of " + str(len(points)) + " pour points with " + str(self.Workers) + " workers")
+
+            if self.Workers == 1 or len(points) < 2:
+                _createOutput(session, self.Output)
+                self.Results = [_delineate(session, self.Output, point, self.WKID) for point in points]
+            else:
+                self.Results = self.__runWorkers__(points)
+                outputs = sorted(set(r['output'] for r in self.Results if r['output'] != None))
+                if outputs: arcpy.Merge_management(outputs, self.Output)
+                else: _createOutput(session, self.Output)
+                # points of workers that could not prepare a session have no row yet
+                unwritten = [r for r in self.Results if r['output'] == None]
+                if unwritten:
+                    with arcpy.da.InsertCursor(self.Output, [f[0] for f in BATCH_FIELDS]) as cursor:
+                        for r in unwritten:
+                            cursor.insertRow([r['id'], r['status'], r['seconds'], r['error'][-255:]])
+                            r['output'] = self.Output
+
+            failed = [r for r in self.Results if r['status'] != 'ok']
+            session.__sm__("Batch delineation finished: " + str(len(self.Results) - len(failed)) + " delineated, " +
+                           str(len(failed)) + " failed in " + str(round(time.time() - started, 1)) + " s")
+            self.__writeSummary__(time.time() - started)
+            self.isComplete = True
+        except:
+            tb = traceback.format_exc()
+            session.error = tb
+            session.__sm__("Batch Delineation Error " + tb, "ERROR")
+        finally:
+            session.Release()
+        return self.Results
+    #endregion
+
+    #region Helper Methods
+    def __runWorkers__(self, points):
+        pool = processPool(min(self.Workers, len(points)), _startWorker, self.__args__)
+        try:
+            return pool.map(_runPoint, [(point, self.WKID) for point in points], 1)
+        finally:
+            pool.close()
+            pool.join()
+    def __writeSummary__(self, seconds):
+        summary = {'region': self.RegionID, 'output': self.Output, 'seconds': seconds,
+                   'delineated': len([r for r in self.Results if r['status'] == 'ok']),
+                   'failed': len([r for r in self.Results if r['status'] != 'ok']),
+                   'points': [dict((k, v) for k, v in r.items() if k != 'output') for r in self.Results]}
+        with open(os.path.join(self.__workspace__, 'delineationBatch.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+    #endregion
+
+#region worker process
+# each pool process keeps one prepared session and its own output feature class
+__worker__ = {}
+
+def _startWorker(regionID, schemas, xml, workspaceID, state_folder):
+    # an initializer that raises kills the process and the pool starts another one forever, so errors are kept
+    session = None
+    try:
+        folder = os.path.join(workspaceID, 'batch', 'worker' + str(os.getpid()))
+        session = Delineation(regionID, schemas, xml, folder, state_folder)
+        session.Prepare()
+        output = os.path.join(session.__featurePath__, "GlobalWatershedBatch")
+        _createOutput(session, output)
+        __worker__['session'] = session
+        __worker__['output'] = output
+        # checks the Spatial extension back in and removes GlobalWatershedTemp when the pool closes
+        util.Finalize(session, session.Release, exitpriority=10)
+    except:
+        __worker__['error'] = traceback.format_exc()
+        if session != None:
+            try:
+                session.Release()
+            except:
+                pass
+
+def _runPoint(args):
+    point, wkid = args
+    if 'error' in __worker__:
+        return {'id': point['id'], 'coordinates': point['coordinates'], 'status': 'failed', 'seconds': 0,
+                'error': 'worker could not prepare the session ' + __worker__['error'], 'output': None}
+    return _delineate(__worker__['session'], __worker__['output'], point, wkid)
+
+def _createOutput(session, output):
+    arcpy.CreateFeatureclass_management(os.path.dirname(output), os.path.basename(output), "POLYGON",
+                                        os.path.join(session.__templatePath__, "GlobalWatershed" + session.__regionID__),
+                                        "SAME_AS_TEMPLATE", "SAME_AS_TEMPLATE", session.__spatialReference__)
+    for name, fieldType, length in BATCH_FIELDS:
+        arcpy.AddField_management(output, name, fieldType, field_length=length)
+
+def _delineate(session, output, point, wkid):
+    started = time.time()
+    status = 'ok'
+    error = ''
+    pourPoint = None
+    try:
+        pourPoint = session._buildAHPourpoint(json.dumps(point['coordinates']), wkid)
+        if pourPoint == None: raise Exception('could not build the pour point')
+        watershed = session.__delineatePoint__(pourPoint, True)
+        if int(arcpy.GetCount_management(watershed)[0]) == 0: raise Exception('no watershed was delineated')
+        arcpy.Append_management(watershed, output, "NO_TEST")
+    except:
+        status = 'failed'
+        error = traceback.format_exc()
+        session.__sm__("Delineation Error for pour point " + point['id'] + " " + error, "ERROR")
+    finally:
+        if pourPoint != None: arcpy.Delete_management(pourPoint)
+    seconds = time.time() - started
+
+    fields = [f[0] for f in BATCH_FIELDS]
+    row = [point['id'], status, seconds, error[-255:]]
+    if status == 'ok':
+        # the rows just appended are the ones without a BatchID
+        with arcpy.da.UpdateCursor(output, fields, "BatchID IS NULL") as cursor:
+            for r in cursor:
+                cursor.updateRow(row)
+    else:
+        with arcpy.da.InsertCursor(output, fields) as cursor:
+            cursor.insertRow(row)
+    session.__sm__("pour point " + point['id'] + ": " + status + " in " + str(round(seconds, 1)) + " s")
+    return {'id': point['id'], 'coordinates': point['coordinates'], 'status': status, 'seconds': seconds,
+            'error': error, 'output': output}
+#endregion
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-region", help="region (state) abbreviation", type=str, required=True)
+    parser.add_argument("-schema_file", help="specifies the location of the regional schema .gdb", type=str, required=True)
+    parser.add_argument("-xml_file", help="specifies the regional xml file", type=str, required=True)
+    parser.add_argument("-workspace", help="folder for the batch workspace gdb, logs and delineationBatch.json", type=str, required=True)
+    parser.add_argument("-state_folder", help="specifies the regional folder containing 'archydro' and bc_layers' folders", type=str, required=True)
+    parser.add_argument("-pour_points", help="GeoJSON FeatureCollection or json list of [x, y] pour points, or a file containing one", type=str, required=True)
+    parser.add_argument("-wkid", help="spatial reference of the pour point coordinates", type=int, default=4326)
+    parser.add_argument("-workers", help="number of delineation processes", type=int, default=1)
+
+    args = parser.parse_args()
+    batch = BatchDelineation(args.region, args.schema_file, args.xml_file, args.workspace, args.state_folder, args.workers, args.wkid)
+    batch.Execute(args.pour_points)
@@ -0,0 +1,301 @@
+#------------------------------------------------------------------------------
+#----- Benchmark.py -----------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Times the data preparation steps of ParseData, UpdateS3 and
+#             PullFromS3 on a synthetic region, so runs can be compared
+#
+#discussion:  A region tree is generated from a seed: archydro with N HUC
+#             folders (a gdb and fdr, str, cat grids to keep, fac and tmp
+#             grids and stray files to delete), an old and the global gdb,
+#             bc_layers with M grids and the info folder, and a StreamStats
+#             xml with K WshParams ApFields, half the grids referenced, and
+#             the nodes the thinning removes.  The phases run the same
+#             classes as the tools, in their order: xml (StreamStatsXML),
+#             stage (StageData of archydro and bc_layers), delete (DeletePlan
+#             and the file deletes on a full copy, the path that does not
+#             stage), upload and download (TransferAgent on its local
+#             backend, the S3 stand-in).  Nothing needs ArcGIS: listing and
+#             deleting feature classes, the only arcpy calls on the way, are
+#             replaced with stand-ins over the generated gdbs.  Each phase is
+#             repeated on fresh copies; the results json keeps every time,
+#             the medians and the parameters, and -compare reports phases
+#             slower than a previous results file by more than -tolerance.
+#
+#             python Benchmark.py -hucs 20 -grids 40 -fields 200 -results bench.json
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+from StreamStatsXML import StreamStatsXML
+from DeletePlan import KeepSet, DeletePlan
+from StageData import StageData
+from FileWorkers import FileWorkers
+from TransferAgent import createTransferAgent
+#endregion
+
+PHASES = ('xml', 'stage', 'delete', 'upload', 'download')
+GRID_FILES = ('dblbnd.adf', 'hdr.adf', 'sta.adf', 'w001001.adf', 'w001001x.adf')
+
+def median(values):
+    values = sorted(values)
+    if not values: return None
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+def _write(path, size, rnd):
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder): os.makedirs(folder)
+    with open(path, 'wb') as f:
+        f.write(bytearray(rnd.getrandbits(8) for i in range(min(size, 256))) * (size // 256 + 1))
+        f.truncate(size)
+
+def _grid(folder, name, gridBytes, rnd):
+    for f in GRID_FILES:
+        _write(os.path.join(folder, name, f), gridBytes if f == 'w001001.adf' else 256, rnd)
+
+class SyntheticRegion(object):
+    #region Constructor
+    def __init__(self, folder, regionID='xx', hucs=10, grids=20, fields=100, gridBytes=64 * 1024, seed=1):
+        self.RegionID = regionID
+        self.StateFolder = os.path.join(folder, regionID)
+        self.XMLPath = os.path.join(folder, 'StreamStats' + regionID.upper() + '.xml')
+        self.Hucs = hucs
+        self.Grids = grids
+        self.Fields = fields
+        self.GridBytes = gridBytes
+        # stand-in for the Layers datasets ArcGIS would list: {workspace: [feature classes]}
+        self.FeatureClasses = {}
+        self._rnd = random.Random(seed)
+    #endregion
+
+    #region Methods
+    def Generate(self):
+        """Generate()
+            Writes the state folder and the xml, returns (files, bytes) of the state folder
+        """
+        if os.path.isdir(self.StateFolder): shutil.rmtree(self.StateFolder)
+        archydro = os.path.join(self.StateFolder, 'archydro')
+        for gdb in ('global.gdb', 'global_old.gdb'):
+            self._gdb(os.path.join(archydro, gdb), ['GlobalWatershed', 'GlobalWatershedPoint', 'tmp_basin'])
+        for i in range(self.Hucs):
+            huc = os.path.join(archydro, '0101%04d' % i)
+            self._gdb(os.path.join(huc, '0101%04d.gdb' % i), ['Catchment', 'DrainageLine', 'AdjointCatchment', 'tmp_line'])
+            for name in ('fdr', 'str', 'cat', 'fac', 'tmp%d' % i): _grid(huc, name, self.GridBytes, self._rnd)
+            _write(os.path.join(huc, 'notes.txt'), 512, self._rnd)
+            _write(os.path.join(huc, 'backup.zip'), 4096, self._rnd)
+        bcLayers = os.path.join(self.StateFolder, 'bc_layers')
+        for i in range(self.Grids): _grid(bcLayers, 'bc%03d' % i, self.GridBytes, self._rnd)
+        for name in ('arc.dir', 'arc0000.dat', 'arc0000.nit'): _write(os.path.join(bcLayers, 'info', name), 1024, self._rnd)
+        _write(os.path.join(self.StateFolder, 'readme.txt'), 1024, self._rnd)
+        self._writeXML()
+        return self.Size(self.StateFolder)
+    def ListFeatureClasses(self, workspace):
+        return list(self.FeatureClasses.get(workspace, []))
+    def Size(self, folder):
+        files = [os.path.join(root, f) for root, dirs, names in os.walk(folder) for f in names]
+        return len(files), sum(os.path.getsize(f) for f in files)
+    #endregion
+
+    #region Helper Methods
+    def _gdb(self, folder, featureClasses):
+        for i in range(8): _write(os.path.join(folder, 'a%08x.gdbtable' % (i + 1)), 4096, self._rnd)
+        _write(os.path.join(folder, 'gdb'), 8, self._rnd)
+        self.FeatureClasses[os.path.join(folder, 'Layers')] = list(featureClasses)
+    def _writeXML(self):
+        used = max(1, self.Grids // 2)
+        lines = ['<?xml version="1.0" encoding="utf-8"?>', '<StreamStatsConfig' + self.RegionID.upper() + '>',
+                 '  <Documentation>' + 'x' * 4096 + '</Documentation>', '  <ProgParams>',
+                 '    <TemplateView>e:\\schemas\\' + self.RegionID + '_ss.gdb</TemplateView>',
+                 '    <TempLocation>e:\\temp</TempLocation>', '    <DataPath>e:\\data\\' + self.RegionID + '</DataPath>',
+                 '    <RASTERDATAPATH>e:\\data\\' + self.RegionID + '\\bc_layers</RASTERDATAPATH>',
+                 '    <VECTORDATAPATH>e:\\data\\' + self.RegionID + '\\archydro</VECTORDATAPATH>',
+                 '    <EditorHistory>' + 'y' * 2048 + '</EditorHistory>', '  </ProgParams>', '  <ApFunctions>',
+                 '    <ApFunction Name="GlobalPointDelineation" TagName="GlobalPointDelineation">',
+                 '      <ApLayers>', '        <ApLayer Name="fdr" />', '        <ApLayer Name="str" />', '        <ApLayer Name="cat" />',
+                 '      </ApLayers>', '      <Unused>' + 'z' * 1024 + '</Unused>', '    </ApFunction>',
+                 '    <ApFunction Name="WshParams" TagName="WshParams">', '      <ApFields TagName="ApFields">']
+        for i in range(self.Fields):
+            lines += ['        <ApField Name="CODE%d" AliasName="CODE%d" Description="synthetic characteristic %d" Units="percent">' % (i, i, i),
+                      '          <ApLayers><ApLayer Name="bc%03d" AliasName="bc%03d" /></ApLayers>' % (i % used, i % used),
+                      '        </ApField>']
+        lines += ['      </ApFields>', '      <Flows TagName="Flows">' + 'f' * 2048 + '</Flows>', '    </ApFunction>',
+                  '    <ApFunction Name="Retired" TagName="Retired"><ApLayers><ApLayer Name="fac" /></ApLayers></ApFunction>',
+                  '  </ApFunctions>', '</StreamStatsConfig' + self.RegionID.upper() + '>']
+        with open(self.XMLPath, 'w') as f:
+            f.write('\n'.join(lines))
+    #endregion
+
+class Benchmark(object):
+    #region Constructor
+    def __init__(self, region, workFolder, fileWorkers=4, transferWorkers=4, useLinks=True, streamAboveMB=0, messenger=None):
+        self.Region = region
+        self.WorkFolder = workFolder
+        self.FileWorkers = fileWorkers
+        self.TransferWorkers = transferWorkers
+        self.UseLinks = useLinks
+        self.StreamAboveMB = streamAboveMB
+        self.Seconds = dict((phase, []) for phase in PHASES)
+        self.Counts = {}
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Run(self, repeat=3):
+        """Run(repeat=3)
+            Runs every phase repeat times on fresh copies, returns {phase: [seconds]}
+        """
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')) as c:
+            necessaryXMLNodes = json.load(c)[0]["necessaryXMLNodes"]
+        for i in range(repeat):
+            self._reset()
+            layers = self._time('xml', self._xml, necessaryXMLNodes)
+            staged = self._time('stage', self._stage, layers)
+            self._copy(self.Region.StateFolder, os.path.join(self.WorkFolder, 'full'))
+            self._time('delete', self._delete, os.path.join(self.WorkFolder, 'full'), layers)
+            self._time('upload', self._transfer, staged, 's3://benchmark/' + self.Region.RegionID)
+            self._time('download', self._transfer, 's3://benchmark/' + self.Region.RegionID, os.path.join(self.WorkFolder, 'pulled'))
+            self._sm('run ' + str(i + 1) + ': ' + ', '.join(p + ' ' + str(round(self.Seconds[p][-1], 3)) + ' s' for p in PHASES))
+        self._reset()
+        return self.Seconds
+    def Results(self):
+        return {'parameters': {'hucs': self.Region.Hucs, 'grids': self.Region.Grids, 'fields': self.Region.Fields,
+                               'gridBytes': self.Region.GridBytes, 'fileWorkers': self.FileWorkers,
+                               'transferWorkers': self.TransferWorkers, 'useLinks': self.UseLinks,
+                               'streamAboveMB': self.StreamAboveMB},
+                'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                                'processor': platform.processor(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+                'counts': self.Counts,
+                'phases': dict((phase, {'seconds': s, 'median': median(s), 'min': min(s) if s else None})
+                               for phase, s in self.Seconds.items())}
+    #endregion
+
+    #region Helper Methods
+    def _time(self, phase, function, *args):
+        started = time.time()
+        result = function(*args)
+        self.Seconds[phase].append(time.time() - started)
+        return result
+    def _xml(self, necessaryXMLNodes):
+        xmlPath = os.path.join(self.WorkFolder, os.path.basename(self.Region.XMLPath))
+        shutil.copy(self.Region.XMLPath, xmlPath)
+        thin = StreamStatsXML(self.Region.RegionID, necessaryXMLNodes, self.StreamAboveMB)
+        layers = thin.Process(xmlPath)
+        self.Counts['xmlNodesRemoved'] = thin.Removed
+        self.Counts['layers'] = len(layers)
+        return layers
+    def _stage(self, layers):
+        staged = os.path.join(self.WorkFolder, 'staged', self.Region.RegionID)
+        with FileWorkers(self.FileWorkers) as workers:
+            stage = StageData(KeepSet(layers, self.Region.RegionID, self.Region.StateFolder), workers, self.UseLinks)
+            for folder in ('archydro', 'bc_layers'):
+                stage.Stage(os.path.join(self.Region.StateFolder, folder), os.path.join(staged, folder))
+        self.Counts['stagedFiles'], self.Counts['stagedBytes'] = self.Region.Size(staged)
+        return staged
+    def _delete(self, stateFolder, layers):
+        # ParseData.__deleteFiles__, with the feature class listing and arcpy deletes replaced
+        with FileWorkers(self.FileWorkers) as workers:
+            fullRegion = dict((w.replace(self.Region.StateFolder, stateFolder, 1), fcs) for w, fcs in self.Region.FeatureClasses.items())
+            plan = DeletePlan(stateFolder, KeepSet(layers, self.Region.RegionID, stateFolder), lambda w: fullRegion.get(w, []), workers)
+            for gdb, size in plan.Geodatabases: shutil.rmtree(gdb)
+            for workspace, fc in plan.FeatureClasses: fullRegion[workspace] = [f for f in fullRegion[workspace] if f != fc]
+            for workspace in plan.Datasets: fullRegion.pop(workspace, None)
+            failed = dict(workers.Unlink(path for path, size in plan.Files))
+            if failed: raise list(failed.values())[0]
+            workers.RemoveDirs(plan.Folders)
+        self.Counts['deletedFiles'] = len(plan.Files)
+        self.Counts['deletedBytes'] = plan.FileBytes() + plan.GeodatabaseBytes()
+    def _transfer(self, source, destination):
+        agent = createTransferAgent({'backend': 'local', 'localRoot': os.path.join(self.WorkFolder, 'bucket'),
+                                     'fileWorkers': self.TransferWorkers})
+        try:
+            moved = agent.Copy(source, destination, True)
+        finally:
+            agent.Close()
+        self.Counts['transferredFiles'] = agent.FilesTransferred
+        self.Counts['transferredBytes'] = moved
+    def _copy(self, source, destination):
+        if os.path.isdir(destination): shutil.rmtree(destination)
+        shutil.copytree(source, destination)
+    def _reset(self):
+        for name in ('staged', 'full', 'bucket', 'pulled'):
+            path = os.path.join(self.WorkFolder, name)
+            if os.path.isdir(path): shutil.rmtree(path)
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
+
+def compareResults(current, previous, tolerance=0.2):
+    """compareResults(current, previous, tolerance=0.2)
+        [(phase, previous median, current median, ratio)] of the phases more than tolerance slower than previous
+    """
+    slower = []
+    for phase in PHASES:
+        before = previous.get('phases', {}).get(phase, {}).get('median')
+        after = current.get('phases', {}).get(phase, {}).get('median')
+        if not before or after == None: continue
+        if after / before > 1 + tolerance: slower.append((phase, before, after, after / before))
+    return slower
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-hucs", help="HUC folders in archydro", type=int, default=10)
+    parser.add_argument("-grids", help="grids in bc_layers", type=int, default=20)
+    parser.add_argument("-fields", help="WshParams ApFields in the xml", type=int, default=100)
+    parser.add_argument("-grid_kb", help="size of each grid's w001001.adf", type=int, default=64)
+    parser.add_argument("-repeat", help="times each phase runs", type=int, default=3)
+    parser.add_argument("-file_workers", help="threads of the staging and delete file operations", type=int, default=4)
+    parser.add_argument("-transfer_workers", help="files transferred at the same time", type=int, default=4)
+    parser.add_argument("-copy", help="stage by copying instead of hard links", action="store_true")
+    parser.add_argument("-stream_above_mb", help="stream xml files above this size", type=float, default=0)
+    parser.add_argument("-folder", help="work folder, a temp folder removed afterwards when empty", type=str, default="")
+    parser.add_argument("-seed", help="seed of the synthetic data", type=int, default=1)
+    parser.add_argument("-results", help="json results file", type=str, default="benchmark.json")
+    parser.add_argument("-compare", help="previous json results file to compare with", type=str, default="")
+    parser.add_argument("-tolerance", help="slowdown of a phase median reported by -compare", type=float, default=0.2)
+
+    args = parser.parse_args()
+    folder = args.folder or tempfile.mkdtemp(prefix='ss-benchmark-')
+    def messenger(msg, type='INFO'):
+        print(type + ': ' + msg)
+    try:
+        region = SyntheticRegion(os.path.join(folder, 'source'), 'xx', args.hucs, args.grids, args.fields, args.grid_kb * 1024, args.seed)
+        files, size = region.Generate()
+        messenger('generated ' + str(files) + ' files (' + str(size) + ' bytes) in ' + region.StateFolder)
+        bench = Benchmark(region, os.path.join(folder, 'work'), args.file_workers, args.transfer_workers, not args.copy,
+                          args.stream_above_mb, messenger)
+        if not os.path.isdir(bench.WorkFolder): os.makedirs(bench.WorkFolder)
+        bench.Run(args.repeat)
+        results = bench.Results()
+        results['counts']['sourceFiles'], results['counts']['sourceBytes'] = files, size
+        with open(args.results, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        messenger('results: ' + args.results + ' ' + ', '.join(p + ' ' + str(round(results['phases'][p]['median'], 3)) + ' s' for p in PHASES))
+        if args.compare:
+            with open(args.compare) as f:
+                slower = compareResults(results, json.load(f), args.tolerance)
+            for phase, before, after, ratio in slower:
+                messenger(phase + ' ' + str(round(before, 3)) + ' s -> ' + str(round(after, 3)) + ' s (' + str(round(ratio, 2)) + 'x)', 'ERROR')
+            if slower: sys.exit(1)
+    finally:
+        if not args.folder: shutil.rmtree(folder, True)
@@ -0,0 +1,182 @@
+#------------------------------------------------------------------------------
+#----- DeletePlan.py ----------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Works out everything ParseData removes from a state folder, in
+#             one directory scan, before anything is removed
+#
+#discussion:  KeepSet holds the layer names parsed from the xml plus the
+#             names always kept; every keep rule is an exact name lookup in
+#             one frozenset.  DeletePlan walks the state folder once with
+#             scandir (the scandir package or os.listdir on python 2), a depth
+#             at a time so FileWorkers can list a level's folders in parallel,
+#             lists the feature classes of each geodatabase once, records the
+#             files, old geodatabases, feature classes and emptied folders to
+#             remove along with their sizes.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import json
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+#endregion
+
+def listEntries(folder):
+    """listEntries(folder)
+        Yields (name, path, isDir, size) for the entries of folder, stat'ing each file once
+    """
+    if scandir != None:
+        for entry in scandir(folder):
+            isDir = entry.is_dir()
+            yield entry.name, entry.path, isDir, 0 if isDir else entry.stat().st_size
+    else:
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            isDir = os.path.isdir(path)
+            yield name, path, isDir, 0 if isDir else os.path.getsize(path)
+
+class KeepSet(object):
+    #region Constructor
+    def __init__(self, layers, regionID, stateFolder):
+        names = set(layer.lower() for layer in layers)
+        names.update(('global.gdb', 'schema', 'streamstats' + regionID.lower(), regionID.lower() + '_ss.gdb', 'readme', 'xml'))
+        # adjusted for NY
+        if os.path.basename(stateFolder).lower() == "ny": names.update(('cat', 'info'))
+        self.Names = frozenset(names)
+        self._infoFolder = os.path.join(stateFolder, "bc_layers", "info")
+    #endregion
+
+    #region Methods
+    def DeletesFile(self, folder, name):
+        """DeletesFile(folder, name)
+            True if the file is neither a kept layer, inside a geodatabase, in a kept folder nor in bc_layers/info
+        """
+        if name.endswith('.mdb') or name.endswith('.zip'): return True
+        fileDir = os.path.basename(folder).lower()
+        lower = name.lower()
+        if fileDir.endswith('.gdb') or lower.endswith('.gdb'): return False
+        filename = os.path.splitext(lower)[0]
+        names = self.Names
+        if lower in names or fileDir in names or filename in names or filename[:-4] in names: return False
+        return folder != self._infoFolder
+    def KeepsFeatureClass(self, name):
+        return name.lower() in self.Names
+    #endregion
+
+class DeletePlan(object):
+    #region Constructor
+    def __init__(self, stateFolder, keepSet, listFeatureClasses, workers=None):
+        self.StateFolder = stateFolder
+        self.Keep = keepSet
+        self.Files = []             # (path, bytes)
+        self.Geodatabases = []      # (path, bytes) of old geodatabases in archydro
+        self.FeatureClasses = []    # (Layers dataset, feature class)
+        self.Datasets = []          # Layers datasets left without feature classes
+        self.Folders = []           # folders left empty by the file deletes
+        self._listFeatureClasses = listFeatureClasses
+        self._workers = workers
+        self._scan(stateFolder)
+    #endregion
+
+    #region Methods
+    def FileBytes(self):
+        return sum(size for path, size in self.Files)
+    def GeodatabaseBytes(self):
+        return sum(size for path, size in self.Geodatabases)
+    def Summary(self):
+        return ('delete plan for ' + self.StateFolder + ': ' + str(len(self.Files)) + ' files (' + str(self.FileBytes()) +
+                ' bytes), ' + str(len(self.Geodatabases)) + ' geodatabases (' + str(self.GeodatabaseBytes()) + ' bytes), ' +
+                str(len(self.FeatureClasses)) + ' feature classes, ' + str(len(self.Datasets)) + ' datasets, ' +
+                str(len(self.Folders)) + ' folders')
+    def Save(self, path):
+        plan = {'stateFolder': self.StateFolder,
+                'keep': sorted(self.Keep.Names),
+                'files': [{'path': p, 'bytes': size} for p, size in self.Files],
+                'geodatabases': [{'path': p, 'bytes': size} for p, size in self.Geodatabases],
+                'featureClasses': [{'workspace': w, 'name': fc} for w, fc in self.FeatureClasses],
+                'datasets': self.Datasets,
+                'folders': self.Folders,
+                'totals': {'files': len(self.Files), 'fileBytes': self.FileBytes(),
+                           'geodatabases': len(self.Geodatabases), 'geodatabaseBytes': self.GeodatabaseBytes(),
+                           'featureClasses': len(self.FeatureClasses),
+                           'bytes': self.FileBytes() + self.GeodatabaseBytes()}}
+        with open(path, 'w') as f:
+            json.dump(plan, f, indent=2)
+    #endregion
+
+    #region Helper Methods
+    def _scan(self, top):
+        # one depth at a time, so the folders of a level are listed in parallel when there are workers
+        level = [top]
+        while level:
+            folders = level
+            level = []
+            for folder, entries in zip(folders, self._list(folders)):
+                level.extend(self._planFolder(top, folder, entries))
+        # deepest first, so a folder is removed after the folders in it
+        self.Folders.sort(key=lambda f: -f.count(os.sep))
+    def _planFolder(self, top, folder, entries):
+        files = []
+        dirs = []
+        subfolders = []
+        for name, path, isDir, size in entries:
+            if isDir: dirs.append((name, path))
+            else: files.append((name, path, size))
+
+        deleted = 0
+        for name, path, size in files:
+            if self.Keep.DeletesFile(folder, name):
+                self.Files.append((path, size))
+                deleted += 1
+
+        removedDirs = 0
+        for name, path in dirs:
+            if not name.lower().endswith('.gdb'):
+                subfolders.append(path)
+            elif os.path.basename(folder) == "archydro" and not name.lower() == "global.gdb": # remove old global.gdbs
+                self.Geodatabases.append((path, self._size(path)))
+                removedDirs += 1
+            else:
+                if '_ss.gdb' not in name: self._planFeatureClasses(os.path.join(path, 'Layers'))
+                subfolders.append(path)
+
+        # like os.rmdir after the deletes, only folders that had files deleted and are left empty
+        if deleted and deleted == len(files) and removedDirs == len(dirs) and folder != top:
+            self.Folders.append(folder)
+        return subfolders
+    def _planFeatureClasses(self, workspace):
+        # remove unnecessary feature classes from all gdbs, and the Layers dataset once none are left
+        fclasses = self._listFeatureClasses(workspace) or []
+        remove = [fc for fc in fclasses if not self.Keep.KeepsFeatureClass(fc)]
+        self.FeatureClasses.extend((workspace, fc) for fc in remove)
+        if len(remove) == len(fclasses): self.Datasets.append(workspace)
+    def _list(self, folders):
+        if self._workers != None: return self._workers.List(folders)
+        return [list(listEntries(folder)) for folder in folders]
+    def _size(self, folder):
+        total = 0
+        folders = [folder]
+        while folders:
+            for name, path, isDir, size in listEntries(folders.pop()):
+                if isDir: folders.append(path)
+                else: total += size
+        return total
+    #endregion
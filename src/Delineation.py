@@ -30,8 +30,7 @@ import json
 import ArcHydroTools
 from arcpy.sa import *
 import logging
-
-import xml.dom.minidom
+import RegionContext
 #endregion
 
 class Delineation(object):
@@ -47,6 +46,10 @@ class Delineation(object):
         self.__WorkspaceDirectory__ = self.__getDirectory__(workspaceID)
         self.error = ""
         self.isComplete = False
+        self.__prepared__ = False
+        self.__context__ = None
+        self.__GW__ = None
+        self.__GWP__ = None
 
         self.__TempLocation__ = os.path.join(self.__WorkspaceDirectory__, "Temp")
 
@@ -64,52 +67,10 @@ class Delineation(object):
         
     #region Methods   
     def Delineate(self, PourPoint):
-        xmlPath =''
-        datasetPath = ''
-        featurePath=''
-        templateFeaturePath=''
-        sr = None
-        GWP = None
-        GW = None
-
         try:
-            arcpy.env.overwriteOutput = True
-            arcpy.env.workspace = self.__TempLocation__
-            arcpy.env.scratchWorkspace = self.__TempLocation__
-
-            templateFeaturePath=os.path.join(self.__templatePath__,'{0}' + self.__regionID__)
-
-            sr = arcpy.Describe(self.__templatePath__).spatialReference
-            self.__sm__("Template spatial ref: "+ sr.name)
-
-            self.__sm__("Delineation Started") 
-            datasetPath = os.path.join(self.__WorkspaceDirectory__, self.WorkspaceID + '.gdb')
-            featurePath = os.path.join(datasetPath,'Layers')
-            if not arcpy.Exists(datasetPath):
-                self.__sm__("datasetPath: " + datasetPath)
-                datasetPath = arcpy.CreateFileGDB_management(self.__WorkspaceDirectory__, self.WorkspaceID +'.gdb')[0]
-            if not arcpy.Exists(featurePath):
-                featurePath = arcpy.CreateFeatureDataset_management(datasetPath,'Layers', sr)[0]
-
-            self.__sm__("creating workspace environment. "+ datasetPath)
-            
-            GWP = arcpy.CreateFeatureclass_management(featurePath, "GlobalWatershedPoint", "POINT", 
-                                                      templateFeaturePath.format("GlobalWatershedPoint") , "SAME_AS_TEMPLATE", "SAME_AS_TEMPLATE",sr)
-            GW = arcpy.CreateFeatureclass_management(featurePath, "GlobalWatershedTemp", "POLYGON", 
-                                                     templateFeaturePath.format("GlobalWatershed"), "SAME_AS_TEMPLATE", "SAME_AS_TEMPLATE",sr)
-            
-            xmlPath = self.__SSXMLPath__("StreamStats{0}.xml".format(self.__regionID__), self.__TempLocation__, self.__TempLocation__)
-
-            arcpy.CheckOutExtension("Spatial")
-            self.__sm__("Starting Delineation")
-
-            ArcHydroTools.StreamstatsGlobalWatershedDelineation(PourPoint, GW, GWP, xmlPath , "CLEARFEATURES_NO", self.WorkspaceID)
-            self.__sm__(arcpy.GetMessages(),'AHMSG')
-
-            #remove holes  
-            self.__removePolygonHoles__(GW,featurePath)
-            arcpy.CheckInExtension("Spatial")
-            
+            self.Prepare()
+            self.__delineatePoint__(PourPoint)
+            self.isComplete = True
             self.__sm__("Finished \n")
         except:
             tb = traceback.format_exc()
@@ -118,16 +79,69 @@ class Delineation(object):
 
         finally:
             #Local cleanup
-            del GWP
-            del sr
             arcpy.Delete_management(PourPoint)
-            arcpy.Delete_management(GW)
-            arcpy.ResetEnvironments()
-            arcpy.ClearEnvironment("workspace")
+            self.Release()
             #arcpy.Delete_management(self.__TempLocation__)
+    def Prepare(self):
+        """Prepare()
+            Region-level setup shared by every delineation of this session: environment, workspace gdb, 
+            output feature classes, regional xml and the Spatial extension
+        """
+        if self.__prepared__: return
+        arcpy.env.overwriteOutput = True
+        arcpy.env.workspace = self.__TempLocation__
+        arcpy.env.scratchWorkspace = self.__TempLocation__
+
+        templateFeaturePath=os.path.join(self.__templatePath__,'{0}' + self.__regionID__)
+
+        #template spatial reference, workspace gdb and xml come from the region context, prepared once per process
+        context = RegionContext.getContext(self.__regionID__, self.__schemaPath__, self.__xmlPath__, self.__dataFolder__, self.__sm__)
+        sr = context.SpatialReference()
+        self.__sm__("Template spatial ref: "+ sr.name)
+
+        self.__sm__("Delineation Started") 
+        featurePath = context.Workspace(self.__WorkspaceDirectory__, self.WorkspaceID)
+
+        self.__sm__("creating workspace environment. "+ os.path.dirname(featurePath))
+        
+        self.__GWP__ = arcpy.CreateFeatureclass_management(featurePath, "GlobalWatershedPoint", "POINT", 
+                                                  templateFeaturePath.format("GlobalWatershedPoint") , "SAME_AS_TEMPLATE", "SAME_AS_TEMPLATE",sr)
+        self.__GW__ = arcpy.CreateFeatureclass_management(featurePath, "GlobalWatershedTemp", "POLYGON", 
+                                                 templateFeaturePath.format("GlobalWatershed"), "SAME_AS_TEMPLATE", "SAME_AS_TEMPLATE",sr)
+        
+        self.__ssXML__ = context.XMLFile(self.__TempLocation__, self.__TempLocation__)
+
+        arcpy.CheckOutExtension("Spatial")
+        self.__context__ = context
+        self.__featurePath__ = featurePath
+        self.__spatialReference__ = sr
+        self.__prepared__ = True
+    def Release(self):
+        """Release()
+            Undoes Prepare, once the last delineation of the session is done
+        """
+        if self.__GW__ != None: arcpy.Delete_management(self.__GW__)
+        if self.__prepared__: arcpy.CheckInExtension("Spatial")
+        self.__GW__ = None
+        self.__GWP__ = None
+        self.__prepared__ = False
+        arcpy.ResetEnvironments()
+        arcpy.ClearEnvironment("workspace")
     #endregion  
       
     #region Helper Methods
+    def __delineatePoint__(self, PourPoint, clear=False):
+        # delineates one pour point into the prepared feature classes, returns the watershed with holes removed
+        if clear:
+            arcpy.DeleteRows_management(self.__GW__)
+            arcpy.DeleteRows_management(self.__GWP__)
+        self.__sm__("Starting Delineation")
+
+        ArcHydroTools.StreamstatsGlobalWatershedDelineation(PourPoint, self.__GW__, self.__GWP__, self.__ssXML__ , "CLEARFEATURES_NO", self.WorkspaceID)
+        self.__sm__(arcpy.GetMessages(),'AHMSG')
+
+        #remove holes  
+        return self.__removePolygonHoles__(self.__GW__,self.__featurePath__)
     def __removePolygonHoles__(self, polyFC, path):
         try:
             
@@ -153,38 +167,6 @@ class Delineation(object):
         except:
             x = arcpy.GetMessages()
             return subDirectory
-    def __SSXMLPath__(self, xmlFileName, copyToDirectory="#", newTempWorkspace = "#"):
-        file = None
-        try:
-            #move the file to tempDirectory
-            xmlFile = self.__xmlPath__
-            if copyToDirectory != "#":
-                shutil.copy(xmlFile, copyToDirectory)
-                xmlFile = os.path.join(copyToDirectory,xmlFileName)
-
-            if newTempWorkspace == "#":
-                return xmlFile
-
-            #update tempworkspace
-            xmlDoc = xml.dom.minidom.parse(xmlFile)
-            archydroPath = os.path.join(self.__dataFolder__, 'archydro')
-            bcLayersPath = os.path.join(self.__dataFolder__, 'bc_layers')
-            xmlDoc.getElementsByTagName('RASTERDATAPATH')[0].firstChild.data = bcLayersPath
-            xmlDoc.getElementsByTagName('VECTORDATAPATH')[0].firstChild.data = os.path.join(archydroPath,"global.gdb")
-            xmlDoc.getElementsByTagName('DataPath')[0].firstChild.data = archydroPath
-            xmlDoc.getElementsByTagName('GlobalDataPath')[0].firstChild.data = os.path.join(archydroPath,"global.gdb")
-
-            file = open(xmlFile,"wb")
-            xmlDoc.writexml(file)
-
-            return xmlFile
-        except:
-             tb = traceback.format_exc()
-             self.__sm__(tb,"ERROR")
-        finally:
-            if file != None and not file.closed: 
-                file.close 
-                file = None
     def __sm__(self, msg, type = 'INFO'):
         self.Message += type +':' + msg.replace('_',' ') + '_'
 
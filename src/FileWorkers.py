@@ -0,0 +1,118 @@
+#------------------------------------------------------------------------------
+#----- FileWorkers.py ---------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Bounded thread pool for the listing, copying and deleting
+#             ParseData does while staging and cleaning a state folder
+#
+#discussion:  File system calls release the GIL, so a few threads keep fast
+#             disks and network shares busy.  Folders are created one depth
+#             at a time, parents first, and are removed deepest first after
+#             the files in them.  Callers get results back on their own
+#             thread, so logging and arcpy calls stay single threaded.
+#             processPool is the process pool every tool that runs arcpy
+#             work in parallel starts, so it also works from inside ArcMap.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from DeletePlan import listEntries
+#endregion
+
+def processPool(processes, initializer=None, initargs=()):
+    """processPool(processes, initializer=None, initargs=())
+        multiprocessing.Pool whose processes start the bundled python when run inside ArcMap
+    """
+    if sys.platform == 'win32' and not sys.executable.lower().endswith('python.exe'):
+        # inside ArcMap sys.executable is ArcMap.exe, workers have to start the bundled python
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'python.exe'))
+    return multiprocessing.Pool(processes, initializer, initargs)
+
+class FileWorkers(object):
+    #region Constructor and Dispose
+    def __init__(self, workers=4):
+        self.Workers = max(1, int(workers))
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.Close()
+    #endregion
+
+    #region Methods
+    def Map(self, func, items):
+        """Map(func, items)
+            func applied to every item on the pool, results in the order of items
+        """
+        items = list(items)
+        if self.Workers == 1 or len(items) < 2: return [func(item) for item in items]
+        if self._pool == None: self._pool = ThreadPool(self.Workers)
+        return self._pool.map(func, items, max(1, len(items) // (self.Workers * 4)))
+    def List(self, folders):
+        """List(folders)
+            The (name, path, isDir, size) entries of each folder
+        """
+        return self.Map(lambda folder: list(listEntries(folder)), folders)
+    def MakeDirs(self, folders):
+        for level in self._levels(folders):
+            self.Map(self._makeDir, level)
+    def Unlink(self, paths):
+        """Unlink(paths)
+            Removes the files, returns (path, error) for those that could not be removed
+        """
+        return [result for result in self.Map(self._unlink, paths) if result != None]
+    def RemoveDirs(self, folders):
+        """RemoveDirs(folders)
+            Removes the folders that are empty, deepest first, returns the ones removed
+        """
+        removed = []
+        for level in reversed(self._levels(folders)):
+            removed.extend(folder for folder in self.Map(self._removeDir, level) if folder != None)
+        return removed
+    def Close(self):
+        if self._pool != None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+    #endregion
+
+    #region Helper Methods
+    def _levels(self, folders):
+        # folders grouped by depth, shallowest first
+        byDepth = {}
+        for folder in set(os.path.normpath(f) for f in folders):
+            byDepth.setdefault(folder.count(os.sep), []).append(folder)
+        return [sorted(byDepth[depth]) for depth in sorted(byDepth)]
+    def _makeDir(self, folder):
+        if not os.path.isdir(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                if not os.path.isdir(folder): raise
+    def _unlink(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return path, sys.exc_info()[1]
+    def _removeDir(self, folder):
+        if os.path.isdir(folder) and os.listdir(folder) == []:
+            os.rmdir(folder)
+            return folder
+    #endregion
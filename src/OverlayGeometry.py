@@ -0,0 +1,155 @@
+#------------------------------------------------------------------------------
+#----- OverlayGeometry.py -----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Percent overlay of region polygons on a mask computed with
+#             geometries in memory, with arcpy or Shapely
+#
+#discussion:  The mask is read and unioned once, each candidate region is
+#             intersected with it in memory and the areas are converted with
+#             the spatial reference's meters per unit; nothing is written to
+#             disk.  PercentOverlayAgent uses it when created with a backend.
+#             Without ArcGIS the Shapely backend overlays GeoJSON files, one
+#             per region layer, so the overlay runs and can be benchmarked on
+#             Linux.  Areas are in the squared units of the coordinates times
+#             metersPerUnit squared, so the files should share a projected
+#             coordinate system.
+#
+#             python OverlayGeometry.py mask.geojson regions/*.geojson
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import sys
+import json
+import argparse
+from RegionIndex import RegionIndex
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+try:
+    from shapely import wkb
+    from shapely.geometry import shape
+    from shapely.ops import unary_union
+except ImportError:
+    shape = None
+#endregion
+
+class ArcpyGeometry(object):
+    Name = 'arcpy'
+    def Union(self, geometries):
+        geometries = [g for g in geometries if g != None]
+        if not geometries: return None
+        union = geometries[0]
+        for geometry in geometries[1:]: union = union.union(geometry)
+        return union
+    def Intersect(self, a, b):
+        return a.intersect(b, 4)
+    def Area(self, geometry):
+        return geometry.area if geometry != None else 0.0
+    def Bounds(self, geometry):
+        e = geometry.extent
+        return (e.XMin, e.YMin, e.XMax, e.YMax)
+    def FromArcpy(self, geometry):
+        return geometry
+
+class ShapelyGeometry(object):
+    Name = 'shapely'
+    def __init__(self):
+        if shape == None: raise ImportError('the shapely backend needs the shapely package')
+    def Union(self, geometries):
+        geometries = [g for g in geometries if g != None]
+        return unary_union(geometries) if geometries else None
+    def Intersect(self, a, b):
+        return a.intersection(b)
+    def Area(self, geometry):
+        return geometry.area if geometry != None else 0.0
+    def Bounds(self, geometry):
+        return tuple(geometry.bounds)
+    def FromArcpy(self, geometry):
+        return wkb.loads(bytes(geometry.WKB)) if geometry != None else None
+
+def geometryBackend(name):
+    """geometryBackend(name)
+        The 'arcpy' or 'shapely' geometry backend
+    """
+    if name == 'shapely': return ShapelyGeometry()
+    if name == 'arcpy':
+        if arcpy == None: raise ImportError('the arcpy backend needs ArcGIS')
+        return ArcpyGeometry()
+    raise ValueError('unknown geometry backend ' + str(name))
+
+def percentOverlay(backend, mask, regions, metersPerUnit=1.0, maskArea=None):
+    """percentOverlay(backend, mask, regions, metersPerUnit=1.0, maskArea=None)
+        [{name, code, percent, areasqmeter, maskareasqmeter}] of the (name, code, geometry) regions overlapping mask
+    """
+    results = []
+    if mask == None: return results
+    squareMeters = metersPerUnit * metersPerUnit
+    if maskArea == None: maskArea = backend.Area(mask) * squareMeters
+    if not maskArea: return results
+    for name, code, geometry in regions:
+        if geometry == None: continue
+        area = backend.Area(backend.Intersect(geometry, mask)) * squareMeters
+        if area <= 0: continue
+        results.append({"name": name, "code": code, "percent": round(area / maskArea, 2) * 100,
+                        "areasqmeter": area, "maskareasqmeter": maskArea})
+    return results
+
+def readGeoJSON(path):
+    """readGeoJSON(path)
+        [(properties, shapely geometry)] of the features of a GeoJSON file
+    """
+    with open(path) as f:
+        data = json.load(f)
+    features = data.get('features', [data] if data.get('type') == 'Feature' else [])
+    return [(feature.get('properties') or {}, shape(feature['geometry'])) for feature in features if feature.get('geometry')]
+
+def overlayGeoJSON(maskPath, regionPaths, metersPerUnit=1.0, index=None):
+    """overlayGeoJSON(maskPath, regionPaths, metersPerUnit=1.0, index=None)
+        Percent overlay of GeoJSON region layers on a GeoJSON mask with Shapely, index a RegionIndex of the layers
+    """
+    backend = ShapelyGeometry()
+    mask = backend.Union(geometry for properties, geometry in readGeoJSON(maskPath))
+    if mask == None: return []
+    layers = dict((path, readGeoJSON(path)) for path in regionPaths)
+    if index == None: index = geoJSONIndex(layers)
+    results = []
+    for path in regionPaths:
+        candidates = index.Candidates(path, backend.Bounds(mask))
+        features = layers[path]
+        if candidates == None: candidates = [(i, None, None) for i in range(len(features))]
+        regions = [(features[c[0]][0].get('Name'), features[c[0]][0].get('GRIDCODE'), features[c[0]][1]) for c in candidates]
+        results.extend(percentOverlay(backend, mask, regions, metersPerUnit))
+    return results
+
+def geoJSONIndex(layers):
+    """geoJSONIndex(layers)
+        RegionIndex of {path: readGeoJSON(path)} layers, features keyed by their position
+    """
+    index = RegionIndex()
+    for path, features in layers.items():
+        index.Add(path, None, [(i, properties.get('Name'), properties.get('GRIDCODE'), tuple(geometry.bounds))
+                               for i, (properties, geometry) in enumerate(features) if not geometry.is_empty])
+    return index
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mask", help="GeoJSON of the watershed", type=str)
+    parser.add_argument("regions", help="GeoJSON region layers with Name and GRIDCODE properties", type=str, nargs='+')
+    parser.add_argument("-meters_per_unit", help="meters per coordinate unit of the files", type=float, default=1.0)
+
+    args = parser.parse_args()
+    json.dump(overlayGeoJSON(args.mask, args.regions, args.meters_per_unit), sys.stdout, indent=2)
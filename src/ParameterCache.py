@@ -0,0 +1,174 @@
+#------------------------------------------------------------------------------
+#----- ParameterCache.py ------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Remembers computed basin characteristics per basin, so
+#             BasinParameters only computes the codes it has not seen
+#
+#discussion:  A basin is keyed by its region, a hash of its normalized
+#             geometry (coordinates rounded to a centimeter in the units of
+#             its spatial reference, 7 decimals of a degree when geographic,
+#             each ring started at its smallest vertex, rings and features
+#             sorted, plus the spatial reference) and the data version: a hash of the regional
+#             xml, without the temp location and data paths every
+#             workspace's copy rewrites, and the newest mtimes of its raster
+#             and vector data paths.
+#             Values are stored one characteristic at a time, in memory and
+#             in <folder>/<region>/<key>.json, so a request that overlaps an
+#             earlier one only computes the missing codes.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import json
+import math
+import hashlib
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+try:
+    import arcpy
+except ImportError:
+    # dataVersion and the stored values work without ArcGIS
+    arcpy = None
+from RegionContext import latestMTime
+#endregion
+
+# rewritten in each workspace's copy of the xml (RegionContext.XMLFile)
+WORKSPACE_TAGS = ('TempLocation', 'RASTERDATAPATH', 'VECTORDATAPATH', 'DataPath', 'GlobalDataPath')
+
+# shared by the caches of a process, e.g. the worker service
+__stored__ = {}
+__lock__ = threading.RLock()
+
+def geometryHash(featureClass, digits=None):
+    """geometryHash(featureClass, digits=None)
+        Hash of the polygons of featureClass, independent of feature, ring and start vertex order;
+        coordinates rounded to digits decimals, by default those of a centimeter (see roundingDigits)
+    """
+    sr = arcpy.Describe(featureClass).spatialReference
+    if digits == None: digits = roundingDigits(sr)
+    features = []
+    with arcpy.da.SearchCursor(featureClass, ["SHAPE@"]) as cursor:
+        for row in cursor:
+            if row[0] == None: continue
+            rings = []
+            for part in row[0]:
+                ring = []
+                for point in part:
+                    # interior rings of a part are separated by None
+                    if point == None:
+                        if ring: rings.append(_startAtMin(ring))
+                        ring = []
+                    else: ring.append((round(point.X, digits), round(point.Y, digits)))
+                if ring: rings.append(_startAtMin(ring))
+            features.append(sorted(rings))
+    if not features: return None
+    text = json.dumps([sr.factoryCode or sr.name, sorted(features)])
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def roundingDigits(sr):
+    """roundingDigits(sr)
+        Decimals that keep a centimeter in the units of sr: 7 for degrees, 2 for meters and feet
+    """
+    if sr.type == 'Geographic' or not sr.metersPerUnit: return 7
+    return max(0, int(math.ceil(math.log10(sr.metersPerUnit / 0.01))))
+
+def dataVersion(xmlFile):
+    """dataVersion(xmlFile)
+        Hash of the regional xml without its WORKSPACE_TAGS text, so every workspace's copy hashes the same,
+        and the newest mtimes of its RASTERDATAPATH and VECTORDATAPATH
+    """
+    root = ET.parse(xmlFile).getroot()
+    mtimes = []
+    for tag in ('RASTERDATAPATH', 'VECTORDATAPATH'):
+        node = root.find('.//' + tag)
+        if node != None and node.text: mtimes.append(repr(latestMTime(node.text.strip())))
+    for tag in WORKSPACE_TAGS:
+        for node in root.iter(tag): node.text = None
+    digest = hashlib.sha1(ET.tostring(root))
+    for mtime in mtimes: digest.update(mtime.encode('utf-8'))
+    return digest.hexdigest()
+
+def _startAtMin(ring):
+    # a closed ring drops its closing vertex before rotating
+    if len(ring) > 1 and ring[0] == ring[-1]: ring = ring[:-1]
+    i = ring.index(min(ring))
+    return ring[i:] + ring[:i]
+
+class ParameterCache(object):
+    #region Constructor
+    def __init__(self, regionID, folder=None, messenger=None):
+        self.RegionID = regionID
+        self.Folder = os.path.join(folder or os.path.join(tempfile.gettempdir(), 'ss-parameter-cache'), regionID.lower())
+        self.Hits = 0
+        self.Misses = 0
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Key(self, basin, xmlFile):
+        """Key(basin, xmlFile)
+            Cache key of the basin feature class for the data of xmlFile, None when the basin has no shape
+        """
+        geometry = geometryHash(basin)
+        if geometry == None: return None
+        return hashlib.sha1((self.RegionID.upper() + geometry + dataVersion(xmlFile)).encode('utf-8')).hexdigest()
+    def Get(self, key, codes):
+        """Get(key, codes)
+            {CODE: {'code', 'value'}} of the codes already computed for the basin
+        """
+        stored = self._load(key)
+        found = dict((code.upper(), stored[code.upper()]) for code in codes if code.upper() in stored)
+        self.Hits += len(found)
+        self.Misses += len(codes) - len(found)
+        return found
+    def Put(self, key, parameters):
+        """Put(key, parameters)
+            Adds computed {'code', 'value'} dicts to the basin's entry
+        """
+        with __lock__:
+            stored = dict(self._load(key))
+            for parameter in parameters:
+                # a characteristic ArcHydro could not compute comes back empty and is computed again next time
+                if parameter.get('value') not in (None, ''): stored[parameter['code'].upper()] = parameter
+            __stored__[key] = stored
+            if not os.path.isdir(self.Folder): os.makedirs(self.Folder)
+            path = os.path.join(self.Folder, key + '.json')
+            with open(path + '.tmp', 'w') as f:
+                json.dump(stored, f)
+            if os.path.exists(path): os.remove(path)
+            os.rename(path + '.tmp', path)
+    def Summary(self):
+        return 'parameter cache: ' + str(self.Hits) + ' cached, ' + str(self.Misses) + ' computed'
+    #endregion
+
+    #region Helper Methods
+    def _load(self, key):
+        with __lock__:
+            if key in __stored__: return __stored__[key]
+            path = os.path.join(self.Folder, key + '.json')
+            stored = {}
+            if os.path.exists(path):
+                try:
+                    with open(path) as f:
+                        stored = json.load(f)
+                except ValueError:
+                    self._sm('ignoring unreadable parameter cache ' + path, 'ERROR')
+            __stored__[key] = stored
+            return stored
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
@@ -0,0 +1,180 @@
+#------------------------------------------------------------------------------
+#----- ParameterGroups.py -----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Computes the basin characteristics of one basin in groups on a
+#             process pool instead of one long StreamstatsGlobalParametersServer
+#
+#discussion:  Characteristics that read the same layer (WshParams ApField
+#             ApLayers in the regional xml) are kept in one group, so each
+#             raster is read by one process; the groups are then balanced
+#             over the workers by size.  Every group runs in its own folder
+#             with its own scratch gdb and a copy of the xml whose
+#             TempLocation points there.  The groups' parameterFile.xml are
+#             merged into Temp/parameterFile.xml.
+#             arcpy is not thread safe, so the pool uses processes.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import traceback
+import os
+import time
+import shutil
+import xml.dom.minidom
+import xml.etree.ElementTree as ET
+try:
+    import arcpy
+    import ArcHydroTools
+except ImportError:
+    # groupCharacteristics and characteristicLayers work without ArcGIS
+    arcpy = None
+    ArcHydroTools = None
+from FileWorkers import processPool
+#endregion
+
+def characteristicLayers(xmlFile):
+    """characteristicLayers(xmlFile)
+        {CODE: [lower case layer names]} of the WshParams fields of the regional xml
+    """
+    layers = {}
+    root = ET.parse(xmlFile).getroot()
+    for apField in root.findall(".//ApFunction[@TagName='WshParams']/ApFields[@TagName='ApFields']/ApField"):
+        code = (apField.get('AliasName') or apField.get('Name') or '').upper()
+        names = []
+        for apLayer in apField.findall('ApLayers/ApLayer'):
+            names.extend(n.lower() for n in (apLayer.get('Name'), apLayer.get('AliasName')) if n)
+        layers[code] = names
+    return layers
+
+def groupCharacteristics(codes, layers, groups):
+    """groupCharacteristics(codes, layers, groups)
+        codes split in at most groups lists, codes sharing a layer always in the same list
+    """
+    # codes linked through a shared layer form one component
+    codes = [code for i, code in enumerate(codes) if code not in codes[:i]]
+    parent = dict((code, code) for code in codes)
+    def find(code):
+        while parent[code] != code: code = parent[code]
+        return code
+    first = {}
+    for code in codes:
+        for layer in layers.get(code.upper(), []):
+            if layer in first: parent[find(code)] = find(first[layer])
+            else: first[layer] = code
+    byRoot = {}
+    for code in codes: byRoot.setdefault(find(code), []).append(code)
+    components = list(byRoot.values())
+
+    # largest components first, each into the smallest group so far
+    bins = [[] for i in range(max(1, min(groups, len(components))))]
+    for component in sorted(components, key=len, reverse=True):
+        min(bins, key=len).extend(component)
+    order = dict((code, i) for i, code in enumerate(codes))
+    return [sorted(b, key=order.get) for b in bins if b]
+
+class ParameterGroups(object):
+    #region Constructor
+    def __init__(self, workers=2, messenger=None):
+        self.Workers = max(1, workers)
+        self.Groups = []
+        self.GroupSeconds = []
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Compute(self, codes, basin, watershedPoint, xmlFile, workspaceID, tempFolder):
+        """Compute(codes, basin, watershedPoint, xmlFile, workspaceID, tempFolder)
+            Computes the codes in groups, returns the merged parameterFile.xml in tempFolder
+        """
+        self.Groups = groupCharacteristics(codes, characteristicLayers(xmlFile), self.Workers)
+        self._sm('computing ' + str(len(codes)) + ' characteristics in ' + str(len(self.Groups)) + ' groups: ' +
+                 ' | '.join(';'.join(group) for group in self.Groups))
+        merged = os.path.join(tempFolder, 'parameterFile.xml')
+        if os.path.exists(merged): os.remove(merged)
+        groupsFolder = os.path.join(tempFolder, 'groups')
+        if os.path.isdir(groupsFolder): shutil.rmtree(groupsFolder, ignore_errors=True)
+        jobs = [(os.path.join(groupsFolder, 'group' + str(i)), group, basin, watershedPoint, xmlFile, workspaceID)
+                for i, group in enumerate(self.Groups)]
+
+        if len(jobs) == 1:
+            results = [_computeGroup(jobs[0])]
+        else:
+            pool = processPool(len(jobs))
+            try:
+                results = pool.map(_computeGroup, jobs, 1)
+            finally:
+                pool.close()
+                pool.join()
+
+        outputs = []
+        self.GroupSeconds = []
+        for (folder, group, a, b, c, d), (output, messages, error, seconds) in zip(jobs, results):
+            self.GroupSeconds.append(seconds)
+            self._sm(messages, 'AHMSG')
+            if error: self._sm('group ' + ';'.join(group) + ' failed ' + error, 'ERROR')
+            elif os.path.exists(output): outputs.append(output)
+        self._sm('group timing: ' + ', '.join(str(round(s, 1)) + ' s' for s in self.GroupSeconds))
+        return self._merge(outputs, merged)
+    #endregion
+
+    #region Helper Methods
+    def _merge(self, outputs, merged):
+        # the PARAMETER elements of every group, appended to the first group's document
+        if not outputs: return merged
+        doc = xml.dom.minidom.parse(outputs[0])
+        parameters = doc.getElementsByTagName("PARAMETER")
+        parent = parameters[0].parentNode if parameters.length else doc.documentElement
+        for output in outputs[1:]:
+            for parameter in xml.dom.minidom.parse(output).getElementsByTagName("PARAMETER"):
+                parent.appendChild(doc.importNode(parameter, True))
+        with open(merged, 'wb') as f:
+            text = doc.toxml()
+            f.write(text if isinstance(text, bytes) else text.encode('utf-8'))
+        doc.unlink()
+        return merged
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
+
+def _computeGroup(job):
+    # runs in a pool process: one StreamstatsGlobalParametersServer call in an isolated folder
+    folder, codes, basin, watershedPoint, xmlFile, workspaceID = job
+    started = time.time()
+    output = os.path.join(folder, 'parameterFile.xml')
+    error = ''
+    messages = ''
+    try:
+        os.makedirs(folder)
+        arcpy.env.overwriteOutput = True
+        arcpy.env.scratchWorkspace = arcpy.CreateFileGDB_management(folder, 'scratch.gdb')[0]
+
+        groupXML = os.path.join(folder, os.path.basename(xmlFile))
+        xmlDoc = xml.dom.minidom.parse(xmlFile)
+        xmlDoc.getElementsByTagName('TempLocation')[0].firstChild.data = folder
+        with open(groupXML, 'wb') as f:
+            text = xmlDoc.toxml()
+            f.write(text if isinstance(text, bytes) else text.encode('utf-8'))
+
+        arcpy.CheckOutExtension("Spatial")
+        ArcHydroTools.StreamstatsGlobalParametersServer(basin, watershedPoint, ';'.join(codes), output,
+                                                        os.path.join(folder, 'parameterFile.htm'), groupXML, "", workspaceID)
+        messages = arcpy.GetMessages()
+        arcpy.CheckInExtension("Spatial")
+    except:
+        error = traceback.format_exc()
+    finally:
+        arcpy.ResetEnvironments()
+        arcpy.ClearEnvironment("workspace")
+    return output, messages, error, time.time() - started
@@ -20,11 +20,16 @@ import traceback
 import os
 import arcpy
 import logging
-import xml.dom.minidom
-import xml.etree.ElementTree as ET
-import numpy
 import shutil
 import json
+import time
+from StreamStatsXML import StreamStatsXML
+from DeletePlan import KeepSet, DeletePlan
+from StageData import StageData
+from FileWorkers import FileWorkers
+from RasterScan import RasterScan, listRasters
+from RasterDowncast import RasterDowncast
+from SpatialInventory import SpatialInventory
 #endregion
 
 
@@ -34,10 +39,17 @@ import json
 
 class Main(object):
     #region Constructor
-    def __init__(self, stateFolder, regionID, workspaceID, xml, copy_archydro, copy_bc_layers, huc_folders, copy_global, direction): 
+    def __init__(self, stateFolder, regionID, workspaceID, xml, copy_archydro, copy_bc_layers, huc_folders, copy_global, direction, dryRun=False): 
         self.RegionID = regionID
         self.isComplete = False
         self.Message =""
+        self.DryRun = dryRun
+        self.DeletePlan = None
+        self.RasterReport = None
+        self.DowncastReport = None
+        self.ProjectionWarnings = []
+        self.PhaseSeconds = {}
+        self.__fileWorkers__ = None
         self.__TempLocation__ = workspaceID
 
         if not os.path.exists(self.__TempLocation__): 
@@ -64,38 +76,45 @@ class Main(object):
             with open(os.path.join(os.path.dirname( __file__ ), 'config.json')) as c:
                 config = json.load(c)
                 necessaryXMLNodes = config[0]["necessaryXMLNodes"]
+                streamXMLAboveMB = config[0].get("streamXMLAboveMB", 0)
+                fileSettings = config[0].get("fileOperations", {})
+                rasterSettings = config[0].get("rasterScan", {})
+                inventoryDatabase = config[0].get("projectionInventory", {}).get("database", "")
+            self.__fileWorkers__ = FileWorkers(fileSettings.get("workers", 4))
+            started = time.time()
 
             if xmlPath and state.upper() != "MO_STL":
                 arcpy.AddMessage('Parsing xml')
                 if direction == 'upload':
                     shutil.copy(xmlPath, tempLoc)
                     xmlPath = os.path.join(tempLoc, os.path.basename(xmlPath))
-                try:
-                    if state == 'HI':
-                        self.__thinXML__(xmlPath, "StreamStatsConfig", 0, necessaryXMLNodes) #removes unnecessary nodes from xml
-                    else:
-                        self.__thinXML__(xmlPath, "StreamStatsConfig", 0, necessaryXMLNodes)
-                except:
-                    self.__thinXML__(xmlPath, "StreamStatsConfig" + state.upper(), 0, necessaryXMLNodes)
-                self.__thinXML__(xmlPath, "ProgParams", 0, necessaryXMLNodes)
-                self.__thinXML__(xmlPath, "ApFunctions", 0, necessaryXMLNodes)
-                self.__thinXML__(xmlPath, "ApFunction", 0, necessaryXMLNodes)
-                self.__thinXML__(xmlPath, "ApFunction", 1, necessaryXMLNodes)
-                self.__replaceProjection__(xmlPath)
+                #removes unnecessary nodes, fixes the projection path and gets the layers needed for delineation and basin characteristics
+                layers = StreamStatsXML(state, necessaryXMLNodes, streamXMLAboveMB, self.__sm__).Process(xmlPath)
+                started = self.__phase__('xml', started)
 
                 if stateFolder:
-                    wshLayers = self.__getXMLLayers__(xmlPath, "wsh") #get layers necessary for basin characteristics
-                    delinLayers = self.__getXMLLayers__(xmlPath, "delin") #get layers necessary for delineation
-                    layers = wshLayers + delinLayers
+                    if inventoryDatabase and direction == 'upload':
+                        self.__checkProjections__(stateFolder, inventoryDatabase)
                     if direction == 'upload':
-                        stateFolder = self.__copydata__(stateFolder, tempLoc, copy_archydro, copy_bc_layers, huc_folders, copy_global)
+                        stateFolder = self.__copydata__(stateFolder, tempLoc, copy_archydro, copy_bc_layers, huc_folders, copy_global, layers, fileSettings.get("stageLinks", True))
+                        started = self.__phase__('stage', started)
                     if copy_archydro == 'true' or copy_bc_layers == 'true' or copy_global == 'true' or (huc_folders and huc_folders != ''):
                         arcpy.AddMessage('Parsing state data for: ' + state)
                         self.__deleteFiles__(stateFolder, layers) #uses layers taken from xml to delete unnecessary files
                     arcpy.ResetEnvironments()
                     arcpy.ClearEnvironment("workspace")
 
-                    #self.__checkPixelDepth__(stateFolder)
+                    # only the staged copy is ever downcast, never the source state folder
+                    downcast = rasterSettings.get("downcast", False) and direction == 'upload'
+                    if rasterSettings.get("enabled", False) or downcast:
+                        started = time.time()
+                        scan = self.__checkPixelDepth__(stateFolder, rasterSettings)
+                        started = self.__phase__('raster scan', started)
+                        if downcast:
+                            self.__downcastRasters__(scan, rasterSettings)
+                            self.__phase__('raster downcast', started)
+            if self.PhaseSeconds:
+                self.__sm__('phase timing: ' + ', '.join(name + ' ' + str(round(seconds, 2)) + ' s' for name, seconds in sorted(self.PhaseSeconds.items())))
             self.isComplete = True
 
             self.__sm__("finished \n")
@@ -106,151 +125,132 @@ class Main(object):
             print tb
             self.isComplete = False
         finally:
+            if self.__fileWorkers__ != None: self.__fileWorkers__.Close()
             arcpy.ResetEnvironments()
             arcpy.ClearEnvironment("workspace")
             self.__stateFolder__ = stateFolder
             del stateFolder
             self.__xmlPath__ = xmlPath
 
-    def __copydata__(self, stateFolder, tempFolder, copy_archydro, copy_bc_layers, huc_folders, copy_global):
-        # copy state data to temp workspace before cleaning up data
-        self.__sm__('Copying data folders')
+    def __copydata__(self, stateFolder, tempFolder, copy_archydro, copy_bc_layers, huc_folders, copy_global, layers, useLinks=True):
+        # stage the state data that will be kept in the temp workspace, rather than copying it all before cleaning up data
+        self.__sm__('Staging data folders')
         state = os.path.basename(stateFolder)
         newStFolder = os.path.join(tempFolder, state)
+        stage = StageData(KeepSet(layers, self.RegionID, stateFolder), self.__fileWorkers__, useLinks, self.__sm__)
         if copy_archydro == 'true':
-            newFolder = os.path.join(newStFolder, 'archydro')
-            shutil.copytree(os.path.join(stateFolder, 'archydro'), newFolder)
+            stage.Stage(os.path.join(stateFolder, 'archydro'), os.path.join(newStFolder, 'archydro'))
         if copy_bc_layers == 'true':
-            newFolder = os.path.join(newStFolder, 'bc_layers')
-            shutil.copytree(os.path.join(stateFolder, 'bc_layers'), newFolder)
+            stage.Stage(os.path.join(stateFolder, 'bc_layers'), os.path.join(newStFolder, 'bc_layers'))
         if huc_folders:
             huc_folders = huc_folders.split(';')
             for huc in huc_folders:
                 if '/' in huc: huc = os.path.basename(huc)
-                loc = 'archydro/' + os.path.basename(huc)
-                newFolder = os.path.join(newStFolder, loc)
-                shutil.copytree(os.path.join(stateFolder, loc), newFolder)
+                loc = os.path.join('archydro', os.path.basename(huc))
+                stage.Stage(os.path.join(stateFolder, loc), os.path.join(newStFolder, loc))
         if copy_global == 'true':
-            loc = 'archydro/global.gdb'
-            newFolder = os.path.join(newStFolder, loc)
-            shutil.copytree(os.path.join(stateFolder, loc), newFolder)
+            loc = os.path.join('archydro', 'global.gdb')
+            stage.Stage(os.path.join(stateFolder, loc), os.path.join(newStFolder, loc))
+        self.__sm__(stage.Summary())
 
         return newStFolder
 
-    def __thinXML__(self, xmlfile, firstNode, i, attr):
-        # remove unnecessary nodes from XML
-        xmlDoc = xml.dom.minidom.parse(xmlfile)
-        toRemove = []
-        for child in xmlDoc.childNodes:
-            if child.nodeType == 8:
-                p = child.parentNode
-                p.removeChild(child)
-        for child in (child for child in xmlDoc.getElementsByTagName(firstNode)[i].childNodes if child.nodeType in [1,8]):
-            if child.nodeType == 8 or child.getAttribute('TagName') == 'Flows' or (child.nodeName not in attr and (not child.getAttribute('Name') or child.getAttribute('Name') not in attr)):
-                self.__sm__('Remove child: ' + child.nodeName)
-                toRemove.extend((child,child.previousSibling))
-        parent = xmlDoc.getElementsByTagName(firstNode)[i]
-        for child in toRemove:
-            parent.removeChild(child)
-        file = open(xmlfile,"wb")
-        xmlDoc.writexml(file)
-    def __replaceProjection__(self, xmlfile):
-        xmlDoc = ET.parse(xmlfile)
-        xPath = ".//ApFunction[@TagName='WshParams']/ApFields/ApField"
-        xPath2 = ".//ApFunction[@TagName='WshParams']/ApFields/ApField/ApLayer/ApFields/ApField"
-        root = xmlDoc.getroot()
-        for child in root.iter():
-            if 'AdditionalParams' in child.attrib and 'PROJECTIONFILENAME' in child.attrib['AdditionalParams'] and 'schemas' in child.attrib['AdditionalParams']:
-                start_sect = child.attrib['AdditionalParams'].split('PROJECTIONFILENAME')[0]
-                end_sect = child.attrib['AdditionalParams'].split('PROJECTIONFILENAME')[1].split('schemas')[1]
-                self.__sm__('before: ' + child.attrib['AdditionalParams'])
-                child.set('AdditionalParams', start_sect + 'PROJECTIONFILENAME=e:\projections' + end_sect)
-                self.__sm__('after: ' + child.attrib['AdditionalParams'])
-                
-        file = open(xmlfile,"wb")
-        xmlDoc.write(file)
-    def __getXMLLayers__(self, xmlfile, layerType):
-        # parse XML to get layers needed for basin delineation (delin) and characteristics (wsh)
-        layers = []
-        xmlDoc = ET.parse(xmlfile)
-        if layerType == "wsh": xPath = ".//ApFunction[@TagName='WshParams']/ApFields/ApField/ApLayers/ApLayer"
-        if layerType == "delin": xPath = ".//ApFunction[@TagName='GlobalPointDelineation']/ApLayers/ApLayer"
-        for apLayer in xmlDoc.findall(xPath, xmlDoc):
-            if apLayer.get('AliasName') and apLayer.get('AliasName') not in layers:
-                layer = apLayer.get('AliasName').lower()
-                layers.append(layer)
-            if apLayer.get('Name') and apLayer.get('Name') not in layers:
-                layer = apLayer.get('Name').lower()
-                layers.append(layer)
-        return layers
     def __deleteFiles__(self, stateFolder, layers):
         # remove unnecessary files from state folders using layer names parsed from xml
-        fileDirs = []
-        layers.extend(('global.gdb', 'schema', 'streamstats' + self.RegionID.lower(), self.RegionID.lower() + '_ss.gdb', 'readme', 'xml'))
-        # adjusted for NY
-        if os.path.basename(stateFolder).lower() == "ny": layers.extend(('cat', 'info'))
-        seperator = ';'
-        lays = seperator.join(layers)
-        self.__sm__('Layers to Keep: ' + lays)
+        keepSet = KeepSet(layers, self.RegionID, stateFolder)
+        self.__sm__('Layers to Keep: ' + ';'.join(sorted(keepSet.Names)))
 
-        for root, dirs, files in os.walk(stateFolder):
-            for name in files: #remove unnecessary files
-                filename = os.path.splitext(name)[0].lower()
-                filePath = os.path.join(root,name)
-                fileDir = os.path.basename(os.path.dirname(filePath)).lower()
-                if name.endswith('.mdb') or name.endswith('.zip') or all([not filePath.endswith('.gdb'), not fileDir.endswith('.gdb'),name.lower() not in layers, fileDir not in layers,filename not in layers,filename[:-4] not in layers,os.path.dirname(filePath) != os.path.join(stateFolder, "bc_layers","info")]):
-                    if os.path.dirname(filePath) not in fileDirs:
-                        fileDirs.append(os.path.dirname(filePath))
-                    self.__sm__('deleted file: ' + filePath)
-                    os.remove(filePath)
-            for d in (d for d in dirs if d.lower().endswith('.gdb')):
-                parentDir = os.path.basename(os.path.dirname(os.path.join(root, d)))
-                if parentDir == "archydro" and not d.lower() == "global.gdb": # remove old global.gdbs
-                    try:
-                        arcpy.Delete_management(os.path.join(root, d))
-                        self.__sm__('deleted: ' + os.path.join(root, d))
-                    except:
-                        self.__sm__('could not remove ' + d)
-                elif '_ss.gdb' not in d: # remove unnecessary feature classes from all gdbs
-                    folderPath = os.path.join(root,d, 'Layers')
-                    arcpy.env.workspace = folderPath
-                    fclasses = arcpy.ListFeatureClasses()
-                    if fclasses:
-                        self.__sm__('feature classes in ' + d + ': ' + str(len(fclasses)))
-                        for fc in (fc for fc in fclasses if fc.lower() not in layers):
-                            try:
-                                arcpy.Delete_management(fc)
-                                self.__sm__('removed: ' + fc)
-                            except:
-                                self.__sm__('Could not remove ' + fc)
-                    if not fclasses or len(arcpy.ListFeatureClasses()) == 0:
-                        self.__sm__('Deleted .gdb: ' + folderPath)
-                        arcpy.Delete_management(folderPath)
-            
-        for dirs in fileDirs: # delete folders that had files deleted if they are now empty
-            if [f for f in os.listdir(dirs)] == []:
-                self.__sm__('Deleted directory: ' + dirs)
-                os.rmdir(dirs)
-    def __checkPixelDepth__(self, dataFolder):
-        # read pixel depth and raster max values, for use later if we decide to change the pixel depths
-        self.__sm__('checking raster size')
-        for root, dirs, files in os.walk(dataFolder):
-            for d in [d for d in dirs if d == "bc_layers" or d[0].isdigit()]:
-                arcpy.env.workspace = os.path.join(root, d)
-                rasterList = arcpy.ListRasters()
-                if len(rasterList) > 0:
-                    self.__sm__('directory: ' + os.path.join(root, d))
-                    self.__sm__('raster list: ' + str(len(rasterList)))
+        started = time.time()
+        plan = DeletePlan(stateFolder, keepSet, self.__listFeatureClasses__, self.__fileWorkers__)
+        planPath = os.path.join(self.__TempLocation__, 'deletePlan_{0}.json'.format(self.RegionID))
+        plan.Save(planPath)
+        self.DeletePlan = planPath
+        self.__sm__(plan.Summary())
+        started = self.__phase__('plan', started)
+        if self.DryRun:
+            self.__sm__('dry run, nothing removed. Delete plan: ' + planPath)
+            arcpy.AddMessage('Dry run, delete plan written to ' + planPath)
+            return
 
-                    for r in rasterList:
-                        try:
-                            arr = arcpy.RasterToNumPyArray(r, nodata_to_value=-9999)
-                            self.__sm__('max value for ' + r + ': ' + str(numpy.amax(arr)))
-                            self.__sm__('array dtype: ' + str(arr.dtype))
-                        except:
-                            tb = traceback.format_exc() 
-                            self.__sm__("Error converting raster to numpy: "+tb + '\n',"ERROR")
+        for gdb, size in plan.Geodatabases: # remove old global.gdbs
+            try:
+                arcpy.Delete_management(gdb)
+                self.__sm__('deleted: ' + gdb)
+            except:
+                self.__sm__('could not remove ' + os.path.basename(gdb))
+        for workspace, fc in plan.FeatureClasses: # remove unnecessary feature classes from all gdbs
+            try:
+                arcpy.Delete_management(os.path.join(workspace, fc))
+                self.__sm__('removed: ' + fc)
+            except:
+                self.__sm__('Could not remove ' + fc)
+        for folderPath in plan.Datasets:
+            try:
+                arcpy.Delete_management(folderPath)
+                self.__sm__('Deleted .gdb: ' + folderPath)
+            except:
+                self.__sm__('Could not remove ' + folderPath)
+        started = self.__phase__('arcpy deletes', started)
 
+        #remove unnecessary files, then the folders that had files deleted if they are now empty
+        failed = dict(self.__fileWorkers__.Unlink(path for path, size in plan.Files))
+        for filePath, size in plan.Files:
+            if filePath in failed: raise failed[filePath]
+            self.__sm__('deleted file: ' + filePath)
+        for dirs in self.__fileWorkers__.RemoveDirs(plan.Folders):
+            self.__sm__('Deleted directory: ' + dirs)
+        self.__phase__('file deletes', started)
+    def __phase__(self, name, started):
+        # logs how long a phase took and returns the start of the next one
+        seconds = time.time() - started
+        self.PhaseSeconds[name] = self.PhaseSeconds.get(name, 0) + seconds
+        self.__sm__('phase ' + name + ': ' + str(round(seconds, 2)) + ' s')
+        return time.time()
+    def __listFeatureClasses__(self, workspace):
+        arcpy.env.workspace = workspace
+        fclasses = arcpy.ListFeatureClasses()
+        if fclasses: self.__sm__('feature classes in ' + os.path.basename(os.path.dirname(workspace)) + ': ' + str(len(fclasses)))
+        return fclasses
+    def __checkPixelDepth__(self, dataFolder, settings):
+        # read pixel depth and raster min/max values one block at a time, for use later if we decide to change the pixel depths
+        self.__sm__('checking raster size')
+        scan = RasterScan(settings.get("workers", 2), settings.get("blockSize", 1024), self.__sm__)
+        rasters = listRasters(dataFolder)
+        self.__sm__('raster list: ' + str(len(rasters)))
+        scan.Scan(rasters)
+        reportPath = os.path.join(self.__TempLocation__, 'rasterReport_{0}.json'.format(self.RegionID))
+        totals = scan.Save(reportPath, self.RegionID)['totals']
+        self.RasterReport = reportPath
+        self.__sm__('raster report: ' + reportPath + ', ' + str(totals['downcastable']) + ' of ' + str(totals['rasters']) + ' rasters fit a smaller dtype')
+        return scan
+    def __checkProjections__(self, stateFolder, database):
+        # mixed spatial references of the state folder in the projectionChecker inventory, without walking it again
+        if not os.path.exists(database):
+            self.__sm__('projection inventory not found: ' + database)
+            return self.ProjectionWarnings
+        inventory = SpatialInventory(database)
+        try:
+            common, mismatched = inventory.Mismatched(stateFolder)
+        finally:
+            inventory.Close()
+        for record in mismatched:
+            self.ProjectionWarnings.append(record['path'] + ' is ' + record['srName'] + ', not ' + common)
+        if mismatched:
+            self.__sm__(str(len(mismatched)) + ' datasets are not in ' + common + ': ' + '; '.join(self.ProjectionWarnings[:10]), 'WARNING')
+            arcpy.AddWarning(str(len(mismatched)) + ' datasets of ' + stateFolder + ' are not in ' + common + ', see parse log')
+        else: self.__sm__('projection inventory: ' + str(common) + ' throughout ' + stateFolder)
+        return self.ProjectionWarnings
+    def __downcastRasters__(self, scan, settings):
+        # rewrite the bc_layers rasters that fit a smaller dtype, before they are uploaded
+        rasters = [r for r in scan.Rasters if os.path.basename(os.path.dirname(r['path'])) == 'bc_layers']
+        downcast = RasterDowncast(settings.get("compression", ""), settings.get("blockSize", 1024), self.__sm__)
+        downcast.Run(rasters)
+        reportPath = os.path.join(self.__TempLocation__, 'rasterDowncast_{0}.json'.format(self.RegionID))
+        totals = downcast.Save(reportPath, self.RegionID)['totals']
+        self.DowncastReport = reportPath
+        self.__sm__('downcast report: ' + reportPath + ', ' + str(totals['rasters'] - totals['failed']) + ' rasters rewritten, ' +
+                    str(totals['bytesBefore']) + ' -> ' + str(totals['bytesAfter']) + ' bytes')
+        return downcast
     def __sm__(self, msg, type = 'INFO'):
         self.Message += type +':' + msg.replace('_',' ') + '_'
 
@@ -11,6 +11,9 @@
 #
 #      dates:   16 JAN 2018 jkn - Created, adapted from PercentOverlayRESTSOE
 #               02 FEB 2018 jkn - fixed issue where mask and infeature where inverted in spatial Overlay method
+#               18 OCT 2026 wim - region features prefiltered with a bounding box index
+#               18 OCT 2026 wim - in memory overlay with arcpy or shapely geometries
+#               18 OCT 2026 wim - region metadata described once, mask projected once per spatial reference
 #
 #------------------------------------------------------------------------------
 import traceback
@@ -19,15 +22,26 @@ import arcpy
 import tempfile
 from arcpy import env
 import shutil
+from RegionIndex import RegionIndex, indexPath
+from OverlayGeometry import geometryBackend, percentOverlay
+from RegionContext import latestMTime
 
 class PercentOverlayAgent(object):
 
     #region Constructor and Dispose
-    def __init__(self, workspacePath, regions):
+    def __init__(self, workspacePath, regions, persistIndex=False, backend=None):
         self.Workspace = ""
         self.Regions = None
+        self.Index = None
+        #'arcpy' or 'shapely' overlays in memory, None joins to temp feature classes
+        self.Geometry = geometryBackend(backend) if backend else None
         self.isInit = False
         self.Mask = None
+        #region metadata lives as long as the agent, the mask caches for one Execute
+        self._metadata = {}
+        self._maskShapes = {}
+        self._maskProjections = {}
+        self._maskSR = None
 
         arcpy.ResetEnvironments() 
         self._WorkspaceDirectory = workspacePath
@@ -36,7 +50,7 @@ class PercentOverlayAgent(object):
         arcpy.env.workspace = self._TempLocation 
         arcpy.env.overwriteOutput = True
         
-        self._initialize(regions)   
+        self._initialize(regions, persistIndex)   
         
         arcpy.env.workspace = self._TempLocation 
         arcpy.env.overwriteOutput = True
@@ -63,10 +77,17 @@ class PercentOverlayAgent(object):
             desc = arcpy.Describe(inmask)
             if (inmask == None or desc.shapeType != "Polygon"): raise Exception("Invalid maskType")
             mask = inmask
+            self._maskShapes = {}
+            self._maskProjections = {}
+            self._maskSR = desc.spatialReference
             maskArea = self._getAreaSqMeter(mask)
+            if self.Geometry != None: return self._overlayInMemory(mask, maskArea)
             for region in self.Regions:
-                sr = arcpy.Describe(region).spatialReference
-                features = self._spatialOverlay(region,mask,'INTERSECT')
+                sr = self._describe(region)["spatialReference"]
+                #only the features whose extent meets the mask's get joined
+                candidates = self.Index.Candidates(region, self._getExtent(mask, sr)) if self.Index != None else None
+                if candidates == []: continue
+                features = self._spatialOverlay(region,mask,'INTERSECT',candidates)
                 if features == None: continue                   
                 
                 with arcpy.da.SearchCursor(features, ["SHAPE@","Name", "GRIDCODE"]) as source_curs:
@@ -96,14 +117,32 @@ class PercentOverlayAgent(object):
     #endregion
 
     #region Helper Methods
-    def _initialize(self, ingdb):
+    def _initialize(self, ingdb, persistIndex=False):
         try:
             #check if regions and workspace are valid
             if not arcpy.Exists(ingdb): raise Exception("Regions dataset does not exist")
+            #stamped before listing the regions opens the gdb
+            version = latestMTime(ingdb)
             self.Regions= self._getPolygonFeaturesInGDB(ingdb)
+            self.Index = self._loadIndex(ingdb, persistIndex, version)
             self.isInit = True
         except:
             self.isInit = False
+    def _loadIndex(self, ingdb, persist, version=None):
+        #bounding boxes of every region feature, read from beside the gdb while the gdb is unchanged
+        index = RegionIndex(self._sm)
+        path = indexPath(ingdb)
+        if version == None: version = latestMTime(ingdb)
+        if persist and index.Load(path, version) and index.Covers(self.Regions):
+            self._sm("loaded region index "+path)
+            return index
+        index = RegionIndex(self._sm).Build(self.Regions)
+        if persist:
+            try:
+                index.Save(path, version)
+            except:
+                self._sm("could not save region index "+traceback.format_exc(), "ERROR")
+        return index
     def _getPolygonFeaturesInGDB(self, ingdb):
         #list all Feature Classes in a geodatabase, including inside Feature Datasets
         arcpy.env.workspace = ingdb
@@ -125,13 +164,14 @@ class PercentOverlayAgent(object):
         ins_curs = None
         row = None
         try:
-            inSR = arcpy.Describe(inFeature).spatialReference
+            inSR = self._maskSR
             if (inSR.name == sr.name): return inFeature
+            if sr.name in self._maskProjections: return self._maskProjections[sr.name]
 
-            name = arcpy.Describe(inFeature).name +"_proj"
+            name = "mask_proj" + str(len(self._maskProjections))
             
             out_projected_fc = arcpy.management.CreateFeatureclass(self._TempLocation, name,
-                                                arcpy.Describe(inFeature).shapeType,
+                                                "POLYGON",
                                                 template=inFeature,
                                                 spatial_reference=sr)
 
@@ -146,6 +186,7 @@ class PercentOverlayAgent(object):
                 #next
             #end with
 
+            self._maskProjections[sr.name] = out_projected_fc
             return out_projected_fc
         except:
             tb = traceback.format_exc()
@@ -158,12 +199,15 @@ class PercentOverlayAgent(object):
             if source_curs != None: del source_curs
             if ins_curs != None: del ins_curs
             if row != None: del row
-    def _spatialOverlay(self, inFeature, maskfeature, matchOption = "COMPLETELY_CONTAINS"):
+    def _spatialOverlay(self, inFeature, maskfeature, matchOption = "COMPLETELY_CONTAINS", candidates = None):
         mask = None
         try:
-            sr = arcpy.Describe(inFeature).spatialReference
+            sr = self._describe(inFeature)["spatialReference"]
             mask = self._projectFeature(maskfeature,sr) 
             out_projected_fc = os.path.join(self._TempLocation, "ovrlytmpso")
+            if candidates:
+                #join only the candidate features of the index
+                inFeature = arcpy.MakeFeatureLayer_management(inFeature, "ovrlycand", self._candidateQuery(inFeature, candidates))[0]
             feature = arcpy.SpatialJoin_analysis(inFeature, maskfeature, out_projected_fc,'JOIN_ONE_TO_MANY', 'KEEP_COMMON', None, matchOption)
             if(arcpy.management.GetCount(feature)[0] == "0"): return None
             return feature
@@ -175,13 +219,56 @@ class PercentOverlayAgent(object):
             mask = None 
             #do not release
             out_projected_fc = None      
+    def _overlayInMemory(self, mask, maskArea):
+        #mask read once per spatial reference, candidate regions intersected without temp feature classes
+        pArray = []
+        masks = {}
+        for region in self.Regions:
+            sr = self._describe(region)["spatialReference"]
+            if sr.name not in masks:
+                masks[sr.name] = self.Geometry.Union([self.Geometry.FromArcpy(g) for g in self._getMaskShapes(mask, sr)])
+            maskGeometry = masks[sr.name]
+            if maskGeometry == None: continue
+            candidates = self.Index.Candidates(region, self.Geometry.Bounds(maskGeometry)) if self.Index != None else None
+            if candidates == []: continue
+            with arcpy.da.SearchCursor(region, ["SHAPE@","Name","GRIDCODE"], self._candidateQuery(region, candidates)) as source_curs:
+                features = [(row[1], row[2], self.Geometry.FromArcpy(row[0])) for row in source_curs]
+            pArray.extend(percentOverlay(self.Geometry, maskGeometry, features, sr.metersPerUnit, maskArea))
+        return pArray
+    def _candidateQuery(self, region, candidates):
+        #where clause selecting the candidate OIDs of the index, None selects all
+        if not candidates: return None
+        oidField = arcpy.AddFieldDelimiters(region, self._describe(region)["oidField"])
+        return oidField + " IN (" + ",".join(str(c[0]) for c in candidates) + ")"
+    def _describe(self, dataset):
+        #shape type, spatial reference, extent and feature count of a region, described once per agent
+        if dataset not in self._metadata:
+            desc = arcpy.Describe(dataset)
+            if self.Index != None and dataset in self.Index.Layers: count = len(self.Index.Layers[dataset]['features'])
+            else: count = int(arcpy.GetCount_management(dataset)[0])
+            self._metadata[dataset] = {"name": desc.name, "shapeType": desc.shapeType, "spatialReference": desc.spatialReference,
+                                       "extent": desc.extent, "featureCount": count, "oidField": desc.OIDFieldName}
+        return self._metadata[dataset]
+    def _getMaskShapes(self, mask, sr):
+        #the mask's shapes projected to sr, read once per spatial reference
+        if sr.name not in self._maskShapes:
+            with arcpy.da.SearchCursor(mask, ["SHAPE@"], spatial_reference=sr) as cursor:
+                self._maskShapes[sr.name] = [row[0] for row in cursor if row[0] != None]
+        return self._maskShapes[sr.name]
+    def _getExtent(self, inFeature, sr):
+        #(xmin, ymin, xmax, ymax) of every shape of inFeature, projected to sr
+        extent = None
+        for shape in self._getMaskShapes(inFeature, sr):
+            e = shape.extent
+            extent = (e.XMin, e.YMin, e.XMax, e.YMax) if extent == None else \
+                     (min(extent[0], e.XMin), min(extent[1], e.YMin), max(extent[2], e.XMax), max(extent[3], e.YMax))
+        return extent
     def _getAreaSqMeter(self, inFeature):
         AreaValue = -999
         try:
-            sr = arcpy.Describe(inFeature).spatialReference
-            cursor = arcpy.da.SearchCursor(inFeature, "SHAPE@")
-            for row in cursor:
-                AreaValue = row[0].area * sr.metersPerUnit * sr.metersPerUnit 
+            sr = self._maskSR
+            for shape in self._getMaskShapes(inFeature, sr):
+                AreaValue = shape.area * sr.metersPerUnit * sr.metersPerUnit 
                 break
             return AreaValue if (AreaValue > 0) else None
         except:
@@ -191,17 +278,16 @@ class PercentOverlayAgent(object):
     def _clip (self, geom, mask ):
         
         try:
-            sr = arcpy.Describe(mask).spatialReference
+            sr = self._maskSR
             if(geom.spatialReference.name != sr.name):
                 item = geom.projectAs(sr)
             else:
                 item = geom
 
-            with arcpy.da.SearchCursor(mask, ["SHAPE@"]) as source_curs:
-                for row in source_curs:
-                    returnItem = item.intersect(row[0],4)
-                #next row
-            #end with
+            #the mask's shapes are read once, not for every row
+            for shape in self._getMaskShapes(mask, sr):
+                returnItem = item.intersect(shape,4)
+            #next shape
 
             return returnItem
         except:
@@ -13,11 +13,16 @@
 # 
 #   purpose:  Wrapper to test and document percentOverlay use
 #          
-#discussion:  
+#discussion:  -batch takes a feature class (one watershed per feature, keyed
+#             by -idfield) or a folder of watershed feature classes (keyed by
+#             their workspace folder) and writes one json line per watershed
+#             to -output as each finishes.  Every worker process keeps one
+#             agent and its region index for all of its watersheds.
 #       
 
 #region "Comments"
 #09.20.2018 jkn - Created
+#10.18.2026 wim - batch mode
 #endregion
 
 #region "Imports"
@@ -30,6 +35,9 @@ import arcpy
 from arcpy import env
 from arcpy.sa import *
 import json
+import tempfile
+from multiprocessing import util
+from FileWorkers import processPool
 from PercentOverlayAgent import *
 
 #endregion
@@ -54,10 +62,25 @@ class PercentOverlayWrapper(object):
             #Within this EPSG code
             parser.add_argument("-featuresPath", help="specifies nssRegions ", type=str, 
                                 default = 'D:\WiM\Projects\StreamStats\PercentOverlay\SS_regionPolys.gdb')
+            #keep the region bounding box index next to the regions gdb
+            parser.add_argument("-persistindex", help="saves the region index next to featuresPath and reuses it", action="store_true")
+            #overlay geometries in memory instead of joining to temp feature classes
+            parser.add_argument("-backend", help="in memory geometry backend", type=str, choices=['arcpy', 'shapely'], default=None)
+            #many watersheds in one run
+            parser.add_argument("-batch", help="feature class or folder of watersheds", type=str, default="")
+            parser.add_argument("-idfield", help="watershed id field of a -batch feature class", type=str, default="OID@")
+            parser.add_argument("-output", help="json lines written by -batch, one per watershed", type=str, default="percentOverlay.jsonl")
+            parser.add_argument("-workers", help="watersheds overlayed at the same time by -batch", type=int, default=1)
                            
             args = parser.parse_args()
             startTime = time.time()
             self._sm("Start routine")
+
+            if(args.batch != ""):
+                if(args.featuresPath == ""): raise Exception ("FeaturePath is required")
+                Results = self.runBatch(args.batch, args.featuresPath, args.idfield, args.output, args.workers, args.backend)
+                self._sm('Finished.  Total time elapsed:'+ str(round((time.time()- startTime)/60, 2))+ 'minutes')
+                return
             
             if(args.maskpath == ""): raise Exception ("Mask is required")   
             workingDir = self.getWorkspace(args.maskpath) 
@@ -67,7 +90,7 @@ class PercentOverlayWrapper(object):
             if(args.featuresPath == ""): raise Exception ("FeaturePath is required")       
             features = args.featuresPath           
             
-            with PercentOverlayAgent(workingDir, features) as pcntOverlay:
+            with PercentOverlayAgent(workingDir, features, args.persistindex, args.backend) as pcntOverlay:
                 if (not pcntOverlay.isInit): raise Exception('PercentOverlayAgent failed to initialize')               
                 
                 Results = pcntOverlay.Execute(mask)               
@@ -115,6 +138,33 @@ class PercentOverlayWrapper(object):
     def _sm(self,msg,type="INFO", errorID=0):        
         print(msg)
     
+    def runBatch(self, batch, features, idField, output, workers=1, backend=None):
+        '''Overlay every watershed of batch, writing a json line per watershed to output as it finishes.
+        :param batch: feature class or folder of watershed feature classes
+        '''
+        masks = listWatersheds(batch, idField)
+        self._sm("Overlaying " + str(len(masks)) + " watersheds")
+        args = (tempfile.gettempdir(), features, backend)
+        failed = 0
+        with open(output, 'w') as f:
+            if workers <= 1 or len(masks) < 2:
+                with PercentOverlayAgent(args[0], features, True, backend) as pcntOverlay:
+                    if (not pcntOverlay.isInit): raise Exception('PercentOverlayAgent failed to initialize')
+                    for mask in masks:
+                        failed += writeLine(f, _overlay(pcntOverlay, mask))
+            else:
+                # the index is built and saved once, so the workers only load it
+                with PercentOverlayAgent(args[0], features, True, backend) as pcntOverlay:
+                    if (not pcntOverlay.isInit): raise Exception('PercentOverlayAgent failed to initialize')
+                pool = processPool(min(workers, len(masks)), _startWorker, args)
+                try:
+                    for line in pool.imap_unordered(_runMask, masks, 1):
+                        failed += writeLine(f, line)
+                finally:
+                    pool.close()
+                    pool.join()
+        return {"watersheds": len(masks), "failed": failed, "output": output}
+
     def getWorkspace(self, item):
       '''Return the Geodatabase path from the input table or feature class.
       :param input_table: path to the input table or feature class 
@@ -122,5 +172,54 @@ class PercentOverlayWrapper(object):
       workspace = os.path.dirname(item)
       return os.path.dirname(workspace)
 
+def listWatersheds(batch, idField="OID@"):
+    '''[(id, feature class, where clause)] of the watersheds of a feature class or a folder of them.
+    '''
+    if os.path.isdir(batch) and not batch.lower().endswith('.gdb'):
+        masks = []
+        for dirpath, dirnames, filenames in arcpy.da.Walk(batch, datatype="FeatureClass", type="Polygon"):
+            for name in filenames:
+                # StreamStats keeps a watershed in <workspaceID>/Layers/GlobalWatershed
+                folder = os.path.basename(os.path.dirname(dirpath)) if os.path.basename(dirpath).lower() in ('layers', 'layers.gdb') else os.path.splitext(name)[0]
+                masks.append((folder, os.path.join(dirpath, name), None))
+        return masks
+    oidField = arcpy.Describe(batch).OIDFieldName
+    with arcpy.da.SearchCursor(batch, ["OID@", idField]) as cursor:
+        return [(str(row[1]), batch, arcpy.AddFieldDelimiters(batch, oidField) + " = " + str(row[0])) for row in cursor]
+
+def writeLine(f, line):
+    f.write(json.dumps(line) + "\n")
+    f.flush()
+    return 1 if line["error"] else 0
+
+#region worker process
+# each pool process keeps one agent, with the saved region index, for all of its watersheds
+__worker__ = {}
+
+def _startWorker(workspace, features, backend):
+    agent = PercentOverlayAgent(workspace, features, True, backend)
+    __worker__['agent'] = agent
+    util.Finalize(agent, agent.__exit__, args=(None, None, None), exitpriority=10)
+
+def _runMask(mask):
+    return _overlay(__worker__['agent'], mask)
+
+def _overlay(agent, mask):
+    watershedID, featureClass, where = mask
+    started = time.time()
+    error = ""
+    results = None
+    try:
+        if not agent.isInit: raise Exception('PercentOverlayAgent failed to initialize')
+        if where: featureClass = arcpy.MakeFeatureLayer_management(featureClass, "batchmask", where)[0]
+        results = agent.Execute(featureClass)
+        if results == None: raise Exception("Percent execute Failed")
+    except:
+        error = traceback.format_exc()
+    finally:
+        if where: arcpy.Delete_management("batchmask")
+    return {"id": watershedID, "results": results, "seconds": time.time() - started, "error": error}
+#endregion
+
 if __name__ == '__main__':
     PercentOverlayWrapper()
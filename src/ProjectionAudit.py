@@ -0,0 +1,263 @@
+#------------------------------------------------------------------------------
+#----- ProjectionAudit.py -----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Spatial reference inventory of every dataset under a data
+#             directory, scanned in parallel, and the batched DefineProjection
+#             fix projectionChecker applies from it
+#
+#discussion:  The walk is split by top level folder (each folder or gdb
+#             directly under the directory, plus the datasets at its root)
+#             and the parts are scanned on a process pool.  Every dataset is
+#             described once; a feature dataset or coverage is one record, as
+#             projectionChecker always treated it.  Each finished part is
+#             appended to a json lines checkpoint, so an interrupted scan
+#             resumes with the parts still missing.  The checkpoint is kept
+#             until Finish, which projectionChecker calls once the define
+#             pass has finished too, so a run interrupted while defining
+#             resumes without scanning again.  The inventory is saved
+#             as json or csv.  The fix is a separate pass over the inventory:
+#             the datasets in the from spatial reference are grouped by
+#             workspace, so no two processes define projections in the same
+#             gdb, and every group runs in one worker.  A defined dataset's
+#             record (and inventory row) is given its new spatial reference
+#             and stamp, so it is not defined again.  With a
+#             SpatialInventory, a dataset whose size and mtime match its row
+#             is not described again, and every finished part replaces its
+#             rows.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import traceback
+import os
+import sys
+import csv
+import json
+import time
+import arcpy
+from SpatialInventory import datasetStamp
+from FileWorkers import processPool
+#endregion
+
+DATASET_TYPES = ['FeatureClass', 'RasterDataset', 'FeatureDataset']
+INVENTORY_FIELDS = ('path', 'datatype', 'srName', 'wkid', 'size', 'mtime', 'partition', 'error')
+
+def partitionWalk(directory):
+    """partitionWalk(directory)
+        [(path, recursive)] parts of the walk: the datasets at the root, then every folder or gdb under it
+    """
+    for dirpath, dirnames, filenames in arcpy.da.Walk(directory, datatype=DATASET_TYPES):
+        return [(directory, False)] + [(os.path.join(dirpath, d), True) for d in sorted(dirnames)]
+    return [(directory, False)]
+
+def workspaceOf(path):
+    # the gdb a dataset is in (through any feature dataset), or its folder
+    folder = os.path.dirname(path)
+    while folder and os.path.dirname(folder) != folder:
+        if folder.lower().endswith(('.gdb', '.mdb', '.sde')): return folder
+        folder = os.path.dirname(folder)
+    return os.path.dirname(path)
+
+class ProjectionAudit(object):
+    #region Constructor
+    def __init__(self, workers=1, messenger=None):
+        self.Workers = max(1, workers)
+        self.Records = []
+        self.Fixed = []
+        self.Described = 0
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Scan(self, directory, checkpoint=None, inventory=None):
+        """Scan(directory, checkpoint=None, inventory=None)
+            Inventory records of every dataset under directory, resuming the parts already in checkpoint;
+            datasets unchanged since they were stored in inventory (a SpatialInventory) are not described again
+        """
+        done = self._readCheckpoint(checkpoint)
+        parts = [part + (inventory.Known(part[0]) if inventory != None else {},) for part in partitionWalk(directory) if part[0] not in done]
+        self._sm(str(len(parts)) + ' parts to scan, ' + str(len(done)) + ' from checkpoint')
+        records = [record for part in done.values() for record in part]
+        self.Described = 0
+        out = open(checkpoint, 'a') if checkpoint else None
+        try:
+            for partition, found, seconds, described in self._map(_scanPartition, parts):
+                records.extend(found)
+                self.Described += described
+                self._sm(partition + ': ' + str(len(found)) + ' datasets, ' + str(described) + ' described in ' + str(round(seconds, 1)) + ' s')
+                if inventory != None: inventory.Update(partition, found)
+                if out != None:
+                    out.write(json.dumps({'partition': partition, 'records': found}) + '\n')
+                    out.flush()
+        finally:
+            if out != None: out.close()
+        self.Records = sorted(records, key=lambda r: r['path'])
+        return self.Records
+    def Save(self, path):
+        """Save(path)
+            Writes the inventory as csv when path ends with .csv, json otherwise
+        """
+        if path.lower().endswith('.csv'):
+            with open(path, 'wb' if sys.version_info[0] < 3 else 'w') as f:
+                writer = csv.DictWriter(f, INVENTORY_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                for record in self.Records: writer.writerow(dict((k, _text(record.get(k))) for k in INVENTORY_FIELDS))
+        else:
+            with open(path, 'w') as f:
+                json.dump({'datasets': len(self.Records), 'spatialReferences': self.SpatialReferences(), 'records': self.Records}, f, indent=2)
+        return path
+    def SpatialReferences(self):
+        """SpatialReferences()
+            {spatial reference name: dataset count} of the inventory
+        """
+        counts = {}
+        for record in self.Records:
+            if record['srName']: counts[record['srName']] = counts.get(record['srName'], 0) + 1
+        return counts
+    def Matching(self, fromName):
+        return [r for r in self.Records if r['srName'] and r['srName'].lower() == fromName.lower()]
+    def Define(self, fromName, toSR, inventory=None):
+        """Define(fromName, toSR, inventory=None)
+            Defines toSR (as projectionChecker -ToSR) on every inventoried dataset in fromName, one workspace per job;
+            the records of the defined datasets, and their rows in inventory, get the new spatial reference
+        """
+        byWorkspace = {}
+        for record in self.Matching(fromName): byWorkspace.setdefault(workspaceOf(record['path']), []).append(record['path'])
+        jobs = [(paths, toSR) for workspace, paths in sorted(byWorkspace.items())]
+        self._sm('defining projection of ' + str(sum(len(j[0]) for j in jobs)) + ' datasets in ' + str(len(jobs)) + ' workspaces')
+        self.Fixed = []
+        for results in self._map(_defineBatch, jobs):
+            for result in results:
+                if result['error']: self._sm('error Defining spatialReference ' + result['path'] + ' ' + result['error'], 'ERROR')
+                else: self._sm('sucessfully Defined ' + result['path'] + ' ' + result['before'] + ' -> ' + result['after'])
+            self.Fixed.extend(results)
+        self._recordDefined(inventory)
+        return self.Fixed
+    def Finish(self, checkpoint=None):
+        """Finish(checkpoint=None)
+            Removes the checkpoint of a finished run, so a rerun with the same checkpoint scans again
+        """
+        if checkpoint and os.path.exists(checkpoint): os.remove(checkpoint)
+    #endregion
+
+    #region Helper Methods
+    def _map(self, function, jobs):
+        if self.Workers == 1 or len(jobs) < 2:
+            for job in jobs: yield function(job)
+            return
+        pool = processPool(min(self.Workers, len(jobs)))
+        try:
+            for result in pool.imap_unordered(function, jobs, 1): yield result
+        finally:
+            pool.close()
+            pool.join()
+    def _recordDefined(self, inventory):
+        # the new spatial reference and stamp of every defined dataset, its part's rows replaced in the inventory
+        defined = dict((r['path'], r) for r in self.Fixed if not r['error'])
+        stamps = {}
+        partitions = set()
+        for record in self.Records:
+            result = defined.get(record['path'])
+            if result == None: continue
+            stamp = datasetStamp(record['path'], stamps)
+            record.update(srName=result['after'], wkid=result['wkid'], size=stamp[0], mtime=stamp[1])
+            partitions.add(record['partition'])
+        if inventory == None: return
+        for partition in sorted(partitions): inventory.Update(partition, [r for r in self.Records if r['partition'] == partition])
+    def _readCheckpoint(self, checkpoint):
+        done = {}
+        if not checkpoint or not os.path.exists(checkpoint): return done
+        with open(checkpoint) as f:
+            for line in f:
+                try:
+                    part = json.loads(line)
+                except ValueError:
+                    # a line cut short by an interruption, its part is scanned again
+                    continue
+                done[part['partition']] = part['records']
+        return done
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
+
+def _text(value):
+    if value == None: return ''
+    if sys.version_info[0] < 3 and isinstance(value, unicode): return value.encode('utf-8')
+    return value
+
+def _describe(path, partition, desc=None, stamp=(None, None)):
+    record = {'path': path, 'datatype': None, 'srName': None, 'wkid': None, 'size': stamp[0], 'mtime': stamp[1],
+              'partition': partition, 'error': ''}
+    try:
+        if desc == None: desc = arcpy.Describe(path)
+        record['datatype'] = desc.dataType
+        sr = desc.spatialReference
+        record['srName'] = sr.name
+        record['wkid'] = sr.factoryCode or None
+    except:
+        record['error'] = traceback.format_exc().strip().splitlines()[-1]
+    return record
+
+def _scanPartition(job):
+    # runs in a pool process: every changed dataset of one part, described once
+    partition, recursive, known = job
+    started = time.time()
+    records = []
+    stamps = {}
+    described = [0]
+    def record(path, desc=None):
+        stamp = datasetStamp(path, stamps)
+        old = known.get(os.path.normpath(path))
+        if old != None and not old['error'] and (old['size'], old['mtime']) == stamp:
+            return dict(old, path=path, partition=partition)
+        described[0] += 1
+        return _describe(path, partition, desc, stamp)
+    for dirpath, dirnames, filenames in arcpy.da.Walk(partition, datatype=DATASET_TYPES):
+        if dirpath != partition or recursive:
+            old = known.get(os.path.normpath(dirpath))
+            if old != None and old['datatype'] in ('Coverage', 'FeatureDataset'): dirtype, desc = old['datatype'], None
+            else:
+                try:
+                    desc = arcpy.Describe(dirpath)
+                    dirtype = desc.dataType
+                except:
+                    desc, dirtype = None, None
+            if dirtype in ('Coverage', 'FeatureDataset'):
+                # a feature dataset or coverage has one spatial reference, its children are not described
+                records.append(record(dirpath, desc))
+                del dirnames[:]
+                continue
+        records.extend(record(os.path.join(dirpath, filename)) for filename in filenames)
+        if not recursive: break
+    return partition, records, time.time() - started, described[0]
+
+def _defineBatch(job):
+    # runs in a pool process: the datasets of one workspace
+    paths, toSR = job
+    sr = arcpy.SpatialReference()
+    sr.loadFromString(toSR)
+    results = []
+    for path in paths:
+        result = {'path': path, 'before': None, 'after': None, 'wkid': None, 'error': ''}
+        try:
+            result['before'] = arcpy.Describe(path).spatialReference.name
+            arcpy.DefineProjection_management(path, sr)
+            defined = arcpy.Describe(path).spatialReference
+            result['after'] = defined.name
+            result['wkid'] = defined.factoryCode or None
+        except:
+            result['error'] = traceback.format_exc().strip().splitlines()[-1]
+        results.append(result)
+    return results
@@ -28,18 +28,25 @@ import shutil
 import sys
 import argparse
 
-import sys, os, subprocess, fnmatch, traceback
+import sys, os, fnmatch, traceback
 from ParseData import Main as ParseData
+from TransferAgent import createTransferAgent
 import datetime, arcpy, json, logging
 import time
+import threading
+from multiprocessing.pool import ThreadPool
 import secrets
 
 class Main(object):
 
     #region Constructor
-    def __init__(self, parameters):
+    def __init__(self, parameters, options=None):
         self.isComplete = False
         self.Message = ""
+        self.__options__ = options if options else {}
+        self.__parseLock__ = threading.Lock()
+        self.__messageLock__ = threading.Lock()
+        self.__regionLog__ = threading.local()
         workspace = parameters[1].valueAsText if type(parameters[1]).__name__ == 'geoprocessing parameter object' else parameters[1]
 
         self.__TempLocation__ = os.path.join(workspace, "Temp" + time.strftime('%Y%m%d%H%M%S'))
@@ -76,22 +83,23 @@ class Main(object):
         arcpy.env.overwriteOutput = True
 
 
+        with open(os.path.join(os.path.dirname( __file__ ), 'config.json')) as c:
+            config = json.load(c)
+            self.states = config[0]["regions"]
+            self.transferSettings = dict(config[0].get("transfer", {}))
+            self.transferSettings.update(self.__options__)
+
         #start main program
         try:
-            self.__configureAWSKeyID__(secrets.accessKeyID)
-            self.__configureAWSKey__(secrets.accessKey)
+            self.__configureTransfer__(self.transferSettings, secrets.accessKeyID, secrets.accessKey)
             
-        except ImportError:
+        except (ImportError, AttributeError):
             self.__sm__('Error using aws credentials', 'ERROR')
             arcpy.AddError('Error using aws credentials')
             sys.exit()
 
         destinationBucket = 's3://streamstats-staged-data'
 
-        with open(os.path.join(os.path.dirname( __file__ ), 'config.json')) as c:
-            config = json.load(c)
-            self.states = config[0]["regions"]
-
 
         try:
             if not regionID:
@@ -107,144 +115,210 @@ class Main(object):
                 arcpy.AddError('Region ID not found. Please use the region abbreviation, e.g. "AK" for Alaska')
                 sys.exit()
             elif regionID != 'all':
-				self.states = [regionID]
-            
-            for state in self.states:
-                state_folder = os.path.join(workspace, state)
-                dest_state = destinationBucket + '/data/' + state.lower()
-                xml_loc =  state_folder + '/StreamStats' + state.upper() + '.xml'
-                dest_xml = dest_state + '/StreamStats' + state.upper() + '.xml'
-                self.__sm__('Processing: ' + state)
-                arcpy.AddMessage('Processing: ' + state)
-                
-                if copy_bc_layers == 'true':
-                    self.__copyS3__(dest_state + '/bc_layers', state_folder + '/bc_layers', '--recursive')
-                    
-                if copy_archydro == 'true':
-                    self.__copyS3__(dest_state + '/archydro', state_folder + '/archydro', '--recursive')
-
-                if copy_global == 'true':
-                    global_path = '/archydro/global.gdb'
-                    self.__copyS3__(dest_state + global_path, state_folder + global_path, '--recursive')
-                if huc_ids:
-                    huc_ids = huc_ids.split(';')
-                    for huc_id in huc_ids:
-                        huc_path = '/archydro/' + huc_id
-                        self.__copyS3__(dest_state + huc_path, state_folder + huc_path, '--recursive')
-                if any([copy_xml == 'true', copy_archydro == 'true', copy_bc_layers == 'true', huc_ids]):
-                    self.__copyS3__(dest_xml, xml_loc, '')
-                if copy_schema == 'true':
-                    schema_path = '/' + state.upper() + '_ss.gdb/'
-                    schema_path1 = '/' + state.lower() + '_ss.gdb/'
-                    arcpy.AddMessage(self.__checkS3Bucket__(dest_state + schema_path))
-                    if self.__checkS3Bucket__(dest_state + schema_path) == 'True':
-                        self.__copyS3__(dest_state + schema_path, state_folder + schema_path, '--recursive')
-                    elif self.__checkS3Bucket__(dest_state + schema_path1) == 'True':
-                        self.__copyS3__(dest_state + schema_path1, state_folder + schema_path1, '--recursive')
-                if copy_whole == 'true':
-                    self.__copyS3__(dest_state + '/', state_folder, '--recursive')
-                    ParseData(state_folder, state, tempLocation, xml_loc , 'true', 'true', huc_ids, copy_global, 'pull')
-                else:
-                    ParseData(state_folder, state, tempLocation, xml_loc , copy_archydro, copy_bc_layers, huc_ids, copy_global, 'pull')
+                self.states = [regionID]
+
+            items = {'copy_whole': copy_whole, 'copy_archydro': copy_archydro, 'copy_global': copy_global, 'huc_ids': huc_ids,
+                     'copy_bc_layers': copy_bc_layers, 'copy_xml': copy_xml, 'copy_schema': copy_schema}
+            workers = max(1, min(int(self.transferSettings.get('regionWorkers', 1)), len(self.states)))
+            self.__sm__('Pulling ' + str(len(self.states)) + ' region(s) with ' + str(workers) + ' worker(s)')
 
-            self.isComplete = True
+            def pull(state):
+                return self.__pullRegion__(state, workspace, destinationBucket, tempLocation, items)
+
+            if workers > 1:
+                pool = ThreadPool(workers)
+                try:
+                    results = pool.map(pull, self.states)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                results = [pull(state) for state in self.states]
+
+            failed = self.__summarize__(results, tempLocation)
+            self.isComplete = len(failed) == 0
             self.__sm__('Finished \n')
 
         except:
-            tb = traceback.format_exc() 
+            tb = traceback.format_exc()
             self.__sm__("Error uploading data to S3 "+tb,"ERROR")
-            print tb
+            print(tb)
             arcpy.AddError("Error uploading data to S3 "+tb)
             self.isComplete = False
+        finally:
+            self.__transfer__.Close()
 
-    def __configureAWSKeyID__(self, AWSKeyID):
-                """configureAWSKeyID(AWSKeyID=None)
-                    Function to configure AWS Access Key ID
-                """
-                #create AWS CLI command
-                cmd="aws configure set aws_access_key_id " + AWSKeyID
-
-                try:
-                    output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-                except subprocess.CalledProcessError as e:
-                    arcpy.addError('Configure not successful.  Please make sure you have installed the AWS CLI.')
-                    self.__sm__(e.output, 'ERROR')
-                    arcpy.AddError(e.output)
-                    tb = traceback.format_exc()
-                    self.__sm__(tb, 'ERROR')
-                    arcpy.AddError(tb)
-                    sys.exit()
+    def __pullRegion__(self, state, workspace, destinationBucket, tempLocation, items):
+        """pullRegion(state=None, workspace=None, destinationBucket=None, tempLocation=None, items=None)
+            Copies and parses one region, logging to its own file.  Errors are caught so the other regions keep going
+        """
+        result = {'region': state, 'status': 'success', 'bytes': 0, 'seconds': 0, 'error': ''}
+        startTime = time.time()
+        self.__startRegionLog__(state, tempLocation)
+        try:
+            copy_whole     = items['copy_whole']
+            copy_archydro  = items['copy_archydro']
+            copy_global    = items['copy_global']
+            huc_ids        = items['huc_ids']
+            copy_bc_layers = items['copy_bc_layers']
+
+            state_folder = os.path.join(workspace, state)
+            dest_state = destinationBucket + '/data/' + state.lower()
+            xml_loc =  state_folder + '/StreamStats' + state.upper() + '.xml'
+            dest_xml = dest_state + '/StreamStats' + state.upper() + '.xml'
+            self.__sm__('Processing: ' + state)
+            arcpy.AddMessage('Processing: ' + state)
+
+            if copy_bc_layers == 'true':
+                result['bytes'] += self.__copyS3__(dest_state + '/bc_layers', state_folder + '/bc_layers', '--recursive')
+
+            if copy_archydro == 'true':
+                result['bytes'] += self.__copyS3__(dest_state + '/archydro', state_folder + '/archydro', '--recursive')
+
+            if copy_global == 'true':
+                global_path = '/archydro/global.gdb'
+                result['bytes'] += self.__copyS3__(dest_state + global_path, state_folder + global_path, '--recursive')
+            if huc_ids:
+                for huc_id in huc_ids.split(';'):
+                    huc_path = '/archydro/' + huc_id
+                    result['bytes'] += self.__copyS3__(dest_state + huc_path, state_folder + huc_path, '--recursive')
+            if any([items['copy_xml'] == 'true', copy_archydro == 'true', copy_bc_layers == 'true', huc_ids]):
+                result['bytes'] += self.__copyS3__(dest_xml, xml_loc, '')
+            if items['copy_schema'] == 'true':
+                schema_path = '/' + state.upper() + '_ss.gdb/'
+                schema_path1 = '/' + state.lower() + '_ss.gdb/'
+                schemaFound = self.__checkS3Bucket__(dest_state + schema_path)
+                arcpy.AddMessage(schemaFound)
+                if schemaFound == 'True':
+                    result['bytes'] += self.__copyS3__(dest_state + schema_path, state_folder + schema_path, '--recursive')
+                elif self.__checkS3Bucket__(dest_state + schema_path1) == 'True':
+                    result['bytes'] += self.__copyS3__(dest_state + schema_path1, state_folder + schema_path1, '--recursive')
+            if copy_whole == 'true':
+                result['bytes'] += self.__copyS3__(dest_state + '/', state_folder, '--recursive')
+
+            # ParseData works through arcpy.env, which every thread shares
+            with self.__parseLock__:
+                if copy_whole == 'true':
+                    parse = ParseData(state_folder, state, tempLocation, xml_loc , 'true', 'true', huc_ids, copy_global, 'pull')
                 else:
-                    self.__sm__('Finished configuring AWS Key ID') 
-    def __configureAWSKey__(self, AWSAccessKey):
-        """configureAWSKey(AWSAccessKey=None)
-            Function to configure AWS CLI Access Key
+                    parse = ParseData(state_folder, state, tempLocation, xml_loc , copy_archydro, copy_bc_layers, huc_ids, copy_global, 'pull')
+            if not parse.isComplete:
+                raise Exception('Parsing failed, see parse_' + state + '.log')
+        except:
+            tb = traceback.format_exc()
+            result['status'] = 'failed'
+            result['error'] = tb
+            self.__sm__('Error pulling ' + state + ' ' + tb, 'ERROR')
+            arcpy.AddError('Error pulling ' + state + ' ' + tb)
+        finally:
+            result['seconds'] = round(time.time() - startTime, 1)
+            self.__stopRegionLog__()
+        return result
+
+    def __summarize__(self, results, tempLocation):
+        """summarize(results=None, tempLocation=None)
+            Logs one summary for all regions, writes it to pullSummary.json and returns the failed regions
+        """
+        succeeded = [r['region'] for r in results if r['status'] == 'success']
+        failed = [r['region'] for r in results if r['status'] != 'success']
+        totalBytes = sum(r['bytes'] for r in results)
+        for r in results:
+            self.__sm__(r['region'] + ': ' + r['status'] + ', ' + str(round(r['bytes'] / 1048576.0, 1)) + ' MB in ' + str(r['seconds']) + ' s')
+
+        summary = 'Summary: ' + str(len(succeeded)) + ' succeeded, ' + str(len(failed)) + ' failed, ' + str(round(totalBytes / 1048576.0, 1)) + ' MB moved'
+        if failed: summary += '. Failed regions: ' + ', '.join(failed)
+        print(summary)
+        self.__sm__(summary, 'ERROR' if failed else 'INFO')
+        arcpy.AddMessage(summary)
+
+        with open(os.path.join(tempLocation, 'pullSummary.json'), 'w') as f:
+            json.dump({'succeeded': succeeded, 'failed': failed, 'bytes': totalBytes, 'regions': results}, f, indent=2)
+        return failed
+
+    def __startRegionLog__(self, state, tempLocation):
+        formatter = logging.Formatter('%(asctime)s %(message)s')
+        handler = logging.FileHandler(os.path.join(tempLocation, 'pullFromS3_{0}.log'.format(state)))
+        handler.setFormatter(formatter)
+        logger = logging.getLogger('pullFromS3_{0}'.format(state))
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        self.__regionLog__.logger = logger
+        self.__regionLog__.handler = handler
+
+    def __stopRegionLog__(self):
+        self.__regionLog__.logger.removeHandler(self.__regionLog__.handler)
+        self.__regionLog__.handler.close()
+        self.__regionLog__.logger = None
+
+    def __configureTransfer__(self, settings, AWSKeyID, AWSAccessKey):
+        """configureTransfer(settings=None, AWSKeyID=None, AWSAccessKey=None)
+            Function to create the S3 transfer agent shared by every copy in this run
         """
-        #create AWS CLI command
-        cmd="aws configure set aws_secret_access_key " + AWSAccessKey
-
         try:
-            output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-        except subprocess.CalledProcessError as e:
-            arcpy.addError('Configure not successful.  Please make sure you have installed the AWS CLI.')
-            self.__sm__(e.output, 'ERROR')
-            arcpy.AddError(e.output)
+            journalPath = settings.get('resume') or os.path.join(self.__TempLocation__, 'transfer.journal')
+            settings.setdefault('inventoryCache', os.path.join(os.path.dirname(self.__TempLocation__), 'inventory'))
+            self.__transfer__ = createTransferAgent(settings, AWSKeyID, AWSAccessKey, self.__sm__, journalPath)
+            self.__sm__('Transfer journal: ' + journalPath)
+        except:
+            arcpy.AddError('Configure not successful.  Please make sure you have installed boto3.')
             tb = traceback.format_exc()
             self.__sm__(tb, 'ERROR')
             arcpy.AddError(tb)
             sys.exit()
         else:
-            self.__sm__('Finished configuring AWS Secret Access Key')
+            self.__sm__('Finished configuring ' + settings.get('backend', 's3') + ' transfer backend')
 
     def __copyS3__(self, source=None,destination=None,args=None, log=False):
         """copyS3(source=None,destination=None,args=None)
-            Function to call AWS CLI tools copy source file or folder to and from s3 with error trapping
+            Function to copy source file or folder to and from s3, returns the bytes copied.
+            A failed copy is logged and raised, so the region is reported as failed
         """
         if args == None:
             args = ""
         
         if self.__checkS3Bucket__(source) == 'True':
-            cmd="aws s3 cp " + source + " " + destination +  " " + args
             cmd_print = 'Copying ' + source + ' to ' + destination + '...'
-            print cmd_print
+            print(cmd_print)
             self.__sm__(cmd_print)
             arcpy.AddMessage(cmd_print)
 
             try:
-                output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-            except subprocess.CalledProcessError as e:
+                return self.__transfer__.Copy(source, destination, '--recursive' in args)
+            except:
                 tb = traceback.format_exc()
-                if 'lock' not in e.output and 'exit status 2' not in tb:
-                    self.__sm__(e.output, 'ERROR')
-                    arcpy.AddError(e.output)
-                    self.__sm__(tb, 'ERROR')
-                    arcpy.AddError(tb)
+                self.__sm__(tb, 'ERROR')
+                arcpy.AddError(tb)
+                raise
         else:
-            print source + ' not found'
+            print(source + ' not found')
             self.__sm__(source + ' not found')
             arcpy.AddMessage(source + ' not found')
+        return 0
 
 
     def __checkS3Bucket__(self, fileLocation=None):
         """checkS3Bucket(fileLocation=None)
-            function to check for existence of files in s3 bucket
+            function to check for existence of files in s3 bucket, an error checking is raised rather than taken as not found
         """
-        cmd = "aws s3 ls " + fileLocation
         try:
-            output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-            return 'True'
-
-        except subprocess.CalledProcessError as e:
+            if self.__transfer__.Exists(fileLocation):
+                return 'True'
             return 'False'
-        else:
-            self.__sm__('Received list of elements in bucket')
+
+        except:
+            self.__sm__(traceback.format_exc(), 'ERROR')
+            raise
 
 
     def __sm__(self, msg, type = 'INFO'):
-        self.Message += type +':' + msg.replace('_',' ') + '_'
+        with self.__messageLock__:
+            self.Message += type +':' + msg.replace('_',' ') + '_'
 
-        if type in ('ERROR'): self.__logger__.error(msg)
-        else : self.__logger__.info(msg)
+        loggers = [self.__logger__]
+        if getattr(self.__regionLog__, 'logger', None) != None: loggers.append(self.__regionLog__.logger)
+        for logger in loggers:
+            if type in ('ERROR'): logger.error(msg)
+            else : logger.info(msg)
 
 if __name__ == '__main__':
     #add stuff here for args, etc. if using from command line
@@ -263,9 +337,20 @@ if __name__ == '__main__':
     parser.add_argument("-copy_bc_layers", help="indicates whether to copy the entire bc_layers folder", type=str, default='false')
     parser.add_argument("-copy_xml", help="indicates whether to copy the region's .xml file", type=str, default='false')
     parser.add_argument("-copy_schema", help="indicates whether to copy the region's schema folder", type=str, default='false')
+    parser.add_argument("-workers", help="number of regions to pull at the same time when region_id is 'all'", type=int, default=None)
+    parser.add_argument("-resume", help="path of the transfer.journal of an interrupted run to resume", type=str, default=None)
+    parser.add_argument("-inventory_ttl", help="minutes a cached bucket listing in the workspace 'inventory' folder stays valid", type=float, default=None)
+    parser.add_argument("-backend", help="overrides the transfer backend in config.json, 's3' or 'local'", type=str, default=None)
+    parser.add_argument("-local_root", help="folder standing in for s3 when using the 'local' backend", type=str, default=None)
     
     args = parser.parse_args()
     parameters = []
     parameters.extend((args.region_id, args.workspace, args.copy_whole, args.copy_whole_archydro, args.copy_global, 
         args.huc_folders,args.copy_bc_layers, args.copy_xml, args.copy_schema))
-    Main(parameters)
\ No newline at end of file
+    options = {}
+    if args.workers: options['regionWorkers'] = args.workers
+    if args.resume: options['resume'] = args.resume
+    if args.inventory_ttl is not None: options['inventoryTTLMinutes'] = args.inventory_ttl
+    if args.backend: options['backend'] = args.backend
+    if args.local_root: options['localRoot'] = args.local_root
+    Main(parameters, options)
\ No newline at end of file
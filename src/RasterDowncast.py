@@ -0,0 +1,206 @@
+#------------------------------------------------------------------------------
+#----- RasterDowncast.py ------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Rewrites staged bc_layers rasters with the smallest lossless
+#             pixel type RasterScan recommends, before they are uploaded
+#
+#discussion:  Every raster is written to a new file or grid next to it (with
+#             arcpy CopyRaster, or GDAL when arcpy is missing), optionally
+#             compressed, and scanned again; only when min, max and the
+#             valid cell count match is the original deleted and the new one
+#             renamed into its place.  Staged files may be hard links to the
+#             source state folder, so nothing is ever rewritten in place, and
+#             the files ArcGIS edits in place (a grid's files and the INFO
+#             catalog of its workspace, info/arc.dir) are replaced with
+#             copies of their own first.  GDAL writes the new raster with the
+#             driver of the source format, so an .img stays an .img.
+#             The before/after sizes go in rasterDowncast_<region>.json.
+#
+#             python RasterDowncast.py <state folder> -compression LZW
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import traceback
+import os
+import json
+import shutil
+import argparse
+import numpy
+from ZonalStatistics import GdalRaster, openRaster, arcpy, gdal
+from RasterScan import RasterScan, listRasters, scanRaster, noDataFor
+#endregion
+
+PIXEL_TYPES = {'uint8': '8_BIT_UNSIGNED', 'int8': '8_BIT_SIGNED', 'uint16': '16_BIT_UNSIGNED', 'int16': '16_BIT_SIGNED',
+               'uint32': '32_BIT_UNSIGNED', 'int32': '32_BIT_SIGNED', 'float32': '32_BIT_FLOAT', 'float64': '64_BIT'}
+GDAL_TYPES = {'uint8': 'Byte', 'int8': 'Int8', 'uint16': 'UInt16', 'int16': 'Int16', 'uint32': 'UInt32', 'int32': 'Int32',
+              'float32': 'Float32', 'float64': 'Float64'}
+
+def rasterBytes(path):
+    """rasterBytes(path)
+        Size of a raster: every file of a grid folder, or the file and its sidecars (same name, other extension)
+    """
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, dirs, files in os.walk(path) for f in files)
+    folder = os.path.dirname(path)
+    base = os.path.splitext(os.path.basename(path))[0] + '.'
+    return sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder) if f.startswith(base))
+
+class RasterDowncast(object):
+    #region Constructor
+    def __init__(self, compression=None, blockSize=1024, messenger=None):
+        self.Compression = compression or None
+        self.BlockSize = blockSize
+        self.Rasters = []
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Run(self, scanned):
+        """Run(scanned)
+            Rewrites the scanned rasters (RasterScan results) whose recommended dtype differs, returns one entry per raster
+        """
+        self.Rasters = []
+        for i, stats in enumerate(r for r in scanned if not r.get('error') and r['recommendedDtype'] != r['dtype']):
+            entry = {'path': stats['path'], 'dtype': stats['dtype'], 'newDtype': stats['recommendedDtype'],
+                     'bytesBefore': rasterBytes(stats['path']), 'bytesAfter': None, 'linksBroken': 0, 'error': ''}
+            try:
+                entry['linksBroken'] = self._breakLinks(stats['path'])
+                self._downcast(stats, i)
+                entry['bytesAfter'] = rasterBytes(stats['path'])
+                self._sm('downcast ' + os.path.basename(stats['path']) + ' ' + entry['dtype'] + ' -> ' + entry['newDtype'] + ': ' +
+                         str(entry['bytesBefore']) + ' -> ' + str(entry['bytesAfter']) + ' bytes')
+            except:
+                entry['error'] = traceback.format_exc()
+                entry['bytesAfter'] = entry['bytesBefore']
+                self._sm('kept ' + stats['path'] + ' ' + entry['error'], 'ERROR')
+            self.Rasters.append(entry)
+        return self.Rasters
+    def Save(self, path, regionID=None):
+        before = sum(r['bytesBefore'] for r in self.Rasters)
+        after = sum(r['bytesAfter'] for r in self.Rasters)
+        report = {'region': regionID, 'compression': self.Compression, 'rasters': self.Rasters,
+                  'totals': {'rasters': len(self.Rasters), 'failed': len([r for r in self.Rasters if r['error']]),
+                             'bytesBefore': before, 'bytesAfter': after, 'bytesSaved': before - after}}
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+    #endregion
+
+    #region Helper Methods
+    def _breakLinks(self, path):
+        # CopyRaster, Delete and Rename rewrite the INFO catalog (and GDAL the .aux.xml) in place, which through a
+        # hard link would change the source state folder: hard linked files become copies of their own
+        folder = os.path.dirname(path)
+        paths = [path, os.path.join(folder, 'info')]
+        if not os.path.isdir(path):
+            base = os.path.splitext(os.path.basename(path))[0] + '.'
+            paths = [os.path.join(folder, f) for f in os.listdir(folder) if f.startswith(base)] + paths[1:]
+        files = []
+        for p in paths:
+            if os.path.isdir(p): files.extend(os.path.join(root, f) for root, dirs, names in os.walk(p) for f in names)
+            elif os.path.isfile(p): files.append(p)
+        broken = 0
+        for f in files:
+            if os.stat(f).st_nlink < 2: continue
+            shutil.copy2(f, f + '.unlink')
+            os.remove(f)
+            os.rename(f + '.unlink', f)
+            broken += 1
+        return broken
+    def _downcast(self, stats, index):
+        path = stats['path']
+        folder = os.path.dirname(path)
+        name, extension = os.path.splitext(os.path.basename(path))
+        # grid names are at most 13 characters
+        temp = os.path.join(folder, ('dc' + str(index) + '_' + name)[:13] + extension)
+        noData = noDataFor(stats['newDtype'], stats['min'], stats['max']) if stats['noDataCells'] or stats['noData'] != None else None
+        self._remove(temp)
+        try:
+            if arcpy != None: self._copyArcpy(path, temp, stats['newDtype'], noData)
+            else: self._copyGdal(path, temp, stats['newDtype'], noData)
+            check = scanRaster(openRaster(temp), self.BlockSize)
+            if (check['min'], check['max'], check['validCells']) != (stats['min'], stats['max'], stats['validCells']):
+                raise ValueError('values changed: ' + str((check['min'], check['max'], check['validCells'])) + ' != ' +
+                                 str((stats['min'], stats['max'], stats['validCells'])))
+        except:
+            self._remove(temp)
+            raise
+        # the original goes (a hard link only loses this name), the copy takes its place
+        self._remove(path)
+        if arcpy != None: arcpy.Rename_management(temp, path)
+        else: self._renameFiles(temp, path)
+    def _copyArcpy(self, path, temp, dtype, noData):
+        if self.Compression: arcpy.env.compression = self.Compression
+        try:
+            arcpy.CopyRaster_management(path, temp, "", "", "" if noData == None else str(noData), "", "", PIXEL_TYPES[dtype])
+        finally:
+            arcpy.ClearEnvironment("compression")
+    def _copyGdal(self, path, temp, dtype, noData):
+        # one block at a time, nodata cells moved to the new nodata value before the cast
+        source = GdalRaster(path)
+        # the source's format, so the raster keeps its extension and the name the xml knows it by
+        driver = source._dataset.GetDriver()
+        if driver.GetMetadataItem(gdal.DCAP_CREATE) != 'YES': raise ValueError('GDAL cannot write ' + driver.ShortName + ' rasters')
+        options = []
+        if self.Compression and driver.ShortName == 'GTiff': options = ['COMPRESS=' + self.Compression]
+        elif self.Compression and driver.ShortName == 'HFA': options = ['COMPRESSED=YES']
+        target = driver.Create(temp, source.Columns, source.Rows, 1, gdal.GetDataTypeByName(GDAL_TYPES[dtype]), options)
+        target.SetGeoTransform(source._dataset.GetGeoTransform())
+        target.SetProjection(source._dataset.GetProjection())
+        band = target.GetRasterBand(1)
+        if noData != None: band.SetNoDataValue(noData)
+        for row in range(0, source.Rows, self.BlockSize):
+            for column in range(0, source.Columns, self.BlockSize):
+                block = numpy.asarray(source.Read(row, column, min(self.BlockSize, source.Rows - row), min(self.BlockSize, source.Columns - column)))
+                if noData != None:
+                    invalid = numpy.zeros(block.shape, dtype=bool)
+                    if source.NoData != None: invalid |= block == source.NoData
+                    if block.dtype.kind == 'f': invalid |= numpy.isnan(block)
+                    block = numpy.where(invalid, noData, block)
+                band.WriteArray(block.astype(dtype), column, row)
+        band.FlushCache()
+        target = None
+    def _renameFiles(self, temp, path):
+        folder = os.path.dirname(temp)
+        base = os.path.splitext(os.path.basename(temp))[0]
+        target = os.path.splitext(os.path.basename(path))[0]
+        for f in os.listdir(folder):
+            if f.startswith(base + '.'): os.rename(os.path.join(folder, f), os.path.join(folder, target + f[len(base):]))
+    def _remove(self, path):
+        if arcpy != None:
+            if arcpy.Exists(path): arcpy.Delete_management(path)
+        elif os.path.isdir(path): shutil.rmtree(path)
+        elif os.path.exists(path):
+            folder = os.path.dirname(path)
+            base = os.path.splitext(os.path.basename(path))[0] + '.'
+            for f in [f for f in os.listdir(folder) if f.startswith(base)]: os.remove(os.path.join(folder, f))
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("state_folder", help="staged regional folder whose bc_layers rasters are rewritten", type=str)
+    parser.add_argument("-report", help="json report to write", type=str, default='rasterDowncast.json')
+    parser.add_argument("-compression", help="compression of the rewritten rasters, e.g. LZW or LZ77", type=str, default='')
+    parser.add_argument("-workers", help="number of rasters scanned at the same time", type=int, default=2)
+    parser.add_argument("-block_size", help="rows and columns read per block", type=int, default=1024)
+
+    args = parser.parse_args()
+    rasters = [path for path in listRasters(args.state_folder) if os.path.basename(os.path.dirname(path)) == 'bc_layers']
+    downcast = RasterDowncast(args.compression, args.block_size)
+    downcast.Run(RasterScan(args.workers, args.block_size).Scan(rasters))
+    print(json.dumps(downcast.Save(args.report, os.path.basename(args.state_folder))['totals'], indent=2))
@@ -0,0 +1,182 @@
+#------------------------------------------------------------------------------
+#----- RasterScan.py ----------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Raster statistics of a state's bc_layers and huc rasters, read
+#             one block at a time, with the smallest dtype that holds them
+#
+#discussion:  Each raster is read in blockSize x blockSize windows (the
+#             readers of ZonalStatistics), so memory stays bounded however
+#             large the grid.  A scan keeps min, max, nodata and valid cell
+#             counts, whether every value is whole and whether a float64
+#             raster survives float32.  The recommended dtype is the smallest
+#             integer type that holds the values and, when there are nodata
+#             cells, one more value for nodata; float32 for float64 rasters
+#             that lose nothing; otherwise the raster's own dtype.  Rasters
+#             are scanned in parallel on a process pool.
+#
+#             python RasterScan.py <state folder> -report rasterReport.json
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import traceback
+import os
+import json
+import time
+import argparse
+import numpy
+from ZonalStatistics import openRaster, arcpy
+from FileWorkers import processPool
+#endregion
+
+INTEGER_TYPES = ('uint8', 'int8', 'uint16', 'int16', 'uint32', 'int32')
+RASTER_EXTENSIONS = ('.tif', '.tiff', '.img')
+
+def listRasters(dataFolder):
+    """listRasters(dataFolder)
+        Rasters in the bc_layers and huc (digit named) folders under dataFolder
+    """
+    rasters = []
+    for root, dirs, files in os.walk(dataFolder):
+        for d in sorted(d for d in dirs if d == "bc_layers" or d[0].isdigit()):
+            folder = os.path.join(root, d)
+            if arcpy != None:
+                arcpy.env.workspace = folder
+                names = arcpy.ListRasters() or []
+            else:
+                names = [n for n in os.listdir(folder) if os.path.splitext(n)[1].lower() in RASTER_EXTENSIONS]
+            rasters.extend(os.path.join(folder, n) for n in sorted(names))
+    return rasters
+
+def recommendDtype(stats):
+    """recommendDtype(stats)
+        Smallest dtype that holds the scanned values (and a nodata value if the raster has nodata cells)
+    """
+    current = stats['dtype']
+    if stats['min'] == None: return current
+    itemsize = numpy.dtype(current).itemsize
+    if stats['integral']:
+        for name in INTEGER_TYPES:
+            info = numpy.iinfo(name)
+            if numpy.dtype(name).itemsize >= itemsize: break
+            if info.min <= stats['min'] and stats['max'] <= info.max:
+                if not stats['noDataCells'] or info.min < stats['min'] or stats['max'] < info.max: return name
+    if current == 'float64' and stats['float32Exact']: return 'float32'
+    return current
+
+def noDataFor(dtype, minimum, maximum):
+    """noDataFor(dtype, minimum, maximum)
+        A nodata value of dtype outside [minimum, maximum]: the type's max, or its min when max is used
+    """
+    if numpy.dtype(dtype).kind == 'f': return float(numpy.finfo(dtype).min)
+    info = numpy.iinfo(dtype)
+    return int(info.max) if maximum == None or maximum < info.max else int(info.min)
+
+def scanRaster(raster, blockSize=1024):
+    """scanRaster(raster, blockSize=1024)
+        Statistics of a raster reader (ZonalStatistics), read one block at a time
+    """
+    stats = {'rows': raster.Rows, 'columns': raster.Columns, 'dtype': None, 'noData': raster.NoData,
+             'min': None, 'max': None, 'noDataCells': 0, 'validCells': 0, 'integral': True, 'float32Exact': True, 'blocks': 0}
+    for row in range(0, raster.Rows, blockSize):
+        for column in range(0, raster.Columns, blockSize):
+            block = numpy.asarray(raster.Read(row, column, min(blockSize, raster.Rows - row), min(blockSize, raster.Columns - column)))
+            stats['blocks'] += 1
+            if stats['dtype'] == None: stats['dtype'] = str(block.dtype)
+            valid = numpy.ones(block.shape, dtype=bool)
+            if raster.NoData != None: valid &= block != raster.NoData
+            if block.dtype.kind == 'f': valid &= ~numpy.isnan(block)
+            values = block[valid]
+            stats['noDataCells'] += int(block.size - values.size)
+            stats['validCells'] += int(values.size)
+            if values.size == 0: continue
+            low, high = values.min().item(), values.max().item()
+            stats['min'] = low if stats['min'] == None else min(stats['min'], low)
+            stats['max'] = high if stats['max'] == None else max(stats['max'], high)
+            if block.dtype.kind == 'f':
+                if stats['integral']: stats['integral'] = bool(numpy.all(numpy.mod(values, 1) == 0))
+                if block.dtype == numpy.float64 and stats['float32Exact']:
+                    stats['float32Exact'] = bool(numpy.all(values.astype(numpy.float32).astype(numpy.float64) == values))
+    stats['recommendedDtype'] = recommendDtype(stats)
+    return stats
+
+class RasterScan(object):
+    #region Constructor
+    def __init__(self, workers=1, blockSize=1024, messenger=None):
+        self.Workers = max(1, workers)
+        self.BlockSize = blockSize
+        self.Rasters = []
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Scan(self, paths):
+        """Scan(paths)
+            Scans every raster, returns their statistics dicts (with 'path', 'seconds' and any 'error')
+        """
+        jobs = [(path, self.BlockSize) for path in paths]
+        if self.Workers == 1 or len(jobs) < 2:
+            self.Rasters = [_scanPath(job) for job in jobs]
+        else:
+            pool = processPool(min(self.Workers, len(jobs)))
+            try:
+                self.Rasters = pool.map(_scanPath, jobs, 1)
+            finally:
+                pool.close()
+                pool.join()
+        for stats in self.Rasters:
+            if stats.get('error'): self._sm('could not scan ' + stats['path'] + ' ' + stats['error'], 'ERROR')
+            else: self._sm(os.path.basename(stats['path']) + ': ' + str(stats['dtype']) + ' ' + str(stats['min']) + '..' +
+                           str(stats['max']) + ', ' + str(stats['noDataCells']) + ' nodata cells, recommended ' + stats['recommendedDtype'])
+        return self.Rasters
+    def Save(self, path, regionID=None):
+        scanned = [r for r in self.Rasters if not r.get('error')]
+        report = {'region': regionID, 'blockSize': self.BlockSize, 'rasters': self.Rasters,
+                  'totals': {'rasters': len(self.Rasters), 'failed': len(self.Rasters) - len(scanned),
+                             'cells': sum(r['rows'] * r['columns'] for r in scanned),
+                             'downcastable': len([r for r in scanned if r['recommendedDtype'] != r['dtype']])}}
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+    #endregion
+
+    #region Helper Methods
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
+
+def _scanPath(job):
+    # runs in a pool process
+    path, blockSize = job
+    started = time.time()
+    try:
+        stats = scanRaster(openRaster(path), blockSize)
+    except:
+        stats = {'error': traceback.format_exc()}
+    stats['path'] = path
+    stats['seconds'] = time.time() - started
+    return stats
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("state_folder", help="regional folder containing 'archydro' and bc_layers' folders", type=str)
+    parser.add_argument("-report", help="json report to write", type=str, default='rasterReport.json')
+    parser.add_argument("-workers", help="number of rasters scanned at the same time", type=int, default=2)
+    parser.add_argument("-block_size", help="rows and columns read per block", type=int, default=1024)
+
+    args = parser.parse_args()
+    scan = RasterScan(args.workers, args.block_size)
+    scan.Scan(listRasters(args.state_folder))
+    print(json.dumps(scan.Save(args.report, os.path.basename(args.state_folder))['totals'], indent=2))
@@ -0,0 +1,190 @@
+#------------------------------------------------------------------------------
+#----- RegionContext.py -------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Region-level setup shared by every Delineation and
+#             BasinParameters run of a region in one process
+#
+#discussion:  A context is keyed by the region and the paths and mtimes of
+#             its xml and schema gdb (the newest table file in the gdb), so
+#             editing either builds a new one on the next lookup.  The lock
+#             files ArcGIS adds and removes whenever a gdb is read, and the
+#             folder mtime they touch, are not part of the key.  It describes the
+#             template spatial reference once, rewrites the regional xml's
+#             data paths once per temp location, copies it into a workspace
+#             only when the copy there is missing or was changed, and creates
+#             workspace and scratch gdbs once per process.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import threading
+import xml.dom.minidom
+import xml.etree.ElementTree as ET
+try:
+    import arcpy
+except ImportError:
+    # the region xml copies and keys work without ArcGIS
+    arcpy = None
+#endregion
+
+__contexts__ = {}
+__lock__ = threading.Lock()
+
+def getContext(regionID, schemas, xml, stateFolder, messenger=None):
+    """getContext(regionID, schemas, xml, stateFolder, messenger=None)
+        The prepared context of the region, a new one when the xml or schema changed since the last
+    """
+    key = contextKey(regionID, schemas, xml, stateFolder)
+    with __lock__:
+        context = __contexts__.get(regionID.upper())
+        if context == None or context.Key != key:
+            context = RegionContext(regionID, schemas, xml, stateFolder, key)
+            __contexts__[regionID.upper()] = context
+            created = True
+        else: created = False
+    context.Messenger = messenger
+    context._sm(('prepared' if created else 'reusing') + ' region context for ' + regionID)
+    return context
+
+def findContext(regionID, messenger=None):
+    """findContext(regionID, messenger=None)
+        The current context of a region a Delineation already prepared in this process, or None
+    """
+    with __lock__:
+        context = __contexts__.get(regionID.upper())
+    if context == None: return None
+    return getContext(context.RegionID, context.SchemaPath, context.XMLSource, context.StateFolder, messenger)
+
+def clearContexts():
+    with __lock__:
+        __contexts__.clear()
+
+def contextKey(regionID, schemas, xml, stateFolder):
+    return (regionID.upper(), xml, latestMTime(xml), schemas, latestMTime(schemas), stateFolder)
+
+def latestMTime(path):
+    # a gdb changes by its table files; reading it only adds and removes *.lock files, which touch the folder
+    if not path or not os.path.exists(path): return None
+    if not os.path.isdir(path): return os.path.getmtime(path)
+    names = [name for name in os.listdir(path) if not name.lower().endswith('.lock')]
+    if path.rstrip('\\/').lower().endswith('.gdb'):
+        names = [name for name in names if name.lower().endswith(('.gdbtable', '.gdbtablx'))] or names
+    return max([os.path.getmtime(os.path.join(path, name)) for name in names] or [None])
+
+class RegionContext(object):
+    #region Constructor
+    def __init__(self, regionID, schemas, xml, stateFolder, key=None):
+        self.RegionID = regionID
+        self.SchemaPath = schemas
+        self.XMLSource = xml
+        self.StateFolder = stateFolder
+        self.TemplatePath = os.path.join(schemas, "Layers")
+        self.Key = key or contextKey(regionID, schemas, xml, stateFolder)
+        self.Messenger = None
+        self._spatialReference = None
+        self._xml = {}            # temp location: rewritten xml
+        self._written = {}        # xml copy: (mtime, size) when written
+        self._workspaces = set()
+        self._scratch = set()
+        self._parameters = None
+        self._lock = threading.RLock()
+    #endregion
+
+    #region Methods
+    def SpatialReference(self):
+        with self._lock:
+            if self._spatialReference == None:
+                self._spatialReference = arcpy.Describe(self.TemplatePath).spatialReference
+            return self._spatialReference
+    def XMLFile(self, directory, tempLocation="#"):
+        """XMLFile(directory, tempLocation="#")
+            StreamStats<region>.xml in directory, data paths pointing at the state folder and TempLocation
+            at tempLocation unless "#"; written only when the copy there is missing or changed
+        """
+        xmlFile = os.path.join(directory, "StreamStats{0}.xml".format(self.RegionID))
+        with self._lock:
+            text = self._xml.get(tempLocation)
+            if text == None:
+                text = self._rewrite(tempLocation)
+                self._xml[tempLocation] = text
+            written = self._written.get(xmlFile)
+            if written != None and written[0] == tempLocation and self._stat(xmlFile) == written[1]:
+                return xmlFile
+            with open(xmlFile, "wb") as f:
+                f.write(text)
+            self._written[xmlFile] = (tempLocation, self._stat(xmlFile))
+            self._sm("wrote region xml " + xmlFile)
+        return xmlFile
+    def Workspace(self, directory, workspaceID):
+        """Workspace(directory, workspaceID)
+            The Layers dataset of directory/workspaceID.gdb, creating the gdb and dataset the first time
+        """
+        datasetPath = os.path.join(directory, workspaceID + '.gdb')
+        featurePath = os.path.join(datasetPath, 'Layers')
+        with self._lock:
+            if featurePath in self._workspaces and arcpy.Exists(featurePath): return featurePath
+            if not arcpy.Exists(datasetPath):
+                self._sm("datasetPath: " + datasetPath)
+                datasetPath = arcpy.CreateFileGDB_management(directory, workspaceID + '.gdb')[0]
+            if not arcpy.Exists(featurePath):
+                featurePath = arcpy.CreateFeatureDataset_management(datasetPath, 'Layers', self.SpatialReference())[0]
+            self._workspaces.add(featurePath)
+        return featurePath
+    def ScratchWorkspace(self, directory):
+        """ScratchWorkspace(directory)
+            directory/scratch.gdb, recreated empty the first time this context uses it and reused after
+        """
+        scratch = os.path.join(directory, "scratch.gdb")
+        with self._lock:
+            if scratch in self._scratch and arcpy.Exists(scratch): return scratch
+            if arcpy.Exists(scratch): arcpy.Delete_management(scratch)
+            arcpy.CreateFileGDB_management(directory, 'scratch.gdb')
+            self._scratch.add(scratch)
+        return scratch
+    def Parameters(self):
+        """Parameters()
+            Lower case alias names of the WshParams fields in the regional xml
+        """
+        with self._lock:
+            if self._parameters == None:
+                xmlDoc = ET.parse(self.XMLSource)
+                self._parameters = [apField.get('AliasName').lower() for apField in
+                                    xmlDoc.findall(".//ApFunction[@TagName='WshParams']/ApFields[@TagName='ApFields']/ApField")]
+            return list(self._parameters)
+    #endregion
+
+    #region Helper Methods
+    def _rewrite(self, tempLocation):
+        xmlDoc = xml.dom.minidom.parse(self.XMLSource)
+        archydroPath = os.path.join(self.StateFolder, 'archydro')
+        bcLayersPath = os.path.join(self.StateFolder, 'bc_layers')
+        xmlDoc.getElementsByTagName('RASTERDATAPATH')[0].firstChild.data = bcLayersPath
+        xmlDoc.getElementsByTagName('VECTORDATAPATH')[0].firstChild.data = os.path.join(archydroPath, "global.gdb")
+        xmlDoc.getElementsByTagName('DataPath')[0].firstChild.data = archydroPath
+        xmlDoc.getElementsByTagName('GlobalDataPath')[0].firstChild.data = os.path.join(archydroPath, "global.gdb")
+        if tempLocation != "#":
+            xmlDoc.getElementsByTagName('TempLocation')[0].firstChild.data = tempLocation
+        text = xmlDoc.toxml()
+        xmlDoc.unlink()
+        if not isinstance(text, bytes): text = text.encode('utf-8')
+        return text
+    def _stat(self, path):
+        if not os.path.exists(path): return None
+        stat = os.stat(path)
+        return stat.st_mtime, stat.st_size
+    def _sm(self, msg, type='INFO'):
+        if self.Messenger != None: self.Messenger(msg, type)
+    #endregion
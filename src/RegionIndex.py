@@ -0,0 +1,181 @@
+#------------------------------------------------------------------------------
+#----- RegionIndex.py ---------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Bounding box index of the region polygons PercentOverlayAgent
+#             overlays, so only regions near a basin get exact geometry work
+#
+#discussion:  Every polygon feature class of the regions gdb gets its own
+#             STR tree (sort-tile-recursive packed R-tree) of feature extents
+#             in the feature class's spatial reference, holding the feature's
+#             OID, Name and GRIDCODE.  A query returns the features whose box
+#             meets the basin's box; a feature class with no candidates is
+#             skipped altogether.  The index can be saved as json next to the
+#             gdb and is reused while the gdb's version (its newest mtime)
+#             is unchanged.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import json
+import math
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+#endregion
+
+INDEX_VERSION = 1
+
+def boundsIntersect(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def unionBounds(bounds):
+    bounds = list(bounds)
+    if not bounds: return None
+    return (min(b[0] for b in bounds), min(b[1] for b in bounds), max(b[2] for b in bounds), max(b[3] for b in bounds))
+
+def indexPath(gdb):
+    """indexPath(gdb)
+        Where the index of gdb is saved: <gdb>.index.json beside it
+    """
+    return os.path.normpath(gdb) + '.index.json'
+
+class STRTree(object):
+    # nodes are (bounds, children, leaf) and leaf children are (bounds, value)
+    #region Constructor
+    def __init__(self, items, nodeCapacity=10):
+        self.NodeCapacity = max(2, nodeCapacity)
+        self.Size = len(items)
+        self._root = None
+        level = [(tuple(bounds), value) for bounds, value in items]
+        leaf = True
+        while level:
+            level = self._pack(level, leaf)
+            leaf = False
+            if len(level) == 1:
+                self._root = level[0]
+                break
+    #endregion
+
+    #region Methods
+    def Query(self, bounds):
+        """Query(bounds)
+            Values whose bounds meet bounds (xmin, ymin, xmax, ymax)
+        """
+        found = []
+        if self._root == None or bounds == None: return found
+        stack = [self._root]
+        while stack:
+            nodeBounds, children, leaf = stack.pop()
+            if not boundsIntersect(nodeBounds, bounds): continue
+            if leaf: found.extend(value for b, value in children if boundsIntersect(b, bounds))
+            else: stack.extend(children)
+        return found
+    #endregion
+
+    #region Helper Methods
+    def _pack(self, entries, leaf):
+        # sort by x center into vertical slices, each slice by y center into nodes
+        capacity = self.NodeCapacity
+        nodeCount = int(math.ceil(len(entries) / float(capacity)))
+        sliceSize = int(math.ceil(math.sqrt(nodeCount))) * capacity
+        entries = sorted(entries, key=lambda e: e[0][0] + e[0][2])
+        nodes = []
+        for s in range(0, len(entries), sliceSize):
+            column = sorted(entries[s:s + sliceSize], key=lambda e: e[0][1] + e[0][3])
+            for n in range(0, len(column), capacity):
+                children = column[n:n + capacity]
+                nodes.append((unionBounds(c[0] for c in children), children, leaf))
+        return nodes
+    #endregion
+
+class RegionIndex(object):
+    #region Constructor
+    def __init__(self, messenger=None):
+        self.Layers = {}
+        self.Version = None
+        self._trees = {}
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Add(self, featureClass, oidField, features):
+        """Add(featureClass, oidField, features)
+            Indexes [(oid, name, code, (xmin, ymin, xmax, ymax))] of a feature class
+        """
+        entries = [[oid, name, code, list(bounds)] for oid, name, code, bounds in features if bounds != None]
+        self.Layers[featureClass] = {'oidField': oidField, 'features': entries}
+        self._trees[featureClass] = STRTree([(bounds, (oid, name, code)) for oid, name, code, bounds in entries])
+    def Build(self, featureClasses):
+        """Build(featureClasses)
+            Indexes the feature extents of every feature class (arcpy)
+        """
+        for featureClass in featureClasses:
+            desc = arcpy.Describe(featureClass)
+            # region feature classes without a Name or GRIDCODE field index None for it
+            names = dict((f.name.upper(), f.name) for f in arcpy.ListFields(featureClass))
+            nameField, codeField = names.get("NAME"), names.get("GRIDCODE")
+            fields = ["OID@", "SHAPE@"] + [f for f in (nameField, codeField) if f]
+            features = []
+            with arcpy.da.SearchCursor(featureClass, fields) as cursor:
+                for row in cursor:
+                    if row[1] == None: continue
+                    values = dict(zip(fields, row))
+                    e = row[1].extent
+                    features.append((row[0], values.get(nameField), values.get(codeField), (e.XMin, e.YMin, e.XMax, e.YMax)))
+            self.Add(featureClass, desc.OIDFieldName, features)
+        self._sm('indexed ' + str(sum(len(l['features']) for l in self.Layers.values())) + ' region features in ' +
+                 str(len(self.Layers)) + ' feature classes')
+        return self
+    def Candidates(self, featureClass, bounds):
+        """Candidates(featureClass, bounds)
+            [(oid, name, code)] of the features whose extent meets bounds, None when the feature class is not indexed
+        """
+        tree = self._trees.get(featureClass)
+        if tree == None: return None
+        return sorted(tree.Query(bounds))
+    def Covers(self, featureClasses):
+        return all(f in self.Layers for f in featureClasses)
+    def Save(self, path, version=None):
+        self.Version = version
+        # one temp file per process, so processes saving the same index do not write into each other's file
+        tmpPath = path + '.' + str(os.getpid()) + '.tmp'
+        with open(tmpPath, 'w') as f:
+            json.dump({'indexVersion': INDEX_VERSION, 'version': version, 'layers': self.Layers}, f)
+        if os.path.exists(path): os.remove(path)
+        os.rename(tmpPath, path)
+    def Load(self, path, version=None):
+        """Load(path, version=None)
+            Reads a saved index, False when it is missing, unreadable or saved for another version
+        """
+        if not os.path.exists(path): return False
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except ValueError:
+            self._sm('ignoring unreadable region index ' + path, 'ERROR')
+            return False
+        if saved.get('indexVersion') != INDEX_VERSION or saved.get('version') != version: return False
+        for featureClass, layer in saved['layers'].items():
+            self.Add(featureClass, layer['oidField'], [(oid, name, code, tuple(bounds)) for oid, name, code, bounds in layer['features']])
+        self.Version = version
+        return True
+    #endregion
+
+    #region Helper Methods
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
@@ -0,0 +1,155 @@
+#------------------------------------------------------------------------------
+#----- RemoteInventory.py -----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Caches one recursive listing per region prefix so existence,
+#             size and etag lookups during a run do not go back to s3
+#
+#discussion:  The region prefix of a key is its first 'depth' path segments,
+#             e.g. 'data/ri/' for depth 2.  The first lookup under a region
+#             lists it once (paginated), later lookups are answered from the
+#             sorted key list.  Uploads and deletes made through the agent
+#             keep the cache current.  With a cache folder and a ttl the
+#             listing is also reused by later runs until it expires.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import json
+import time
+import bisect
+import threading
+#endregion
+
+class RemoteInventory(object):
+    #region Constructor
+    def __init__(self, backend, depth=2, cacheFolder=None, ttl=0, messenger=None):
+        self.Backend = backend
+        self.Depth = depth
+        self.CacheFolder = cacheFolder
+        self.TTL = ttl
+        self.Listings = 0
+        self._messenger = messenger
+        self._regions = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+    #endregion
+
+    #region Methods
+    def List(self, bucket, prefix):
+        """List(bucket, prefix)
+            Items under prefix, from the region listing when prefix is inside a region
+        """
+        root = self._regionPrefix(prefix)
+        if root == None:
+            self.Listings += 1
+            return list(self.Backend.List(bucket, prefix))
+        region = self._region(bucket, root)
+        with self._lock:
+            keys = region['keys']
+            i = bisect.bisect_left(keys, prefix)
+            items = []
+            while i < len(keys) and keys[i].startswith(prefix):
+                items.append(region['items'][keys[i]])
+                i += 1
+            return items
+    def Exists(self, bucket, prefix):
+        return len(self.List(bucket, prefix)) > 0
+    def Get(self, bucket, key):
+        """Get(bucket, key)
+            The item stored at exactly key ({'key', 'size', 'etag'}), or None
+        """
+        for item in self.List(bucket, key):
+            if item['key'] == key: return item
+        return None
+    def Record(self, bucket, key, size, etag):
+        region = self._loaded(bucket, key)
+        if region == None: return
+        with self._lock:
+            if key not in region['items']: bisect.insort(region['keys'], key)
+            region['items'][key] = {'key': key, 'size': size, 'etag': etag}
+            region['dirty'] = True
+    def Forget(self, bucket, keys):
+        for key in keys:
+            region = self._loaded(bucket, key)
+            if region == None or key not in region['items']: continue
+            with self._lock:
+                del region['items'][key]
+                region['keys'].pop(bisect.bisect_left(region['keys'], key))
+                region['dirty'] = True
+    def Save(self):
+        """Save()
+            Writes changed listings back to the cache folder so the next run can reuse them within the ttl
+        """
+        if not self.CacheFolder or self.TTL <= 0: return
+        with self._lock:
+            for (bucket, root), region in self._regions.items():
+                if not region['dirty']: continue
+                self._write(bucket, root, region)
+                region['dirty'] = False
+    #endregion
+
+    #region Helper Methods
+    def _regionPrefix(self, key):
+        segments = key.split('/')
+        if len(segments) <= self.Depth: return None
+        return '/'.join(segments[:self.Depth]) + '/'
+    def _loaded(self, bucket, key):
+        root = self._regionPrefix(key)
+        if root == None: return None
+        with self._lock:
+            return self._regions.get((bucket, root))
+    def _region(self, bucket, root):
+        with self._lock:
+            region = self._regions.get((bucket, root))
+            if region != None: return region
+            # one lock per region, so regions pulled in parallel list in parallel
+            loading = self._loading.setdefault((bucket, root), threading.Lock())
+        with loading:
+            with self._lock:
+                region = self._regions.get((bucket, root))
+            if region != None: return region
+            region = self._read(bucket, root)
+            if region == None:
+                items = dict((item['key'], item) for item in self.Backend.List(bucket, root))
+                region = {'time': time.time(), 'keys': sorted(items), 'items': items, 'dirty': True}
+                self.Listings += 1
+                self._sm('listed ' + str(len(items)) + ' objects under s3://' + bucket + '/' + root)
+            with self._lock:
+                self._regions[(bucket, root)] = region
+            return region
+    def _cachePath(self, bucket, root):
+        name = ''.join(c if c.isalnum() or c in '-.' else '_' for c in bucket + '/' + root.strip('/'))
+        return os.path.join(self.CacheFolder, name + '.json')
+    def _read(self, bucket, root):
+        if not self.CacheFolder or self.TTL <= 0: return None
+        path = self._cachePath(bucket, root)
+        if not os.path.isfile(path): return None
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+        except ValueError:
+            return None
+        if time.time() - cached['time'] > self.TTL: return None
+        items = dict((item['key'], item) for item in cached['items'])
+        self._sm('using cached listing of s3://' + bucket + '/' + root + ' from ' + time.ctime(cached['time']))
+        return {'time': cached['time'], 'keys': sorted(items), 'items': items, 'dirty': False}
+    def _write(self, bucket, root, region):
+        if not os.path.isdir(self.CacheFolder): os.makedirs(self.CacheFolder)
+        with open(self._cachePath(bucket, root), 'w') as f:
+            json.dump({'time': region['time'], 'items': [region['items'][k] for k in region['keys']]}, f)
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
@@ -0,0 +1,132 @@
+#------------------------------------------------------------------------------
+#----- SpatialInventory.py ----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  SQLite inventory of the spatial reference of every dataset
+#             projectionChecker has scanned
+#
+#discussion:  A row keeps a dataset's path, type, spatial reference name and
+#             WKID and the size and mtime it had when it was described, so
+#             a rescan only describes datasets whose size or mtime changed.
+#             A shapefile or raster is stamped with its files (a .prj edit
+#             counts), a dataset inside a gdb with the gdb's table files,
+#             the files RegionContext.latestMTime watches.  Lock files are
+#             never counted, the walk that stamps a dataset has just created
+#             them.  Rows
+#             are stored per top level part of the walk, so a rescanned part
+#             also drops the datasets that are gone.  ParseData reads it,
+#             without a walk, to warn before a state folder with mixed
+#             projections is uploaded.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import time
+import sqlite3
+#endregion
+
+INVENTORY_COLUMNS = ('path', 'partition', 'datatype', 'srName', 'wkid', 'size', 'mtime', 'error', 'scanned')
+GDB_EXTENSIONS = ('.gdb', '.mdb', '.sde')
+LOCK_EXTENSIONS = ('.lock', '.ldb')
+
+def datasetStamp(path, cache=None):
+    """datasetStamp(path, cache=None)
+        (size, mtime) of a dataset's files: a folder's, a file's and its sidecars', or its gdb's; cache keeps gdb stamps
+    """
+    if os.path.isdir(path):
+        files = [os.path.join(root, f) for root, dirs, names in os.walk(path) for f in names]
+        if path.rstrip('\\/').lower().endswith('.gdb'):
+            files = [f for f in files if f.lower().endswith(('.gdbtable', '.gdbtablx'))] or files
+    elif os.path.isfile(path):
+        folder = os.path.dirname(path)
+        base = os.path.splitext(os.path.basename(path))[0] + '.'
+        files = [os.path.join(folder, f) for f in os.listdir(folder) if f.startswith(base)]
+    else:
+        # a dataset inside a gdb or feature dataset has no files of its own
+        workspace = os.path.dirname(path)
+        while workspace and not workspace.lower().endswith(GDB_EXTENSIONS) and os.path.dirname(workspace) != workspace:
+            workspace = os.path.dirname(workspace)
+        if not os.path.isdir(workspace): return (None, None)
+        if cache != None and workspace in cache: return cache[workspace]
+        stamp = datasetStamp(workspace)
+        if cache != None: cache[workspace] = stamp
+        return stamp
+    stats = [os.stat(f) for f in files if not f.lower().endswith(LOCK_EXTENSIONS)]
+    return (sum(s.st_size for s in stats), max([s.st_mtime for s in stats] or [None]))
+
+def _likePrefix(folder):
+    # LIKE pattern of everything below folder, ! escapes the wildcards
+    folder = os.path.normpath(folder)
+    return folder.replace('!', '!!').replace('%', '!%').replace('_', '!_') + os.sep + '%'
+
+class SpatialInventory(object):
+    #region Constructor
+    def __init__(self, path, messenger=None):
+        self.Path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS datasets (path TEXT PRIMARY KEY, partition TEXT, datatype TEXT, "
+                                 "srName TEXT, wkid INTEGER, size INTEGER, mtime REAL, error TEXT, scanned REAL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS datasets_partition ON datasets (partition)")
+        self._connection.commit()
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Known(self, partition):
+        """Known(partition)
+            {path: record} of the datasets last stored for a part of the walk
+        """
+        cursor = self._connection.execute("SELECT " + ", ".join(INVENTORY_COLUMNS) + " FROM datasets WHERE partition = ?",
+                                          (os.path.normpath(partition),))
+        return dict((row[0], dict(zip(INVENTORY_COLUMNS, row))) for row in cursor)
+    def Update(self, partition, records):
+        """Update(partition, records)
+            Replaces the stored datasets of a part of the walk with records
+        """
+        partition = os.path.normpath(partition)
+        now = time.time()
+        with self._connection:
+            self._connection.execute("DELETE FROM datasets WHERE partition = ?", (partition,))
+            self._connection.executemany("INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                         [(os.path.normpath(r['path']), partition, r.get('datatype'), r.get('srName'), r.get('wkid'),
+                                           r.get('size'), r.get('mtime'), r.get('error', ''), r.get('scanned') or now) for r in records])
+    def Records(self, folder=None):
+        """Records(folder=None)
+            Stored records, of the datasets below folder when given
+        """
+        sql = "SELECT " + ", ".join(INVENTORY_COLUMNS) + " FROM datasets"
+        args = ()
+        if folder:
+            sql += " WHERE path LIKE ? ESCAPE '!'"
+            args = (_likePrefix(folder),)
+        return [dict(zip(INVENTORY_COLUMNS, row)) for row in self._connection.execute(sql + " ORDER BY path", args)]
+    def Mismatched(self, folder):
+        """Mismatched(folder)
+            (most common spatial reference name, records of the datasets below folder in any other)
+        """
+        records = [r for r in self.Records(folder) if r['srName'] and r['srName'].lower() != 'unknown']
+        counts = {}
+        for record in records: counts[record['srName']] = counts.get(record['srName'], 0) + 1
+        if not counts: return None, []
+        common = max(sorted(counts), key=counts.get)
+        return common, [r for r in records if r['srName'] != common]
+    def Close(self):
+        self._connection.close()
+    #endregion
+
+    #region Helper Methods
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
@@ -0,0 +1,179 @@
+#------------------------------------------------------------------------------
+#----- StageData.py -----------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Stages the kept part of a state folder into the temp workspace
+#             for ParseData, instead of copying everything and deleting most
+#
+#discussion:  Files the keep set would delete and old geodatabases in
+#             archydro are never staged.  Other files are hard linked, or
+#             reflinked where the file system can clone, and copied when
+#             neither works (e.g. the temp workspace is on another volume),
+#             on FileWorkers once the folders for them exist.
+#             Geodatabases are always copied, since arcpy edits them in place
+#             and a link would edit the source.  Staged files must only be
+#             read or removed, never rewritten in place.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import errno
+import shutil
+import threading
+from DeletePlan import listEntries
+#endregion
+
+FICLONE = 0x40049409    # linux ioctl behind cp --reflink
+
+def hardLink(source, destination):
+    if hasattr(os, 'link'):
+        os.link(source, destination)
+    elif sys.platform == 'win32':
+        # python 2 on windows has no os.link
+        import ctypes
+        if not ctypes.windll.kernel32.CreateHardLinkW(unicode(destination), unicode(source), None):
+            raise OSError(ctypes.GetLastError(), 'CreateHardLink failed: ' + destination)
+    else:
+        raise OSError(errno.ENOSYS, 'hard links are not supported')
+
+def reflink(source, destination):
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.ENOSYS, 'reflinks are not supported')
+    with open(source, 'rb') as s:
+        with open(destination, 'wb') as d:
+            try:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            except IOError:
+                raise OSError(sys.exc_info()[1].errno, 'reflink failed: ' + destination)
+
+class StageData(object):
+    #region Constructor
+    def __init__(self, keepSet, workers, useLinks=True, messenger=None):
+        self.Keep = keepSet
+        self.Workers = workers
+        self.Linked = 0
+        self.Reflinked = 0
+        self.Copied = 0
+        self.CopiedBytes = 0
+        self.Geodatabases = 0
+        self.Skipped = 0
+        self.SkippedBytes = 0
+        self._canLink = useLinks
+        self._canReflink = useLinks
+        self._messenger = messenger
+        self._lock = threading.Lock()
+    #endregion
+
+    #region Methods
+    def Stage(self, source, destination):
+        """Stage(source, destination)
+            Materializes the files of source the keep set keeps under destination, which may already exist
+        """
+        files = []
+        gdbs = []
+        folders = []
+        if source.lower().endswith('.gdb'):
+            gdbs.append((source, destination))
+            folders.append(os.path.dirname(destination))
+        else:
+            self._scan(source, destination, files, gdbs, folders)
+
+        self.Workers.MakeDirs(folders)
+        jobs = [(self._copyGdb, s, d) for s, d in gdbs] + [(self._place, s, d) for s, d in files]
+        self.Workers.Map(lambda job: job[0](job[1], job[2]), jobs)
+    def Summary(self):
+        return ('staged ' + str(self.Linked) + ' hard linked, ' + str(self.Reflinked) + ' reflinked and ' +
+                str(self.Copied) + ' copied files (' + str(self.CopiedBytes) + ' bytes copied), ' +
+                str(self.Geodatabases) + ' geodatabases; skipped ' + str(self.Skipped) + ' files and old geodatabases (' +
+                str(self.SkippedBytes) + ' bytes)')
+    #endregion
+
+    #region Helper Methods
+    def _scan(self, top, destination, files, gdbs, targets):
+        level = [(top, destination)]
+        while level:
+            folders = level
+            level = []
+            for (folder, target), entries in zip(folders, self.Workers.List([f for f, t in folders])):
+                self._stageFolder(top, folder, target, entries, files, gdbs, targets, level)
+    def _stageFolder(self, top, folder, target, entries, files, gdbs, targets, subfolders):
+        kept = 0
+        skipped = 0
+        skippedGdbs = 0
+        for name, path, isDir, size in entries:
+            if not isDir:
+                if self.Keep.DeletesFile(folder, name):
+                    skipped += 1
+                    self.SkippedBytes += size
+                else:
+                    files.append((path, os.path.join(target, name)))
+                    kept += 1
+            elif not name.lower().endswith('.gdb'):
+                subfolders.append((path, os.path.join(target, name)))
+                kept += 1
+            elif os.path.basename(folder) == "archydro" and not name.lower() == "global.gdb": # old global.gdbs
+                skippedGdbs += 1
+                self.SkippedBytes += sum(s for n, p, d, s in listEntries(path))
+            else:
+                gdbs.append((path, os.path.join(target, name)))
+                kept += 1
+        self.Skipped += skipped + skippedGdbs
+        # a folder __deleteFiles__ would have emptied and removed is not created at all
+        if kept or not skipped or folder == top: targets.append(target)
+    def _copyGdb(self, source, destination):
+        if os.path.isdir(destination): shutil.rmtree(destination)
+        shutil.copytree(source, destination, ignore=lambda folder, names: [n for n in names if n.endswith('.mdb') or n.endswith('.zip')])
+        with self._lock:
+            self.Geodatabases += 1
+    def _place(self, source, destination):
+        if os.path.exists(destination): os.remove(destination)
+        if self._canLink:
+            try:
+                hardLink(source, destination)
+                with self._lock:
+                    self.Linked += 1
+                return
+            except OSError:
+                self._noLink(sys.exc_info()[1])
+        if self._canReflink:
+            try:
+                reflink(source, destination)
+                with self._lock:
+                    self.Reflinked += 1
+                return
+            except OSError:
+                if os.path.exists(destination): os.remove(destination)
+                self._noReflink(sys.exc_info()[1])
+        shutil.copy2(source, destination)
+        with self._lock:
+            self.Copied += 1
+            self.CopiedBytes += os.path.getsize(destination)
+    def _noLink(self, error):
+        # a link that fails once (e.g. across volumes) fails for every file
+        with self._lock:
+            if not self._canLink: return
+            self._canLink = False
+        self._sm('not using hard links for staging: ' + str(error))
+    def _noReflink(self, error):
+        with self._lock:
+            if not self._canReflink: return
+            self._canReflink = False
+        self._sm('not using reflinks for staging: ' + str(error))
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
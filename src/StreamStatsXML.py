@@ -0,0 +1,195 @@
+#------------------------------------------------------------------------------
+#----- StreamStatsXML.py ------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Thins a StreamStats XML, rewrites its projection path and
+#             collects the layers it needs, in a single parse and write
+#
+#discussion:  Thinning keeps only the children of the first StreamStatsConfig
+#             (or StreamStatsConfig<region>), ProgParams and ApFunctions
+#             elements and of the first two ApFunction elements that are named
+#             in necessaryXMLNodes, and always drops 'Flows'.  Every decision is
+#             made on the start tag, so a removed subtree is never built.
+#             XMLs larger than streamXMLAboveMB are written out element by
+#             element as they are parsed, keeping memory bounded; smaller
+#             ones are kept as a tree and written at the end.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+#endregion
+
+MB = 1024 * 1024
+
+class StreamStatsXML(object):
+    #region Constructor
+    def __init__(self, regionID, necessaryNodes, streamAboveMB=0, messenger=None):
+        self.RegionID = regionID
+        self.Keep = frozenset(necessaryNodes)
+        self.StreamAboveBytes = streamAboveMB * MB
+        self.WshLayers = []
+        self.DelinLayers = []
+        self.Removed = 0
+        self.Streamed = False
+        self._messenger = messenger
+        # (element names, index) of the elements whose children are thinned, in the order __thinXML__ applied them
+        self._rules = [(('StreamStatsConfig', 'StreamStatsConfig' + regionID.upper()), 0), (('ProgParams',), 0),
+                       (('ApFunctions',), 0), (('ApFunction',), 0), (('ApFunction',), 1)]
+    #endregion
+
+    #region Methods
+    def Process(self, xmlPath):
+        """Process(xmlPath)
+            Rewrites xmlPath in place and returns the (lower case) basin characteristic and delineation layer names
+        """
+        self.Streamed = self.StreamAboveBytes > 0 and os.path.getsize(xmlPath) > self.StreamAboveBytes
+        tmpPath = xmlPath + '.tmp'
+        with open(xmlPath, 'rb') as source:
+            with open(tmpPath, 'wb') as out:
+                writer = _StreamWriter(out) if self.Streamed else None
+                root = self._walk(source, writer)
+                if writer == None: ET.ElementTree(root).write(out)
+        os.remove(xmlPath)
+        os.rename(tmpPath, xmlPath)
+        self._sm('processed ' + os.path.basename(xmlPath) + (' (streamed)' if self.Streamed else '') + ': ' +
+                 str(self.Removed) + ' nodes removed, ' + str(len(self.WshLayers)) + ' wsh and ' +
+                 str(len(self.DelinLayers)) + ' delin layers')
+        return self.WshLayers + self.DelinLayers
+    #endregion
+
+    #region Helper Methods
+    def _walk(self, source, writer):
+        stack = []      # [element, thinned, opened] for each kept element still open
+        seen = {}       # kept elements seen so far, per rule
+        skip = 0        # depth inside a removed subtree
+        removed = None  # [removed element, element before it, parent], until the removed element's tail is known
+        root = None
+        for event, elem in ET.iterparse(source, events=('start', 'end')):
+            if skip:
+                if event == 'start':
+                    skip += 1
+                else:
+                    skip -= 1
+                    del elem[:]
+                    if not skip: removed[0] = elem
+                continue
+            if removed != None:
+                self._closeGap(*removed)
+                removed = None
+
+            if event == 'start':
+                if root == None: root = elem
+                parent = stack[-1] if stack else None
+                if parent != None and parent[1] and self._remove(elem):
+                    self._sm('Remove child: ' + elem.tag)
+                    self.Removed += 1
+                    if writer != None: before = writer.Pending
+                    else:
+                        # the parser runs ahead of the events, so elem need not be the last child yet
+                        i = list(parent[0]).index(elem)
+                        before = parent[0][i - 1] if i > 0 else None
+                    parent[0].remove(elem)
+                    removed = [elem, before, parent[0]]
+                    skip = 1
+                    continue
+                thinned = self._isThinned(elem, seen)
+                self._replaceProjection(elem)
+                self._collectLayer(elem, stack)
+                if writer != None and parent != None: writer.Open(parent)
+                stack.append([elem, thinned, False])
+            else:
+                entry = stack.pop()
+                if writer != None:
+                    writer.Close(entry)
+                    if stack: stack[-1][0].remove(elem)
+
+        for tags, index in self._rules:
+            if seen.get(tags, 0) <= index:
+                self._sm('no ' + ' or '.join(tags) + ' element ' + str(index) + ' to thin', 'WARNING')
+        return root
+    def _isThinned(self, elem, seen):
+        thinned = False
+        for tags in set(tags for tags, index in self._rules):
+            if elem.tag not in tags: continue
+            count = seen.get(tags, 0)
+            thinned = thinned or (tags, count) in self._rules
+            seen[tags] = count + 1
+        return thinned
+    def _closeGap(self, removed, before, parent):
+        # as with minidom's removeChild of the node and its previousSibling, the whitespace before a removed element goes with it
+        tail = removed.tail
+        if tail and not tail.strip(): tail = tail[tail.rfind('\n'):]    # comments dropped by the parser leave blank lines
+        if before != None: before.tail = tail
+        else: parent.text = tail
+    def _remove(self, elem):
+        return elem.get('TagName') == 'Flows' or (elem.tag not in self.Keep and elem.get('Name') not in self.Keep)
+    def _replaceProjection(self, elem):
+        params = elem.get('AdditionalParams')
+        if not params or 'PROJECTIONFILENAME' not in params or 'schemas' not in params: return
+        start_sect = params.split('PROJECTIONFILENAME')[0]
+        end_sect = params.split('PROJECTIONFILENAME')[1].split('schemas')[1]
+        self._sm('before: ' + params)
+        elem.set('AdditionalParams', start_sect + 'PROJECTIONFILENAME=e:\\projections' + end_sect)
+        self._sm('after: ' + elem.get('AdditionalParams'))
+    def _collectLayer(self, elem, stack):
+        # .//ApFunction[@TagName='WshParams']/ApFields/ApField/ApLayers/ApLayer
+        # .//ApFunction[@TagName='GlobalPointDelineation']/ApLayers/ApLayer
+        if elem.tag != 'ApLayer': return
+        path = [e[0] for e in stack]
+        if (len(path) >= 5 and [e.tag for e in path[-4:]] == ['ApFunction', 'ApFields', 'ApField', 'ApLayers']
+                and path[-4].get('TagName') == 'WshParams'):
+            layers = self.WshLayers
+        elif (len(path) >= 3 and [e.tag for e in path[-2:]] == ['ApFunction', 'ApLayers']
+                and path[-2].get('TagName') == 'GlobalPointDelineation'):
+            layers = self.DelinLayers
+        else:
+            return
+        for name in (elem.get('AliasName'), elem.get('Name')):
+            if name and name.lower() not in layers: layers.append(name.lower())
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
+
+class _StreamWriter(object):
+    # Writes kept elements as they are parsed, the same way ElementTree.write would.
+    # An element's tail is only known once the parser reaches the next tag, so it is written on the next event.
+    def __init__(self, out):
+        self.Pending = None
+        self._out = out
+    def Flush(self):
+        if self.Pending != None and self.Pending.tail: self._write(escape(self.Pending.tail))
+        self.Pending = None
+    def Open(self, entry):
+        self.Flush()
+        if entry[2]: return
+        elem = entry[0]
+        self._write('<' + elem.tag + self._attributes(elem) + '>' + escape(elem.text or ''))
+        entry[2] = True
+    def Close(self, entry):
+        self.Flush()
+        elem = entry[0]
+        if entry[2]:
+            self._write('</' + elem.tag + '>')
+        elif elem.text:
+            self._write('<' + elem.tag + self._attributes(elem) + '>' + escape(elem.text) + '</' + elem.tag + '>')
+        else:
+            self._write('<' + elem.tag + self._attributes(elem) + ' />')
+        self.Pending = elem
+    def _attributes(self, elem):
+        return ''.join(' ' + k + '="' + escape(v, {'"': '&quot;', '\n': '&#10;'}) + '"' for k, v in elem.items())
+    def _write(self, text):
+        self._out.write(text.encode('ascii', 'xmlcharrefreplace'))
@@ -0,0 +1,549 @@
+#------------------------------------------------------------------------------
+#----- TransferAgent.py -------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  In-process S3 transfers for UpdateS3 and PullFromS3, replacing
+#             the per-call 'aws s3' subprocesses
+#
+#discussion:  The agent talks to a pluggable backend.  S3Backend holds one
+#             boto3 client (and its pooled http connections) for the whole
+#             run, LocalBackend mimics a bucket on the local file system so
+#             the tools can be exercised without AWS.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import math
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from multiprocessing.pool import ThreadPool
+from TransferJournal import TransferJournal
+from RemoteInventory import RemoteInventory
+#endregion
+
+MB = 1024 * 1024
+
+def parseS3Url(url):
+    """parseS3Url(url)
+        Splits 's3://bucket/some/key' into ('bucket', 'some/key')
+    """
+    path = url[len('s3://'):] if url.startswith('s3://') else url
+    parts = path.split('/', 1)
+    return parts[0], parts[1] if len(parts) > 1 else ''
+
+def fileMD5(path, blockSize=8 * 1024 * 1024):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        block = f.read(blockSize)
+        while block:
+            md5.update(block)
+            block = f.read(blockSize)
+    return md5.hexdigest()
+
+def fileHashes(path, partSize):
+    """fileHashes(path, partSize)
+        Reads the file once and returns its md5 and the etag s3 gives it when uploaded in parts of partSize
+    """
+    whole = hashlib.md5()
+    parts = []
+    with open(path, 'rb') as f:
+        block = f.read(partSize)
+        while block:
+            whole.update(block)
+            parts.append(hashlib.md5(block).digest())
+            block = f.read(partSize)
+    if len(parts) < 2: return whole.hexdigest(), whole.hexdigest()
+    return whole.hexdigest(), hashlib.md5(b''.join(parts)).hexdigest() + '-' + str(len(parts))
+
+def createTransferAgent(settings, accessKeyID=None, accessKey=None, messenger=None, journalPath=None):
+    """createTransferAgent(settings, accessKeyID=None, accessKey=None, messenger=None, journalPath=None)
+        Builds the backend named in the 'transfer' section of config.json and wraps it in an agent.
+        With a journalPath every finished object is recorded there, and an existing journal is resumed
+    """
+    name = settings.get('backend', 's3')
+    partSize = int(settings.get('partSizeMB', 8) * MB)
+    if name == 'local':
+        if not settings.get('localRoot'):
+            raise Exception('A localRoot folder is required for the local transfer backend.')
+        backend = LocalBackend(settings['localRoot'])
+    elif name == 's3':
+        if partSize < 5 * MB:
+            raise Exception('partSizeMB must be at least 5 for s3 multipart uploads.')
+        backend = S3Backend(accessKeyID, accessKey, settings.get('maxPoolConnections', 10))
+    else:
+        raise Exception('Unknown transfer backend: ' + str(name))
+
+    inventory = None
+    if int(settings.get('inventoryDepth', 0)) > 0:
+        inventory = RemoteInventory(backend, int(settings['inventoryDepth']), settings.get('inventoryCache'),
+                                    float(settings.get('inventoryTTLMinutes', 0)) * 60, messenger)
+    return TransferAgent(backend, messenger, partSize,
+                         fileWorkers=int(settings.get('fileWorkers', 1)),
+                         partWorkers=int(settings.get('partWorkers', 1)),
+                         partRetries=int(settings.get('partRetries', 3)),
+                         journal=TransferJournal(journalPath, int(settings.get('journalSyncEvery', 100))) if journalPath else None,
+                         inventory=inventory)
+
+##-------1---------2---------3---------4---------5---------6---------7---------8
+##       Backends
+##-------+---------+---------+---------+---------+---------+---------+---------+
+
+class S3Backend(object):
+    #region Constructor
+    def __init__(self, accessKeyID=None, accessKey=None, maxPoolConnections=10):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise Exception('boto3 is not installed.  Please install boto3 into the ArcGIS python environment.')
+
+        session = boto3.session.Session(aws_access_key_id=accessKeyID, aws_secret_access_key=accessKey)
+        self._client = session.client('s3', config=Config(max_pool_connections=maxPoolConnections,
+                                                          retries={'max_attempts': 5}))
+    #endregion
+
+    #region Methods
+    def List(self, bucket, prefix):
+        paginator = self._client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for item in page.get('Contents', []):
+                yield {'key': item['Key'], 'size': item['Size'], 'etag': item['ETag'].strip('"')}
+    def PutFile(self, localPath, bucket, key):
+        with open(localPath, 'rb') as f:
+            return self._client.put_object(Bucket=bucket, Key=key, Body=f)['ETag'].strip('"')
+    def GetFile(self, bucket, key, localPath):
+        self._client.download_file(bucket, key, localPath)
+    def Delete(self, bucket, keys):
+        keys = list(keys)
+        for i in range(0, len(keys), 1000):
+            objects = [{'Key': k} for k in keys[i:i + 1000]]
+            self._client.delete_objects(Bucket=bucket, Delete={'Objects': objects, 'Quiet': True})
+    def CreateMultipartUpload(self, bucket, key):
+        return self._client.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+    def UploadPart(self, bucket, key, uploadID, partNumber, data):
+        response = self._client.upload_part(Bucket=bucket, Key=key, UploadId=uploadID, PartNumber=partNumber, Body=data)
+        return response['ETag'].strip('"')
+    def CompleteMultipartUpload(self, bucket, key, uploadID, parts):
+        response = self._client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=uploadID,
+            MultipartUpload={'Parts': [{'PartNumber': n, 'ETag': '"' + etag + '"'} for n, etag in parts]})
+        return response['ETag'].strip('"')
+    def AbortMultipartUpload(self, bucket, key, uploadID):
+        self._client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=uploadID)
+    #endregion
+
+class LocalBackend(object):
+    # multipart parts and etags of multipart objects live under folders that
+    # cannot collide with a bucket name, since bucket names never start with '.'
+    #region Constructor
+    def __init__(self, root):
+        self._root = root
+        if not os.path.exists(self._root):
+            os.makedirs(self._root)
+    #endregion
+
+    #region Methods
+    def List(self, bucket, prefix):
+        bucketDir = os.path.join(self._root, bucket)
+        # only walk the deepest folder fully named by the prefix
+        start = os.path.join(bucketDir, *prefix.split('/')[:-1])
+        if not os.path.isdir(start): return
+        for root, dirs, files in os.walk(start):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                key = os.path.relpath(path, bucketDir).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    yield {'key': key, 'size': os.path.getsize(path), 'etag': self._etag(bucket, key, path)}
+    def PutFile(self, localPath, bucket, key):
+        path = self._path(bucket, key)
+        self._makedirs(os.path.dirname(path))
+        shutil.copyfile(localPath, path)
+        self._setEtag(bucket, key, None)
+        return fileMD5(path)
+    def GetFile(self, bucket, key, localPath):
+        path = self._path(bucket, key)
+        if not os.path.isfile(path):
+            raise Exception('Object not found: s3://' + bucket + '/' + key)
+        shutil.copyfile(path, localPath)
+    def Delete(self, bucket, keys):
+        bucketDir = os.path.join(self._root, bucket)
+        for key in keys:
+            path = self._path(bucket, key)
+            if os.path.isfile(path): os.remove(path)
+            self._setEtag(bucket, key, None)
+            # prune folders left empty, the way a prefix disappears in s3
+            folder = os.path.dirname(path)
+            while folder != bucketDir and os.path.isdir(folder) and not os.listdir(folder):
+                os.rmdir(folder)
+                folder = os.path.dirname(folder)
+    def CreateMultipartUpload(self, bucket, key):
+        uploadID = uuid.uuid4().hex
+        self._makedirs(os.path.join(self._root, '.multipart', uploadID))
+        return uploadID
+    def UploadPart(self, bucket, key, uploadID, partNumber, data):
+        folder = os.path.join(self._root, '.multipart', uploadID)
+        if not os.path.isdir(folder):
+            raise Exception('NoSuchUpload: ' + uploadID)
+        with open(os.path.join(folder, '%05d' % partNumber), 'wb') as f:
+            f.write(data)
+        return hashlib.md5(data).hexdigest()
+    def CompleteMultipartUpload(self, bucket, key, uploadID, parts):
+        folder = os.path.join(self._root, '.multipart', uploadID)
+        path = self._path(bucket, key)
+        self._makedirs(os.path.dirname(path))
+        digests = []
+        with open(path, 'wb') as out:
+            for partNumber, etag in sorted(parts):
+                with open(os.path.join(folder, '%05d' % partNumber), 'rb') as f:
+                    data = f.read()
+                digests.append(hashlib.md5(data).digest())
+                out.write(data)
+        etag = hashlib.md5(b''.join(digests)).hexdigest() + '-' + str(len(digests))
+        self._setEtag(bucket, key, etag)
+        shutil.rmtree(folder, True)
+        return etag
+    def AbortMultipartUpload(self, bucket, key, uploadID):
+        shutil.rmtree(os.path.join(self._root, '.multipart', uploadID), True)
+    #endregion
+
+    #region Helper Methods
+    def _path(self, bucket, key):
+        return os.path.join(self._root, bucket, *key.split('/'))
+    def _etag(self, bucket, key, path):
+        etagPath = os.path.join(self._root, '.etags', bucket, *key.split('/'))
+        if os.path.isfile(etagPath):
+            with open(etagPath) as f:
+                return f.read()
+        return fileMD5(path)
+    def _setEtag(self, bucket, key, etag):
+        etagPath = os.path.join(self._root, '.etags', bucket, *key.split('/'))
+        if etag == None:
+            if os.path.isfile(etagPath): os.remove(etagPath)
+            return
+        self._makedirs(os.path.dirname(etagPath))
+        with open(etagPath, 'w') as f:
+            f.write(etag)
+    def _makedirs(self, folder):
+        try:
+            os.makedirs(folder)
+        except OSError:
+            if not os.path.isdir(folder): raise
+    #endregion
+
+##-------1---------2---------3---------4---------5---------6---------7---------8
+##       TransferAgent
+##-------+---------+---------+---------+---------+---------+---------+---------+
+
+class TransferAgent(object):
+    #region Constructor
+    def __init__(self, backend, messenger=None, partSize=8 * MB, fileWorkers=1, partWorkers=1, partRetries=3, journal=None, inventory=None):
+        self.Backend = backend
+        self.Journal = journal
+        self.Inventory = inventory
+        self.PartSize = partSize
+        self.FileWorkers = max(1, fileWorkers)
+        self.PartWorkers = max(1, partWorkers)
+        self.PartRetries = max(0, partRetries)
+        self.BytesTransferred = 0
+        self.FilesTransferred = 0
+        self.PartsRetried = 0
+        self.FilesResumed = 0
+        self.TransferSeconds = 0.0
+        self._messenger = messenger
+        self._lock = threading.Lock()
+    #endregion
+
+    #region Methods
+    def Exists(self, url):
+        # same prefix semantics as 'aws s3 ls <url>'
+        bucket, key = parseS3Url(url)
+        for item in self._list(bucket, key):
+            return True
+        return False
+    def List(self, url):
+        bucket, key = parseS3Url(url)
+        return list(self._list(bucket, key))
+    def Copy(self, source, destination, recursive=False):
+        """Copy(source, destination, recursive=False)
+            Mirrors 'aws s3 cp', one side must be an s3:// url and the other a local path.
+            Returns the number of bytes copied
+        """
+        startTime = time.time()
+        try:
+            if destination.startswith('s3://'):
+                if recursive: return self._uploadFolder(source, destination)
+                return self._uploadFile(source, destination)
+            if source.startswith('s3://'):
+                if recursive: return self._downloadFolder(source, destination)
+                return self._downloadFile(source, destination)
+            raise Exception('Either source or destination must be an s3:// url')
+        finally:
+            if self.Journal != None: self.Journal.Sync()
+            self._elapsed(startTime)
+    def Remove(self, url, recursive=False):
+        bucket, key = parseS3Url(url)
+        if recursive:
+            keys = [item['key'] for item in self._list(bucket, self._folderKey(key))]
+        else:
+            keys = [key]
+        if keys:
+            self._delete(bucket, keys)
+            self._sm('removed ' + str(len(keys)) + ' objects from ' + url)
+        return len(keys)
+    def Sync(self, source, destination, manifestPath=None):
+        """Sync(source, destination, manifestPath=None)
+            Uploads only the files under source that are new or changed compared to the remote listing,
+            then deletes only the remote objects that no longer exist locally.  Nothing is removed before
+            the uploads finish.  Hashes are reused from manifestPath for files whose size and mtime are
+            unchanged, and the refreshed manifest is written back.  Returns the number of bytes uploaded
+        """
+        startTime = time.time()
+        bucket, prefix = parseS3Url(destination)
+        isFolder = os.path.isdir(source)
+        if isFolder:
+            prefix = self._folderKey(prefix)
+            files = self._localFiles(source)
+        else:
+            if prefix == '' or prefix.endswith('/'): prefix += os.path.basename(source)
+            files = {'': source}
+
+        cache = self._loadManifest(manifestPath)
+        remote = dict((item['key'][len(prefix):], item) for item in self._list(bucket, prefix))
+        manifest = {}
+        uploads = []
+        for rel in sorted(files):
+            manifest[rel] = self._manifestEntry(files[rel], cache.get(rel))
+            if not self._isCurrent(files[rel], manifest[rel], remote.get(rel)):
+                uploads.append(rel)
+
+        size = self._putMany([(files[rel], bucket, prefix + rel) for rel in uploads])
+
+        removed = []
+        if isFolder:
+            removed = [prefix + rel for rel in sorted(remote) if rel not in files and not rel.endswith('/')]
+            if removed: self._delete(bucket, removed)
+
+        self._saveManifest(manifestPath, manifest)
+        self._sm('synced ' + source + ' to ' + destination + ': ' + str(len(uploads)) + ' uploaded, ' +
+                 str(len(files) - len(uploads)) + ' unchanged, ' + str(len(removed)) + ' deleted')
+        if self.Journal != None: self.Journal.Sync()
+        self._elapsed(startTime)
+        return size
+    def Report(self):
+        """Report()
+            Summary of the bytes moved and the throughput over the time spent in Copy and Sync
+        """
+        mb = self.BytesTransferred / float(MB)
+        rate = mb / self.TransferSeconds if self.TransferSeconds > 0 else 0
+        return ('Transferred ' + str(round(mb, 1)) + ' MB in ' + str(self.FilesTransferred) + ' files in ' +
+                str(round(self.TransferSeconds, 1)) + ' s (' + str(round(rate, 2)) + ' MB/s, ' +
+                str(self.PartsRetried) + ' parts retried, ' + str(self.FilesResumed) + ' files skipped from journal)')
+    def Close(self):
+        if self.Journal != None: self.Journal.Close()
+        if self.Inventory != None: self.Inventory.Save()
+    def WasStarted(self, url):
+        """WasStarted(url)
+            True if a journal being resumed already uploaded objects under url
+        """
+        if self.Journal == None or not self.Journal.Resumed: return False
+        bucket, key = parseS3Url(url)
+        return self.Journal.HasEntries(bucket + '/' + key)
+    #endregion
+
+    #region Helper Methods
+    def _uploadFolder(self, folder, url):
+        bucket, prefix = parseS3Url(url)
+        prefix = self._folderKey(prefix)
+        files = self._localFiles(folder)
+        return self._putMany([(files[rel], bucket, prefix + rel) for rel in sorted(files)])
+    def _uploadFile(self, path, url):
+        bucket, key = parseS3Url(url)
+        if key == '' or key.endswith('/'): key += os.path.basename(path)
+        return self._put(path, bucket, key)
+    def _downloadFolder(self, url, folder):
+        bucket, prefix = parseS3Url(url)
+        prefix = self._folderKey(prefix)
+        size = 0
+        for item in list(self._list(bucket, prefix)):
+            if item['key'].endswith('/'): continue # folder placeholder objects
+            path = os.path.join(folder, *item['key'][len(prefix):].split('/'))
+            size += self._get(bucket, item['key'], path, item['size'])
+        return size
+    def _downloadFile(self, url, path):
+        bucket, key = parseS3Url(url)
+        if os.path.isdir(path): path = os.path.join(path, key.split('/')[-1])
+        return self._get(bucket, key, path)
+    def _localFiles(self, folder):
+        files = {}
+        for root, dirs, names in os.walk(folder):
+            for name in names:
+                # lock files are held open by arcgis, the cli skipped them as well
+                if name.lower().endswith('.lock'): continue
+                path = os.path.join(root, name)
+                files[os.path.relpath(path, folder).replace(os.sep, '/')] = path
+        return files
+    def _manifestEntry(self, path, cached):
+        stat = os.stat(path)
+        if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime and cached['partSize'] == self.PartSize:
+            return cached
+        md5, etag = fileHashes(path, self.PartSize)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'md5': md5, 'etag': etag, 'partSize': self.PartSize}
+    def _isCurrent(self, path, entry, remote):
+        if remote == None or remote['size'] != entry['size']: return False
+        etag = remote['etag']
+        if etag in (entry['md5'], entry['etag']): return True
+        if '-' not in etag: return False
+        # uploaded with another part size, s3 part sizes are whole MB so it can be recovered from the part count
+        parts = int(etag.split('-')[1])
+        partSize = int(math.ceil(entry['size'] / float(parts) / MB)) * MB
+        if partSize == self.PartSize or partSize == 0: return False
+        return fileHashes(path, partSize)[1] == etag
+    def _loadManifest(self, manifestPath):
+        if not manifestPath or not os.path.isfile(manifestPath): return {}
+        try:
+            with open(manifestPath) as f:
+                return json.load(f)['files']
+        except (ValueError, KeyError):
+            return {}
+    def _saveManifest(self, manifestPath, manifest):
+        if not manifestPath: return
+        folder = os.path.dirname(manifestPath)
+        if folder and not os.path.isdir(folder): os.makedirs(folder)
+        with open(manifestPath, 'w') as f:
+            json.dump({'partSize': self.PartSize, 'files': manifest}, f, indent=1, sort_keys=True)
+    def _putMany(self, items):
+        # items are (path, bucket, key), uploaded fileWorkers at a time
+        if self.FileWorkers < 2 or len(items) < 2:
+            return sum(self._put(*item) for item in items)
+        pool = ThreadPool(min(self.FileWorkers, len(items)))
+        try:
+            return sum(pool.map(lambda item: self._put(*item), items))
+        finally:
+            pool.close()
+            pool.join()
+    def _put(self, path, bucket, key):
+        stat = os.stat(path)
+        journalKey = bucket + '/' + key
+        if self.Journal != None and self.Journal.IsComplete('upload', journalKey, stat.st_size, stat.st_mtime):
+            with self._lock:
+                self.FilesResumed += 1
+            return 0
+        if stat.st_size > self.PartSize:
+            etag = self._putMultipart(path, bucket, key, stat)
+        else:
+            etag = self.Backend.PutFile(path, bucket, key)
+        if self.Inventory != None: self.Inventory.Record(bucket, key, stat.st_size, etag)
+        if self.Journal != None: self.Journal.Complete('upload', journalKey, stat.st_size, stat.st_mtime)
+        return self._count(stat.st_size)
+    def _putMultipart(self, path, bucket, key, stat):
+        # s3 allows at most 10000 parts, bigger files get bigger (whole MB) parts
+        size = stat.st_size
+        partSize = self.PartSize
+        if size > 10000 * partSize: partSize = int(math.ceil(size / 10000.0 / MB)) * MB
+        partNumbers = list(range(1, int(math.ceil(size / float(partSize))) + 1))
+        journalKey = bucket + '/' + key
+        done = {}
+
+        pending = self.Journal.Multipart(journalKey, size, stat.st_mtime, partSize) if self.Journal != None else None
+        if pending != None:
+            uploadID = pending['uploadID']
+            done = dict((int(n), etag) for n, etag in pending['parts'].items())
+            self._sm('resuming ' + key + ' with ' + str(len(done)) + ' of ' + str(len(partNumbers)) + ' parts uploaded')
+        else:
+            uploadID = self.Backend.CreateMultipartUpload(bucket, key)
+            if self.Journal != None: self.Journal.StartMultipart(journalKey, uploadID, size, stat.st_mtime, partSize)
+
+        def upload(partNumber):
+            if partNumber in done: return partNumber, done[partNumber]
+            etag = self._uploadPart(path, bucket, key, uploadID, partNumber, partSize)
+            if self.Journal != None: self.Journal.PartDone(journalKey, uploadID, partNumber, etag)
+            return partNumber, etag
+
+        try:
+            if self.PartWorkers > 1:
+                pool = ThreadPool(min(self.PartWorkers, len(partNumbers)))
+                try:
+                    parts = pool.map(upload, partNumbers)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                parts = [upload(n) for n in partNumbers]
+            return self.Backend.CompleteMultipartUpload(bucket, key, uploadID, parts)
+        except:
+            if pending != None and 'NoSuchUpload' in str(sys.exc_info()[1]):
+                # the upload expired or was aborted since the journal was written, start over
+                self.Journal.EndMultipart(journalKey)
+                return self._putMultipart(path, bucket, key, stat)
+            # with a journal the uploaded parts are kept so a resumed run can finish the file
+            if self.Journal == None: self.Backend.AbortMultipartUpload(bucket, key, uploadID)
+            raise
+    def _uploadPart(self, path, bucket, key, uploadID, partNumber, partSize):
+        with open(path, 'rb') as f:
+            f.seek((partNumber - 1) * partSize)
+            data = f.read(partSize)
+        attempt = 0
+        while True:
+            try:
+                return self.Backend.UploadPart(bucket, key, uploadID, partNumber, data)
+            except Exception:
+                if 'NoSuchUpload' in str(sys.exc_info()[1]): raise
+                if attempt >= self.PartRetries: raise
+                attempt += 1
+                with self._lock:
+                    self.PartsRetried += 1
+                self._sm('retrying part ' + str(partNumber) + ' of ' + key + ', attempt ' + str(attempt))
+                time.sleep(0.5 * 2 ** attempt)
+    def _get(self, bucket, key, path, size=None):
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            try:
+                os.makedirs(folder)
+            except OSError:
+                if not os.path.isdir(folder): raise
+        journalKey = bucket + '/' + key
+        if (self.Journal != None and size is not None and os.path.isfile(path) and os.path.getsize(path) == size
+                and self.Journal.IsComplete('download', journalKey, size)):
+            with self._lock:
+                self.FilesResumed += 1
+            return 0
+        self.Backend.GetFile(bucket, key, path)
+        size = size if size is not None else os.path.getsize(path)
+        if self.Journal != None: self.Journal.Complete('download', journalKey, size)
+        return self._count(size)
+    def _list(self, bucket, prefix):
+        if self.Inventory != None: return self.Inventory.List(bucket, prefix)
+        return self.Backend.List(bucket, prefix)
+    def _delete(self, bucket, keys):
+        self.Backend.Delete(bucket, keys)
+        if self.Inventory != None: self.Inventory.Forget(bucket, keys)
+    def _count(self, size):
+        with self._lock:
+            self.BytesTransferred += size
+            self.FilesTransferred += 1
+        return size
+    def _elapsed(self, startTime):
+        with self._lock:
+            self.TransferSeconds += time.time() - startTime
+    def _folderKey(self, key):
+        return key if key == '' or key.endswith('/') else key + '/'
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
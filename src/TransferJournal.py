@@ -0,0 +1,128 @@
+#------------------------------------------------------------------------------
+#----- TransferJournal.py -----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Records finished objects and in-flight multipart uploads so an
+#             interrupted UpdateS3 or PullFromS3 run can be resumed
+#
+#discussion:  The journal is an append-only file of json lines, one event per
+#             line, flushed as it is written.  A run that dies mid-write only
+#             loses its last (torn) line, which is ignored on replay.  Events
+#             are fsynced every syncEvery events, when a multipart upload
+#             starts or ends and at every Sync (the end of a Copy or Sync of
+#             the agent), not one by one: a crash of the machine can lose the
+#             last events, whose files are then transferred again.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import json
+import threading
+#endregion
+
+class TransferJournal(object):
+    #region Constructor
+    def __init__(self, path, syncEvery=100):
+        self.Path = path
+        self.SyncEvery = max(1, syncEvery)
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._completed = {}
+        self._multipart = {}
+        self.Resumed = os.path.isfile(path)
+        if self.Resumed: self._replay()
+
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder): os.makedirs(folder)
+        self._file = open(path, 'a')
+    #endregion
+
+    #region Methods
+    def IsComplete(self, direction, key, size, mtime=None):
+        """IsComplete(direction, key, size, mtime=None)
+            True if the object was transferred in this direction with the same size (and local mtime for uploads)
+        """
+        entry = self._completed.get((direction, key))
+        if entry == None or entry['size'] != size: return False
+        return mtime == None or entry['mtime'] == mtime
+    def HasEntries(self, keyPrefix):
+        """HasEntries(keyPrefix)
+            True if anything under keyPrefix was already uploaded, i.e. the destination was already cleared by the earlier run
+        """
+        folder = keyPrefix.rstrip('/') + '/'
+        for direction, key in list(self._completed.keys()) + [('upload', k) for k in self._multipart.keys()]:
+            if direction == 'upload' and (key == keyPrefix or key.startswith(folder)): return True
+        return False
+    def Complete(self, direction, key, size, mtime=None):
+        self._write({'event': 'complete', 'direction': direction, 'key': key, 'size': size, 'mtime': mtime})
+    def Multipart(self, key, size, mtime, partSize):
+        """Multipart(key, size, mtime, partSize)
+            Returns the unfinished multipart upload of the same file, as {'uploadID', 'partSize', 'parts': {partNumber: etag}}, or None
+        """
+        entry = self._multipart.get(key)
+        if entry == None or entry['size'] != size or entry['mtime'] != mtime or entry['partSize'] != partSize: return None
+        return entry
+    def StartMultipart(self, key, uploadID, size, mtime, partSize):
+        self._write({'event': 'multipart', 'key': key, 'uploadID': uploadID, 'size': size, 'mtime': mtime, 'partSize': partSize}, True)
+    def PartDone(self, key, uploadID, partNumber, etag):
+        self._write({'event': 'part', 'key': key, 'uploadID': uploadID, 'partNumber': partNumber, 'etag': etag})
+    def EndMultipart(self, key):
+        self._write({'event': 'endmultipart', 'key': key}, True)
+    def Sync(self):
+        """Sync()
+            Writes the events since the last fsync to disk
+        """
+        with self._lock:
+            if self._unsynced and not self._file.closed: self._fsync()
+    def Close(self):
+        with self._lock:
+            if not self._file.closed:
+                if self._unsynced: self._fsync()
+                self._file.close()
+    #endregion
+
+    #region Helper Methods
+    def _write(self, event, sync=False):
+        with self._lock:
+            self._apply(event)
+            self._file.write(json.dumps(event) + '\n')
+            self._file.flush()
+            self._unsynced += 1
+            if sync or self._unsynced >= self.SyncEvery: self._fsync()
+    def _fsync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+    def _replay(self):
+        with open(self.Path) as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except ValueError:
+                    continue
+    def _apply(self, event):
+        name = event['event']
+        if name == 'complete':
+            self._completed[(event['direction'], event['key'])] = event
+            self._multipart.pop(event['key'], None)
+        elif name == 'multipart':
+            self._multipart[event['key']] = {'uploadID': event['uploadID'], 'size': event['size'], 'mtime': event['mtime'],
+                                             'partSize': event['partSize'], 'parts': {}}
+        elif name == 'part':
+            entry = self._multipart.get(event['key'])
+            if entry != None and entry['uploadID'] == event['uploadID']:
+                entry['parts'][event['partNumber']] = event['etag']
+        elif name == 'endmultipart':
+            self._multipart.pop(event['key'], None)
+    #endregion
@@ -28,8 +28,9 @@ import shutil
 import sys
 import argparse
 
-import sys, os, subprocess, fnmatch, traceback
+import sys, os, fnmatch, traceback
 from ParseData import Main as ParseData
+from TransferAgent import createTransferAgent
 import datetime, arcpy, json, logging
 import time
 import json
@@ -38,9 +39,10 @@ import secrets
 class Main(object):
 
     #region Constructor
-    def __init__(self, parameters):
+    def __init__(self, parameters, options=None):
         self.isComplete = False
         self.Message = ""
+        self.__options__ = options if options else {}
         workspace = parameters[2].valueAsText if type(parameters[2]).__name__ == 'geoprocessing parameter object' else parameters[2]
 
         self.__TempLocation__ = os.path.join(workspace, "Temp" + time.strftime('%Y%m%d%H%M%S'))
@@ -78,24 +80,25 @@ class Main(object):
         arcpy.env.overwriteOutput = True
 
 
+        with open(os.path.join(os.path.dirname( __file__ ), 'config.json')) as c:
+            config = json.load(c)
+            self.version = config[0]["version"]
+            self.states = config[0]["regions"]
+            self.transferSettings = dict(config[0].get("transfer", {}))
+            self.transferSettings.update(self.__options__)
+
         #start main program
         try:
-            self.__configureAWSKeyID__(secrets.accessKeyID)
-            self.__configureAWSKey__(secrets.accessKey)
+            self.__configureTransfer__(self.transferSettings, secrets.accessKeyID, secrets.accessKey)
             user_name = editorName
 
-        except ImportError:
+        except (ImportError, AttributeError):
             self.__sm__("Error using aws credentials", 'ERROR')
             arcpy.AddError('Error using aws credentials')
             sys.exit()
 
         destinationBucket = 's3://streamstats-staged-data/test-data'
 
-        with open(os.path.join(os.path.dirname( __file__ ), 'config.json')) as c:
-            config = json.load(c)
-            self.version = config[0]["version"]
-            self.states = config[0]["regions"]
-
         commands = []
         try:
             if (copy_archydro == 'true' or copy_bc_layers == 'true' or copy_global == 'true' or huc_folders) and not state_folder:
@@ -116,7 +119,7 @@ class Main(object):
                     self.__printXMLError__(filename, '{region abbrevation}')
                 checkXML = self.__validateStreamStatsXML__(xml_file)
                 if checkXML:
-                    parse = ParseData(state_folder, state, tempLocation, xml_file, copy_archydro, copy_bc_layers, huc_folders, copy_global, 'upload')
+                    parse = ParseData(state_folder, state, tempLocation, xml_file, copy_archydro, copy_bc_layers, huc_folders, copy_global, 'upload', self.__options__.get('dryRun', False))
                     parse_file = parse.__xmlPath__
                     commands.append('xml')
                     if arcpy.Exists(parse_file):
@@ -139,9 +142,12 @@ class Main(object):
                 self.__sm__('Processing: ' + state)
                 arcpy.AddMessage('Processing: ' + state)
                 if not parse_file:
-                    parse = ParseData(state_folder, state, tempLocation, xml_file, copy_archydro, copy_bc_layers, huc_folders, copy_global, 'upload')
+                    parse = ParseData(state_folder, state, tempLocation, xml_file, copy_archydro, copy_bc_layers, huc_folders, copy_global, 'upload', self.__options__.get('dryRun', False))
                 state_folder = parse.__stateFolder__
                 self.__sm__("new state folder: " + state_folder)
+                if parse.ProjectionWarnings:
+                    # from the projectionChecker inventory, before anything is uploaded
+                    self.__sm__(str(len(parse.ProjectionWarnings)) + ' datasets with a mismatched projection: ' + '; '.join(parse.ProjectionWarnings), 'WARNING')
                     
                 if copy_archydro == 'true' and self.__validateStreamStatsDataFolder__(state_folder, 'archydro'):
                     commands.append('archydro')
@@ -173,8 +179,17 @@ class Main(object):
 
             seperator = ','
             commands = seperator.join(commands)
-                
-            self.__logData__(destinationBucket, tempLocation, state, commands, user_name, logNote)
+
+            if self.__options__.get('dryRun'):
+                # nothing was uploaded, so nothing is added to the region's log in S3
+                self.__sm__('Dry run, not logging. Items that would be copied: ' + commands)
+            else:
+                self.__logData__(destinationBucket, tempLocation, state, commands, user_name, logNote)
+
+            report = self.__transfer__.Report()
+            print(report)
+            self.__sm__(report)
+            arcpy.AddMessage(report)
 
             self.isComplete = True
             self.__sm__('Finished \n')
@@ -188,46 +203,26 @@ class Main(object):
             self.isComplete = False
 
         finally:
+            self.__transfer__.Close()
             arcpy.ResetEnvironments()
 
-    def __configureAWSKeyID__(self, AWSKeyID):
-        """configureAWSKeyID(AWSKeyID=None)
-            Function to configure AWS Access Key ID
+    def __configureTransfer__(self, settings, AWSKeyID, AWSAccessKey):
+        """configureTransfer(settings=None, AWSKeyID=None, AWSAccessKey=None)
+            Function to create the S3 transfer agent shared by every copy in this run
         """
-        #create AWS CLI command
-        cmd="aws configure set aws_access_key_id " + AWSKeyID
-
-        try:
-            output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-        except subprocess.CalledProcessError as e:
-            arcpy.addError('Configure not successful.  Please make sure you have installed the AWS CLI.')
-            self.__sm__(e.output, 'ERROR')
-            arcpy.AddError(e.output)
-            tb = traceback.format_exc()
-            self.__sm__(tb, 'ERROR')
-            arcpy.AddError(tb)
-            sys.exit()
-        else:
-            self.__sm__('Finished configuring AWS Key ID') 
-    def __configureAWSKey__(self, AWSAccessKey):
-        """configureAWSKey(AWSAccessKey=None)
-            Function to configure AWS CLI Access Key
-        """
-        #create AWS CLI command
-        cmd="aws configure set aws_secret_access_key " + AWSAccessKey
-
         try:
-            output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-        except subprocess.CalledProcessError as e:
-            arcpy.addError('Configure not successful.  Please make sure you have installed the AWS CLI.')
-            self.__sm__(e.output, 'ERROR')
-            arcpy.AddError(e.output)
+            journalPath = settings.get('resume') or os.path.join(self.__TempLocation__, 'transfer.journal')
+            settings.setdefault('inventoryCache', os.path.join(os.path.dirname(self.__TempLocation__), 'inventory'))
+            self.__transfer__ = createTransferAgent(settings, AWSKeyID, AWSAccessKey, self.__sm__, journalPath)
+            self.__sm__('Transfer journal: ' + journalPath)
+        except:
+            arcpy.AddError('Configure not successful.  Please make sure you have installed boto3.')
             tb = traceback.format_exc()
             self.__sm__(tb, 'ERROR')
             arcpy.AddError(tb)
             sys.exit()
         else:
-            self.__sm__('Finished configuring AWS Secret Access Key')
+            self.__sm__('Finished configuring ' + settings.get('backend', 's3') + ' transfer backend')
     def __validateStreamStatsXML__(self, xml):
         """validateStreamStatsXML(xml=None)
             Determines if input xml is a valid streamstats XML file
@@ -289,69 +284,66 @@ class Main(object):
 
     def __copyS3__(self, source=None,destination=None,args=None, log=False):
         """copyS3(source=None,destination=None,args=None)
-            Function to call AWS CLI tools copy source file or folder to and from s3 with error trapping
+            Function to copy source file or folder to and from s3 with error trapping
         """
         if args == None:
             args = ""
+        if self.__options__.get('dryRun'):
+            self.__sm__('Dry run, not copying ' + source + ' to ' + destination)
+            return
+        recursive = '--recursive' in args
+        sync = not log and self.transferSettings.get('syncUploads', True) and destination.startswith('s3://')
         
-        if not log and self.__checkS3Bucket__(destination) == "True":
+        if not sync and not log and self.__transfer__.WasStarted(destination):
+            self.__sm__('Resuming ' + destination + ', keeping objects uploaded by the interrupted run')
+        elif not sync and not log and self.__checkS3Bucket__(destination) == "True":
             #delete destination folder first
-            cmd="aws s3 rm " + destination +  " " + args
-
             try:
-                output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-            except subprocess.CalledProcessError as e:
+                self.__transfer__.Remove(destination, recursive)
+            except:
                 tb = traceback.format_exc()
-                if 'lock' not in e.output and 'exit status 2' not in tb:
-                    self.__sm__(e.output, 'ERROR')
-                    arcpy.AddError(e.output)
-                    self.__sm__(tb, 'ERROR')
-                    arcpy.AddError(tb)
-                    sys.exit()
-
-        #create AWS CLI command
-        cmd="aws s3 cp " + source + " " + destination +  " " + args
+                self.__sm__(tb, 'ERROR')
+                arcpy.AddError(tb)
+                sys.exit()
+
         cmd_print = 'Copying ' + source + ' to ' + destination + '...'
-        print cmd_print
+        print(cmd_print)
         self.__sm__(cmd_print)
         arcpy.AddMessage(cmd_print)
 
         try:
-            output = subprocess.check_output(cmd, shell=True, stderr=subprocess.STDOUT)
-        except subprocess.CalledProcessError as e:
+            if sync:
+                self.__transfer__.Sync(source, destination, self.__manifestPath__(destination))
+            else:
+                self.__transfer__.Copy(source, destination, recursive)
+        except:
             tb = traceback.format_exc()
-            if 'lock' not in e.output and 'exit status 2' not in tb:
-                print e.output
-                arcpy.AddError(e.output)
-                print tb
-                arcpy.AddError(tb)
-                self.__sm__(e.output)
-                self.__sm__(tb)
-                sys.exit()
+            print(tb)
+            arcpy.AddError(tb)
+            self.__sm__(tb)
+            sys.exit()
+
+    def __manifestPath__(self, destination):
+        # kept next to the Temp<timestamp> folders so the hashes survive between runs
+        name = ''.join(c if c.isalnum() or c in '-.' else '_' for c in destination[len('s3://'):].strip('/'))
+        return os.path.join(os.path.dirname(self.__TempLocation__), 'manifests', name + '.json')
 
     def __checkS3Bucket__(self, fileLocation=None):
         """checkS3Bucket(fileLocation=None)
             function to check for existence of files in s3 bucket
         """
-        cmd = "aws s3 ls " + fileLocation
         try:
-            output = subprocess.call(cmd, shell=True)
-            if output == 1:
-                return 'False'
-            else:
+            if self.__transfer__.Exists(fileLocation):
                 return 'True'
+            else:
+                return 'False'
 
-        except subprocess.CalledProcessError as e:
-            print e.output
-            arcpy.AddError(e.output)
+        except:
             tb = traceback.format_exc()
-            print tb
+            print(tb)
             arcpy.AddError(tb)
-            self.__sm__(e.output)
             self.__sm__(tb)
             sys.exit()
-        else:
-            self.__sm__('Received list of elements in bucket')
 
     def __logData__(self, destinationBucket, workspace=None,state=None, commands=None, username=None, logNote=None):
         logFolder = os.path.join(workspace, 'log')
@@ -416,9 +408,28 @@ if __name__ == '__main__':
     parser.add_argument("-copy_global", help="indicates whether to copy the global.gdb", type=str, default='true')
     parser.add_argument("-huc_folders", help="indicates which huc folders to upload", type=str, default='')
     parser.add_argument("-schema_file", help="specifies the location of the regional schema .gdb", type=str, default=r'C:\Users\kjacobsen\Documents\wim_projects\docs\ss-data\test-ri\1\ri\RI_ss.gdb')
+    parser.add_argument("-sync", help="indicates whether to upload only changed files instead of deleting and recopying the destination", type=str, default=None)
+    parser.add_argument("-part_size_mb", help="size of the parts large files are uploaded in", type=int, default=None)
+    parser.add_argument("-part_workers", help="number of parts of one file uploaded at the same time", type=int, default=None)
+    parser.add_argument("-file_workers", help="number of files uploaded at the same time", type=int, default=None)
+    parser.add_argument("-resume", help="path of the transfer.journal of an interrupted run to resume", type=str, default=None)
+    parser.add_argument("-inventory_ttl", help="minutes a cached bucket listing in the workspace 'inventory' folder stays valid", type=float, default=None)
+    parser.add_argument("-dry_run", help="writes the delete plan of the parse (deletePlan_<region>.json in the Temp workspace) without removing or uploading anything", type=str, default='false')
+    parser.add_argument("-backend", help="overrides the transfer backend in config.json, 's3' or 'local'", type=str, default=None)
+    parser.add_argument("-local_root", help="folder standing in for s3 when using the 'local' backend", type=str, default=None)
 
     args = parser.parse_args()
     parameters = []
     parameters.extend((args.logNote, args.editorName, args.workspace, args.state_folder, args.xml_file ,args.copy_bc_layers, 
         args.copy_archydro,args.copy_global, args.huc_folders, args.schema_file))
-    Main(parameters)    
\ No newline at end of file
+    options = {}
+    if args.sync: options['syncUploads'] = args.sync == 'true'
+    if args.part_size_mb: options['partSizeMB'] = args.part_size_mb
+    if args.part_workers: options['partWorkers'] = args.part_workers
+    if args.file_workers: options['fileWorkers'] = args.file_workers
+    if args.resume: options['resume'] = args.resume
+    if args.inventory_ttl is not None: options['inventoryTTLMinutes'] = args.inventory_ttl
+    if args.dry_run == 'true': options['dryRun'] = True
+    if args.backend: options['backend'] = args.backend
+    if args.local_root: options['localRoot'] = args.local_root
+    Main(parameters, options)    
\ No newline at end of file
@@ -0,0 +1,305 @@
+#------------------------------------------------------------------------------
+#----- WorkerService.py -------------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Long lived local process that runs delineation and basin
+#             characteristic jobs with arcpy, ArcHydro and the regions warm
+#
+#discussion:  The service listens on localhost (multiprocessing.connection,
+#             port from config.json "workerService") and only answers clients
+#             that present the key it writes to the user's temp folder on
+#             start.  A request is a dict {"job": ..., job arguments}, the
+#             response a dict with isComplete, error, Message, seconds and the
+#             job's results.  Jobs run one at a time since arcpy is not thread
+#             safe; region contexts stay prepared between jobs.  The toolbox
+#             and the command line are thin clients through connect(), which
+#             returns None when no service is running so callers run locally.
+#             A client has requestTimeout seconds to authenticate and send its
+#             request before the service drops it, and connect() gives up
+#             after pingTimeout seconds, so a stuck client or a service busy
+#             with a long job never blocks a toolbox call.
+#
+#             python WorkerService.py serve
+#             python WorkerService.py delineate -region RI -schema_file ... -pour_point [x,y]
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import traceback
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+import tempfile
+from multiprocessing.connection import Listener, Client, AuthenticationError, answer_challenge, deliver_challenge
+#endregion
+
+KEY_FILE = os.path.join(tempfile.gettempdir(), 'ss-tools-worker.key')
+
+def serviceSettings():
+    with open(os.path.join(os.path.dirname(__file__), 'config.json')) as c:
+        return json.load(c)[0].get("workerService", {})
+
+def connect(settings=None):
+    """connect(settings=None)
+        A WorkerClient for the running service, or None when the service is disabled or not running
+    """
+    settings = settings or serviceSettings()
+    if not settings.get("enabled", True) or not os.path.exists(KEY_FILE): return None
+    client = WorkerClient(settings.get("port", 6399), settings.get("pingTimeout", 5))
+    return client if client.Ping() != None else None
+
+class WorkerResult(object):
+    # response of a job, with the attributes of the Delineation or BasinParameters it ran
+    def __init__(self, response):
+        self.isComplete = False
+        self.error = ""
+        self.Message = ""
+        self.ParameterList = None
+        self.__dict__.update(response)
+
+class WorkerClient(object):
+    #region Constructor
+    def __init__(self, port=6399, pingTimeout=5):
+        self.Address = ('localhost', port)
+        self.PingTimeout = pingTimeout
+    #endregion
+
+    #region Methods
+    def Request(self, job, **arguments):
+        """Request(job, **arguments)
+            Sends one job to the service and waits for its response dict
+        """
+        arguments['job'] = job
+        return self._request(arguments)
+    def Ping(self):
+        """Ping()
+            The service's ping response, None when it does not answer within PingTimeout seconds
+        """
+        try:
+            return self._request({'job': 'ping'}, self.PingTimeout)
+        except (IOError, OSError, EOFError, AuthenticationError):
+            return None
+    def Delineate(self, regionID, schemas, xml, workspaceID, state_folder, pourPoint, wkid='4326'):
+        return WorkerResult(self.Request('delineate', region=regionID, schema=schemas, xml=xml, workspace=workspaceID,
+                                         stateFolder=state_folder, pourPoint=pourPoint, wkid=wkid))
+    def Parameters(self, regionID, workspaceID, pList, input_basin):
+        return WorkerResult(self.Request('parameters', region=regionID, workspace=workspaceID, parameters=pList, inputBasin=input_basin))
+    def Warm(self, regionID, schemas, xml, state_folder):
+        return WorkerResult(self.Request('warm', region=regionID, schema=schemas, xml=xml, stateFolder=state_folder))
+    def Stop(self):
+        return WorkerResult(self.Request('stop'))
+    #endregion
+
+    #region Helper Methods
+    def _request(self, request, timeout=None):
+        # the service answers one client at a time, a timeout bounds the wait for it as well as for the job
+        connection = Client(self.Address)
+        try:
+            bounded = _BoundedConnection(connection, timeout)
+            key = _readKey()
+            answer_challenge(bounded, key)
+            deliver_challenge(bounded, key)
+            connection.send(request)
+            bounded.Wait()
+            return connection.recv()
+        finally:
+            connection.close()
+    #endregion
+
+class WorkerService(object):
+    #region Constructor
+    def __init__(self, port=6399, logFolder=None, requestTimeout=10):
+        self.Address = ('localhost', port)
+        self.RequestTimeout = requestTimeout
+        self.Jobs = 0
+        self.Regions = set()
+        self.Started = time.time()
+        self._running = False
+        self._logger = logging.getLogger('workerService')
+        self._logger.setLevel(logging.INFO)
+        handler = logging.FileHandler(os.path.join(logFolder or tempfile.gettempdir(), 'workerService.log'))
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self._logger.addHandler(handler)
+
+        # the slow imports (arcpy, arcpy.sa, ArcHydroTools) happen once, here
+        started = time.time()
+        import arcpy
+        from Delineation import Delineation
+        from BasinParameters import BasinParameters
+        import RegionContext
+        self._arcpy = arcpy
+        self._delineation = Delineation
+        self._basinParameters = BasinParameters
+        self._regionContext = RegionContext
+        self._sm('loaded arcpy and ArcHydroTools in ' + str(round(time.time() - started, 1)) + ' s')
+    #endregion
+
+    #region Methods
+    def Serve(self):
+        """Serve()
+            Answers requests until a stop job
+        """
+        key = uuid.uuid4().hex
+        # clients are authenticated here rather than by the listener, so a silent client times out
+        listener = Listener(self.Address)
+        _writeKey(key)
+        self._running = True
+        self._sm('listening on ' + str(self.Address))
+        try:
+            while self._running:
+                try:
+                    connection = listener.accept()
+                except (IOError, OSError, EOFError):
+                    self._sm('refused a connection: ' + str(sys.exc_info()[1]), 'ERROR')
+                    continue
+                try:
+                    bounded = _BoundedConnection(connection, self.RequestTimeout)
+                    deliver_challenge(bounded, key.encode('ascii'))
+                    answer_challenge(bounded, key.encode('ascii'))
+                    bounded.Wait()
+                    request = connection.recv()
+                except (AuthenticationError, IOError, OSError, EOFError):
+                    self._sm('refused a connection: ' + str(sys.exc_info()[1]), 'ERROR')
+                    connection.close()
+                    continue
+                except:
+                    # a message that cannot be unpickled
+                    self._sm('unreadable request ' + traceback.format_exc(), 'ERROR')
+                    connection.close()
+                    continue
+                try:
+                    connection.send(self.Handle(request))
+                except (IOError, OSError, EOFError):
+                    self._sm('lost a client: ' + str(sys.exc_info()[1]), 'ERROR')
+                finally:
+                    connection.close()
+        finally:
+            listener.close()
+            if os.path.exists(KEY_FILE): os.remove(KEY_FILE)
+            self._sm('stopped after ' + str(self.Jobs) + ' jobs')
+    def Handle(self, request):
+        """Handle(request)
+            Runs one request, returns its response dict
+        """
+        started = time.time()
+        job = None
+        response = {'job': job, 'isComplete': False, 'error': '', 'Message': ''}
+        try:
+            if not isinstance(request, dict): raise ValueError('a request is a dict, not ' + type(request).__name__)
+            job = response['job'] = request.get('job')
+            if job == 'ping':
+                response.update(isComplete=True, jobs=self.Jobs, regions=sorted(self.Regions), uptime=time.time() - self.Started)
+            elif job == 'stop':
+                self._running = False
+                response['isComplete'] = True
+            elif job == 'warm':
+                context = self._regionContext.getContext(request['region'], request['schema'], request['xml'], request['stateFolder'], self._sm)
+                context.SpatialReference()
+                self.Regions.add(request['region'].upper())
+                response['isComplete'] = True
+            elif job == 'delineate':
+                response.update(self._delineate(request))
+            elif job == 'parameters':
+                response.update(self._parameters(request))
+            else:
+                raise ValueError('unknown job: ' + str(job))
+        except:
+            response['error'] = traceback.format_exc()
+            self._sm(str(job) + ' job failed ' + response['error'], 'ERROR')
+        finally:
+            self._releaseLogs()
+        response['seconds'] = time.time() - started
+        if job not in (None, 'ping', 'stop'):
+            self.Jobs += 1
+            self._sm(str(job) + ' job for ' + str(request.get('region')) + ' in ' + str(round(response['seconds'], 2)) + ' s')
+        return response
+    #endregion
+
+    #region Helper Methods
+    def _delineate(self, request):
+        ssdel = self._delineation(request['region'], request['schema'], request['xml'], request['workspace'], request['stateFolder'])
+        pourPoint = ssdel._buildAHPourpoint(request['pourPoint'], request.get('wkid', '4326'))
+        ssdel.Delineate(pourPoint)
+        self.Regions.add(request['region'].upper())
+        return {'isComplete': ssdel.isComplete, 'error': ssdel.error, 'Message': ssdel.Message}
+    def _parameters(self, request):
+        ssBp = self._basinParameters(request['region'], request['workspace'], request.get('parameters') or '', request.get('inputBasin', 'none'))
+        return {'isComplete': ssBp.isComplete, 'Message': ssBp.Message, 'ParameterList': ssBp.ParameterList}
+    def _releaseLogs(self):
+        # every Delineation and BasinParameters adds a file handler to its logger, which would pile up and hold workspace logs open
+        for name in ('delineation', 'parameter'):
+            logger = logging.getLogger(name)
+            for handler in list(logger.handlers):
+                handler.close()
+                logger.removeHandler(handler)
+    def _sm(self, msg, type='INFO'):
+        if type in ('ERROR'): self._logger.error(msg)
+        else: self._logger.info(msg)
+    #endregion
+
+class _BoundedConnection(object):
+    # the send_bytes and recv_bytes the challenge functions use, recv_bytes giving up after timeout seconds
+    def __init__(self, connection, timeout=None):
+        self._connection = connection
+        self._timeout = timeout
+    def Wait(self):
+        if self._timeout != None and not self._connection.poll(self._timeout):
+            raise IOError('nothing received within ' + str(self._timeout) + ' s')
+    def send_bytes(self, data):
+        self._connection.send_bytes(data)
+    def recv_bytes(self, maxlength=None):
+        self.Wait()
+        return self._connection.recv_bytes(maxlength) if maxlength else self._connection.recv_bytes()
+
+def _writeKey(key):
+    with open(KEY_FILE, 'w') as f:
+        f.write(key)
+    os.chmod(KEY_FILE, 0o600)
+
+def _readKey():
+    with open(KEY_FILE) as f:
+        return f.read().strip().encode('ascii')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", help="serve, ping, stop, warm, delineate or parameters", choices=['serve', 'ping', 'stop', 'warm', 'delineate', 'parameters'])
+    parser.add_argument("-port", help="overrides the workerService port in config.json", type=int, default=None)
+    parser.add_argument("-region", help="region (state) abbreviation", type=str, default=None)
+    parser.add_argument("-schema_file", help="specifies the location of the regional schema .gdb", type=str, default=None)
+    parser.add_argument("-xml_file", help="specifies the regional xml file", type=str, default=None)
+    parser.add_argument("-workspace", help="specifies the delineation workspace", type=str, default=None)
+    parser.add_argument("-state_folder", help="specifies the regional folder containing 'archydro' and bc_layers' folders", type=str, default=None)
+    parser.add_argument("-pour_point", help="pour point as [x,y]", type=str, default=None)
+    parser.add_argument("-wkid", help="spatial reference of the pour point", type=str, default='4326')
+    parser.add_argument("-parameters", help="semicolon separated characteristic codes, all when empty", type=str, default='')
+    parser.add_argument("-input_basin", help="basin feature class to compute characteristics for", type=str, default='none')
+
+    args = parser.parse_args()
+    port = args.port or serviceSettings().get("port", 6399)
+    if args.command == 'serve':
+        WorkerService(port, requestTimeout=serviceSettings().get("requestTimeout", 10)).Serve()
+    else:
+        client = WorkerClient(port, serviceSettings().get("pingTimeout", 5))
+        if args.command == 'ping': response = client.Request('ping')
+        elif args.command == 'stop': response = client.Request('stop')
+        elif args.command == 'warm': response = client.Request('warm', region=args.region, schema=args.schema_file, xml=args.xml_file, stateFolder=args.state_folder)
+        elif args.command == 'delineate': response = client.Request('delineate', region=args.region, schema=args.schema_file, xml=args.xml_file,
+                                                                    workspace=args.workspace, stateFolder=args.state_folder, pourPoint=args.pour_point, wkid=args.wkid)
+        else: response = client.Request('parameters', region=args.region, workspace=args.workspace, parameters=args.parameters, inputBasin=args.input_basin)
+        response.pop('Message', None)
+        print(json.dumps(response, indent=2, default=str))
@@ -0,0 +1,238 @@
+#------------------------------------------------------------------------------
+#----- ZonalStatistics.py -----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Computes raster basin characteristics that are plain zonal
+#             statistics with NumPy, leaving the rest to ArcHydro
+#
+#discussion:  A characteristic is defined in config.json "zonalStatistics":
+#             {"CODE": {"layer": "dem", "statistic": "mean", "factor": 1.0,
+#             "values": [41, 42]}}, statistic one of mean, sum, min, max,
+#             count, std, area (cell area of valid cells, times factor) or
+#             percent (percent of valid cells whose value is in values).
+#             Only the window of each raster that covers the basin extent is
+#             read.  The basin is rasterized (cell centers, even-odd rule)
+#             once per raster grid, so rasters sharing a grid share the mask.
+#             Rasters are read with arcpy, with GDAL when arcpy is missing,
+#             or given as NumpyRaster, so the engine runs without ArcGIS.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import math
+import numpy
+try:
+    import arcpy
+except ImportError:
+    arcpy = None
+try:
+    from osgeo import gdal
+except ImportError:
+    gdal = None
+#endregion
+
+# numpy.in1d before numpy 1.13, numpy.isin after in1d was removed
+isin = getattr(numpy, 'isin', None) or numpy.in1d
+
+STATISTICS = ('mean', 'sum', 'min', 'max', 'count', 'std', 'area', 'percent')
+
+class NumpyRaster(object):
+    # a raster held in memory: array rows run north to south from top, left the x of the first column's edge
+    def __init__(self, array, left, top, cellWidth, cellHeight=None, noData=None):
+        self.Array = numpy.asarray(array)
+        self.Left = float(left)
+        self.Top = float(top)
+        self.CellWidth = float(cellWidth)
+        self.CellHeight = float(cellHeight or cellWidth)
+        self.NoData = noData
+        self.Rows, self.Columns = self.Array.shape
+    def Read(self, row, column, rows, columns):
+        return self.Array[row:row + rows, column:column + columns]
+
+class ArcpyRaster(object):
+    # windowed reads with RasterToNumPyArray
+    def __init__(self, path):
+        raster = arcpy.Raster(path)
+        self.Path = path
+        self.Left = raster.extent.XMin
+        self.Top = raster.extent.YMax
+        self.CellWidth = raster.meanCellWidth
+        self.CellHeight = raster.meanCellHeight
+        self.Rows = raster.height
+        self.Columns = raster.width
+        self.NoData = raster.noDataValue
+        self.SpatialReference = raster.spatialReference
+    def Read(self, row, column, rows, columns):
+        corner = arcpy.Point(self.Left + column * self.CellWidth, self.Top - (row + rows) * self.CellHeight)
+        if self.NoData == None: return arcpy.RasterToNumPyArray(self.Path, corner, columns, rows)
+        return arcpy.RasterToNumPyArray(self.Path, corner, columns, rows, self.NoData)
+
+class GdalRaster(object):
+    # windowed reads with GDAL, for GeoTIFFs without ArcGIS
+    def __init__(self, path):
+        self._dataset = gdal.Open(path)
+        left, cellWidth, a, top, b, cellHeight = self._dataset.GetGeoTransform()
+        self.Path = path
+        self.Left = left
+        self.Top = top
+        self.CellWidth = cellWidth
+        self.CellHeight = -cellHeight
+        self.Rows = self._dataset.RasterYSize
+        self.Columns = self._dataset.RasterXSize
+        self.NoData = self._dataset.GetRasterBand(1).GetNoDataValue()
+    def Read(self, row, column, rows, columns):
+        return self._dataset.GetRasterBand(1).ReadAsArray(column, row, columns, rows)
+
+def openRaster(path):
+    """openRaster(path)
+        The raster at path, read with arcpy when it is available and GDAL otherwise
+    """
+    if arcpy != None: return ArcpyRaster(path)
+    if gdal != None: return GdalRaster(path)
+    raise ImportError('reading ' + path + ' needs arcpy or GDAL')
+
+def basinRings(featureClass, spatialReference=None):
+    """basinRings(featureClass, spatialReference=None)
+        The rings of every polygon in featureClass as [(x, y)] lists, projected to spatialReference
+    """
+    rings = []
+    with arcpy.da.SearchCursor(featureClass, ["SHAPE@"], spatial_reference=spatialReference) as cursor:
+        for row in cursor:
+            if row[0] == None: continue
+            for part in row[0]:
+                ring = []
+                for point in part:
+                    # interior rings of a part are separated by None
+                    if point == None:
+                        rings.append(ring)
+                        ring = []
+                    else: ring.append((point.X, point.Y))
+                rings.append(ring)
+    return [ring for ring in rings if len(ring) > 2]
+
+def rasterizeRings(rings, left, top, cellWidth, cellHeight, rows, columns):
+    """rasterizeRings(rings, left, top, cellWidth, cellHeight, rows, columns)
+        Boolean mask of the cells whose centers are inside the rings (even-odd, so holes are excluded)
+    """
+    edges = []
+    for ring in rings:
+        points = numpy.asarray(ring, dtype=float)
+        if len(points) < 3: continue
+        edges.append(numpy.hstack((points, numpy.roll(points, -1, axis=0))))
+    mask = numpy.zeros((rows, columns), dtype=bool)
+    if not edges: return mask
+    x1, y1, x2, y2 = numpy.vstack(edges).T
+    horizontal = y1 == y2
+    x1, y1, x2, y2 = x1[~horizontal], y1[~horizontal], x2[~horizontal], y2[~horizontal]
+    xCenters = left + (numpy.arange(columns) + 0.5) * cellWidth
+    for row in range(rows):
+        y = top - (row + 0.5) * cellHeight
+        crosses = (y1 <= y) != (y2 <= y)
+        if not crosses.any(): continue
+        xs = numpy.sort(x1[crosses] + (y - y1[crosses]) * (x2[crosses] - x1[crosses]) / (y2[crosses] - y1[crosses]))
+        # a center is inside when an odd number of crossings lie to its left
+        mask[row] = numpy.searchsorted(xs, xCenters) % 2 == 1
+    return mask
+
+class ZonalStatistics(object):
+    #region Constructor
+    def __init__(self, rings, definitions, messenger=None):
+        self.Rings = [list(ring) for ring in rings]
+        self.Definitions = dict((code.upper(), definition) for code, definition in definitions.items())
+        self.CellsRead = 0
+        self._extent = self._bounds(self.Rings)
+        self._masks = {}
+        self._messenger = messenger
+    #endregion
+
+    #region Methods
+    def Supports(self, code):
+        definition = self.Definitions.get(code.upper())
+        return definition != None and definition.get('layer') and definition.get('statistic') in STATISTICS
+    def Compute(self, code, raster):
+        """Compute(code, raster)
+            Value of the characteristic over the basin, None when the basin covers no valid cell
+        """
+        definition = self.Definitions[code.upper()]
+        values, cellArea = self._basinValues(raster)
+        if values is None or values.size == 0: return None
+        statistic = definition['statistic']
+        factor = float(definition.get('factor', 1.0))
+        if statistic == 'percent':
+            value = 100.0 * isin(values, definition.get('values', [])).sum() / values.size
+        elif statistic == 'area': value = values.size * cellArea
+        elif statistic == 'count': value = values.size
+        elif statistic == 'std': value = numpy.std(values, dtype=numpy.float64)
+        elif statistic == 'sum': value = numpy.sum(values, dtype=numpy.float64)
+        elif statistic == 'mean': value = numpy.mean(values, dtype=numpy.float64)
+        elif statistic == 'min': value = numpy.min(values)
+        else: value = numpy.max(values)
+        return float(value) * factor
+    def Characteristics(self, codes, rasterFor):
+        """Characteristics(codes, rasterFor)
+            ([{'code', 'value'}], codes left for ArcHydro); rasterFor(layer) opens the layer's raster or returns None
+        """
+        parameters = []
+        remaining = []
+        rasters = {}
+        for code in codes:
+            layer = self.Definitions.get(code.upper(), {}).get('layer')
+            if not self.Supports(code):
+                remaining.append(code)
+                continue
+            try:
+                if layer not in rasters: rasters[layer] = rasterFor(layer)
+                value = self.Compute(code, rasters[layer]) if rasters[layer] != None else None
+            except Exception as e:
+                self._sm('zonal statistics failed for ' + code + ': ' + str(e), 'ERROR')
+                value = None
+            if value == None: remaining.append(code)
+            else: parameters.append({'code': code.upper(), 'value': str(round(value, 6))})
+        self._sm('zonal statistics: ' + str(len(parameters)) + ' computed, ' + str(self.CellsRead) + ' cells read, ' +
+                 str(len(remaining)) + ' left for ArcHydro')
+        return parameters, remaining
+    #endregion
+
+    #region Helper Methods
+    def _basinValues(self, raster):
+        window = self._window(raster)
+        if window == None: return None, 0
+        row, column, rows, columns, left, top = window
+        key = (left, top, raster.CellWidth, raster.CellHeight, rows, columns)
+        if key not in self._masks:
+            self._masks[key] = rasterizeRings(self.Rings, left, top, raster.CellWidth, raster.CellHeight, rows, columns)
+        mask = self._masks[key]
+        block = numpy.asarray(raster.Read(row, column, rows, columns))
+        self.CellsRead += block.size
+        valid = mask.copy()
+        if raster.NoData != None: valid &= block != raster.NoData
+        if block.dtype.kind == 'f': valid &= ~numpy.isnan(block)
+        return block[valid], abs(raster.CellWidth * raster.CellHeight)
+    def _window(self, raster):
+        # rows and columns of the raster covering the basin extent, clipped to the raster
+        xmin, ymin, xmax, ymax = self._extent
+        column = max(0, int(math.floor((xmin - raster.Left) / raster.CellWidth)))
+        lastColumn = min(raster.Columns, int(math.ceil((xmax - raster.Left) / raster.CellWidth)))
+        row = max(0, int(math.floor((raster.Top - ymax) / raster.CellHeight)))
+        lastRow = min(raster.Rows, int(math.ceil((raster.Top - ymin) / raster.CellHeight)))
+        if lastColumn <= column or lastRow <= row: return None
+        return (row, column, lastRow - row, lastColumn - column,
+                raster.Left + column * raster.CellWidth, raster.Top - row * raster.CellHeight)
+    def _bounds(self, rings):
+        points = numpy.vstack([numpy.asarray(ring, dtype=float) for ring in rings if len(ring)])
+        return points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()
+    def _sm(self, msg, type='INFO'):
+        if self._messenger != None: self._messenger(msg, type)
+    #endregion
@@ -18,6 +18,8 @@
 
 #region "Comments"
 #11.19.2017 jkn - Created
+#10.18.2026 wim - parallel scan with checkpoint and inventory, batched DefineProjection pass
+#10.18.2026 wim - sqlite inventory, rescans describe only changed datasets
 #endregion
 
 #region "Imports"
@@ -28,6 +30,8 @@ import os
 import argparse
 import arcpy
 import json
+from ProjectionAudit import ProjectionAudit
+from SpatialInventory import SpatialInventory
 
 #endregion
 
@@ -46,6 +50,10 @@ class SpatialRefWrapper(object):
             parser.add_argument("-Directory", help="Parent directory", type=str, default="d:\data\ms")   
             parser.add_argument("-FromSR",type=str,help="Name of Spatial Reference to project from", default='NAD_1983_Mississippi_TM')
             parser.add_argument("-ToSR",type=str,help="WKID or file name of Spatial Reference to project to", default=None)#NAD_1983_Transvers_Mercator.prj
+            parser.add_argument("-Workers",type=int,help="number of top level folders scanned at the same time", default=1)
+            parser.add_argument("-Checkpoint",type=str,help="json lines file of scanned folders, a rerun resumes from it until the run finishes", default=None)
+            parser.add_argument("-Inventory",type=str,help="json or csv file of every dataset and its spatial reference", default=None)
+            parser.add_argument("-Database",type=str,help="sqlite inventory kept between runs, only changed datasets are described again", default=None)
             args = parser.parse_args()
 
             directory = args.Directory
@@ -57,19 +65,27 @@ class SpatialRefWrapper(object):
                 self.tosr = arcpy.SpatialReference()
                 self.tosr.loadFromString(args.ToSR)#os.path.join(directory,args.ToSR))
 
-            walk = arcpy.da.Walk(directory, datatype=['FeatureClass','RasterDataset','FeatureDataset' ])
-            
-            for dirpath, dirnames, filenames in walk:
-                dirtype = arcpy.Describe(dirpath).datatype
-                if(dirtype == 'Coverage' or dirtype == 'FeatureDataset'):
-                    self.__defineProjection(dirpath)
-                    continue;               
-                else:
-                    for filename in filenames:
-                        item =os.path.join(dirpath, filename); 
-                        self.__defineProjection(item)
-                    #next filename
-            #next directory
+            #each dataset is described once, the fix is a separate pass over the inventory
+            audit = ProjectionAudit(args.Workers, self.__sm)
+            inventory = SpatialInventory(args.Database) if args.Database else None
+            try:
+                records = audit.Scan(directory, args.Checkpoint, inventory)
+                print("described", audit.Described, "of", len(records))
+                for record in records:
+                    if record['error']: print("error getting spatialReference", record['path'])
+                    elif not self.fromsrname: self.availablespatialRef.add(record['srName'])
+
+                if self.fromsrname:
+                    if(self.tosr != None):
+                        print("DefineProj to", self.tosr.name)
+                        audit.Define(self.fromsrname, args.ToSR, inventory)
+                    else:
+                        for record in audit.Matching(self.fromsrname): print (record['path'], record['srName'])
+                if args.Inventory: print("inventory", audit.Save(args.Inventory))
+                #kept until the define pass has finished, an interrupted run resumes without scanning again
+                audit.Finish(args.Checkpoint)
+            finally:
+                if inventory != None: inventory.Close()
             
             print(self.availablespatialRef)
 
@@ -78,34 +94,8 @@ class SpatialRefWrapper(object):
              tb = traceback.format_exc()
              print(tb)
 
-    def __defineProjection(self, item):
-        try:
-
-            try:
-                sr = arcpy.Describe(item).spatialReference.name
-            except:
-                print("error getting spatialReference", item)
-                return
-
-            if not self.fromsrname: 
-                self.availablespatialRef.add(sr)
-                return
-
-            if (sr.lower() == self.fromsrname.lower()):
-                if(self.tosr != None):
-                    try:
-                        print("DefineProj to", self.tosr.name)
-                        print("BEFORE",arcpy.Describe(item).spatialReference.name)
-                        arcpy.DefineProjection_management(item,self.tosr)
-                        print("AFTER",arcpy.Describe(item).spatialReference.name)
-                        print ("sucessfully Defined", item)
-                    except:
-                        print("error Defining spatialReference", item)
-                else:
-                    print (item, sr)
-        except :
-            tb = traceback.format_exc()
-            print(tb)
+    def __sm(self, msg, type='INFO'):
+        print(msg)
 
     
 if __name__ == '__main__':
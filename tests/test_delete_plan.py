@@ -0,0 +1,76 @@
+#------------------------------------------------------------------------------
+#----- test_delete_plan.py ----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the keep set and delete plan ParseData builds from a
+#             region's xml, on a temp state folder
+#
+#discussion:  Feature classes of the gdbs come from a dict instead of arcpy,
+#             so the tests run without ArcGIS, on python 2.7 and 3:
+#
+#             python -m unittest discover -s tests
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from DeletePlan import KeepSet, DeletePlan
+#endregion
+
+class DeletePlanTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.state = os.path.join(self.folder, 'xx')
+        for path in ('archydro/global.gdb/a1.gdbtable', 'archydro/old_global.gdb/a1.gdbtable',
+                     'archydro/01010001/01010001.gdb/a1.gdbtable', 'archydro/01010001/fdr/w001001.adf',
+                     'archydro/01010001/fac/w001001.adf', 'archydro/01010001/backup.zip',
+                     'bc_layers/dem/hdr.adf', 'bc_layers/slope/hdr.adf', 'bc_layers/info/arc.dir',
+                     'bc_layers/dem.tif', 'bc_layers/dem.tif.xml', 'readme.txt', 'xx_ss.gdb/a1.gdbtable'):
+            path = os.path.join(self.state, *path.split('/'))
+            if not os.path.isdir(os.path.dirname(path)): os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write('x')
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def test_keep_set(self):
+        keep = KeepSet(['DEM', 'fdr'], 'xx', self.state)
+        bcLayers = os.path.join(self.state, 'bc_layers')
+        self.assertFalse(keep.DeletesFile(os.path.join(bcLayers, 'dem'), 'hdr.adf'))
+        self.assertTrue(keep.DeletesFile(os.path.join(bcLayers, 'slope'), 'hdr.adf'))
+        self.assertFalse(keep.DeletesFile(os.path.join(bcLayers, 'info'), 'arc.dir'))
+        self.assertFalse(keep.DeletesFile(bcLayers, 'dem.tif.xml'))
+        self.assertTrue(keep.DeletesFile(bcLayers, 'dem.tif.aux.xml'))
+        self.assertTrue(keep.DeletesFile(bcLayers, 'old.zip'))
+        self.assertFalse(keep.DeletesFile(os.path.join(self.state, 'archydro', 'x.gdb'), 'a1.gdbtable'))
+        self.assertTrue(keep.KeepsFeatureClass('FDR') and not keep.KeepsFeatureClass('Catchment'))
+    def test_plan(self):
+        featureClasses = {os.path.join(self.state, 'archydro', 'global.gdb', 'Layers'): ['GlobalWatershed', 'fdr'],
+                          os.path.join(self.state, 'archydro', '01010001', '01010001.gdb', 'Layers'): ['Catchment']}
+        plan = DeletePlan(self.state, KeepSet(['dem', 'fdr', 'globalwatershed'], 'xx', self.state), lambda w: featureClasses.get(w, []))
+        relative = lambda paths: sorted(os.path.relpath(p, self.state).replace(os.sep, '/') for p in paths)
+        self.assertEqual(relative(p for p, size in plan.Files),
+                         ['archydro/01010001/backup.zip', 'archydro/01010001/fac/w001001.adf', 'bc_layers/slope/hdr.adf'])
+        self.assertEqual(relative(p for p, size in plan.Geodatabases), ['archydro/old_global.gdb'])
+        self.assertEqual(plan.GeodatabaseBytes(), 1)
+        self.assertEqual([(os.path.basename(os.path.dirname(w)), fc) for w, fc in plan.FeatureClasses], [('01010001.gdb', 'Catchment')])
+        self.assertEqual(relative(plan.Datasets), ['archydro/01010001/01010001.gdb/Layers'])
+        self.assertEqual(relative(plan.Folders), ['archydro/01010001/fac', 'bc_layers/slope'])
+
+if __name__ == '__main__':
+    unittest.main()
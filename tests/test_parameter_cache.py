@@ -0,0 +1,100 @@
+#------------------------------------------------------------------------------
+#----- test_parameter_cache.py ------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the data version basin characteristics are cached
+#             under and of the stored values
+#
+#discussion:  The workspace copies of the region xml are written by
+#             RegionContext.XMLFile, as BasinParameters writes them.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from ParameterCache import ParameterCache, dataVersion
+from RegionContext import RegionContext
+#endregion
+
+XML = '''<?xml version="1.0" ?>
+<StreamStatsConfig>
+  <ProgParams>
+    <TempLocation>d:\\temp</TempLocation>
+    <RASTERDATAPATH>d:\\data\\xx\\bc_layers</RASTERDATAPATH>
+    <VECTORDATAPATH>d:\\data\\xx\\archydro\\global.gdb</VECTORDATAPATH>
+    <DataPath>d:\\data\\xx\\archydro</DataPath>
+    <GlobalDataPath>d:\\data\\xx\\archydro\\global.gdb</GlobalDataPath>
+    <SnapToleranceNumCells>{0}</SnapToleranceNumCells>
+  </ProgParams>
+</StreamStatsConfig>
+'''
+
+class DataVersionTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.state = os.path.join(self.folder, 'xx')
+        for path in (('bc_layers', 'dem.tif'), ('archydro', 'global.gdb', 'a1.gdbtable')):
+            path = os.path.join(self.state, *path)
+            if not os.path.isdir(os.path.dirname(path)): os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write('x')
+        self.xml = self.writeXML('StreamStatsXX.xml', 5)
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def writeXML(self, name, snap):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as f:
+            f.write(XML.format(snap))
+        return path
+    def workspaceXML(self, xml, workspace):
+        directory = os.path.join(self.folder, workspace)
+        if not os.path.isdir(directory): os.makedirs(directory)
+        return RegionContext('XX', self.folder, xml, self.state).XMLFile(directory, directory)
+    def test_workspace_copies_share_a_version(self):
+        first, second = self.workspaceXML(self.xml, 'ws1'), self.workspaceXML(self.xml, 'ws2')
+        with open(first) as a, open(second) as b:
+            self.assertNotEqual(a.read(), b.read())
+        self.assertEqual(dataVersion(first), dataVersion(second))
+    def test_data_and_xml_changes(self):
+        version = dataVersion(self.workspaceXML(self.xml, 'ws1'))
+        # the other parameters of the xml count
+        other = self.writeXML('StreamStatsXX_snap.xml', 10)
+        self.assertNotEqual(dataVersion(self.workspaceXML(other, 'ws1')), version)
+        # so does newer data
+        later = time.time() + 60
+        os.utime(os.path.join(self.state, 'bc_layers', 'dem.tif'), (later, later))
+        self.assertNotEqual(dataVersion(self.workspaceXML(self.xml, 'ws2')), version)
+
+class ParameterCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def test_put_and_get(self):
+        cache = ParameterCache('XX', self.folder)
+        cache.Put('k1', [{'code': 'drnarea', 'value': '1.5'}, {'code': 'ELEV', 'value': ''}])
+        self.assertEqual(cache.Get('k1', ['DRNAREA', 'elev']), {'DRNAREA': {'code': 'drnarea', 'value': '1.5'}})
+        self.assertEqual((cache.Hits, cache.Misses), (1, 1))
+        cache.Put('k1', [{'code': 'ELEV', 'value': '300'}])
+        self.assertEqual(sorted(ParameterCache('XX', self.folder).Get('k1', ['DRNAREA', 'ELEV', 'PRECIP'])), ['DRNAREA', 'ELEV'])
+        self.assertTrue(os.path.isfile(os.path.join(self.folder, 'xx', 'k1.json')))
+
+if __name__ == '__main__':
+    unittest.main()
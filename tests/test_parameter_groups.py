@@ -0,0 +1,45 @@
+#------------------------------------------------------------------------------
+#----- test_parameter_groups.py -----------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the grouping of basin characteristics by the layers
+#             they read
+#
+#discussion:  groupCharacteristics is pure python, ParameterGroups is
+#             imported without arcpy or ArcHydroTools.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from ParameterGroups import groupCharacteristics
+#endregion
+
+class GroupCharacteristicsTests(unittest.TestCase):
+    def test_codes_sharing_a_layer_stay_together(self):
+        layers = {'A': ['dem'], 'B': ['dem', 'slope'], 'C': ['slope'], 'D': ['lc'], 'E': ['ppt'], 'F': []}
+        groups = groupCharacteristics(['A', 'B', 'C', 'D', 'E', 'F'], layers, 3)
+        self.assertEqual(len(groups), 3)
+        self.assertIn(['A', 'B', 'C'], groups)
+        self.assertEqual(sorted(code for group in groups for code in group), ['A', 'B', 'C', 'D', 'E', 'F'])
+    def test_group_count_and_duplicates(self):
+        self.assertEqual(groupCharacteristics(['a', 'b', 'a'], {}, 1), [['a', 'b']])
+        self.assertEqual(groupCharacteristics(['A', 'B'], {'A': ['x'], 'B': ['x']}, 4), [['A', 'B']])
+        self.assertEqual(groupCharacteristics([], {}, 2), [])
+
+if __name__ == '__main__':
+    unittest.main()
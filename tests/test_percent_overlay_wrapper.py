@@ -0,0 +1,116 @@
+#------------------------------------------------------------------------------
+#----- test_percent_overlay_wrapper.py ----------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of PercentOverlayWrapper -batch, in one process and on
+#             the worker pool
+#
+#discussion:  The wrapper is imported with stand ins for arcpy and
+#             PercentOverlayAgent, which are taken out of sys.modules again
+#             so the other tests see what is really installed.  The pool
+#             processes are forked and inherit them; where processes are
+#             spawned instead the pooled test is skipped.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import json
+import types
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+#endregion
+
+class StubAgent(object):
+    # the overlay of a watershed is its file name and the process that computed it
+    Created = []
+    def __init__(self, workspace, features, persistIndex=False, backend=None):
+        self.isInit = os.path.isdir(features)
+        StubAgent.Created.append((os.getpid(), persistIndex))
+    def __enter__(self):
+        return self
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+    def Execute(self, mask):
+        if 'bad' in mask: raise Exception('no overlapping regions')
+        return [{"name": os.path.basename(mask), "pid": os.getpid()}]
+
+def walk(top, datatype=None, type=None):
+    for dirpath, dirnames, filenames in os.walk(top):
+        yield dirpath, dirnames, [name for name in filenames if name.endswith('.shp')]
+
+def importWrapper():
+    arcpy = types.ModuleType('arcpy')
+    arcpy.env = types.ModuleType('arcpy.env')
+    arcpy.sa = types.ModuleType('arcpy.sa')
+    arcpy.da = types.ModuleType('arcpy.da')
+    arcpy.da.Walk = walk
+    agent = types.ModuleType('PercentOverlayAgent')
+    agent.PercentOverlayAgent = StubAgent
+    stubs = {'arcpy': arcpy, 'arcpy.sa': arcpy.sa, 'arcpy.da': arcpy.da, 'PercentOverlayAgent': agent}
+    saved = dict((name, sys.modules.get(name)) for name in stubs)
+    sys.modules.update(stubs)
+    try:
+        import PercentOverlayWrapper
+    finally:
+        for name, module in saved.items():
+            if module == None: del sys.modules[name]
+            else: sys.modules[name] = module
+    return PercentOverlayWrapper
+
+wrapper = importWrapper()
+
+class RunBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.features = os.path.join(self.folder, 'SS_regionPolys.gdb')
+        os.makedirs(self.features)
+        for workspaceID in ('ws1', 'ws2', 'ws3', 'bad4'):
+            layers = os.path.join(self.folder, 'batch', workspaceID, 'Layers')
+            os.makedirs(layers)
+            open(os.path.join(layers, 'GlobalWatershed.shp'), 'w').close()
+        self.output = os.path.join(self.folder, 'percentOverlay.jsonl')
+        del StubAgent.Created[:]
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def runBatch(self, workers):
+        # the constructor parses the command line, runBatch does not need it
+        batch = wrapper.PercentOverlayWrapper.__new__(wrapper.PercentOverlayWrapper)
+        batch._sm = lambda msg, type="INFO", errorID=0: None
+        result = batch.runBatch(os.path.join(self.folder, 'batch'), self.features, "OID@", self.output, workers)
+        with open(self.output) as f:
+            lines = sorted((json.loads(line) for line in f), key=lambda line: line["id"])
+        self.assertEqual(result, {"watersheds": 4, "failed": 1, "output": self.output})
+        self.assertEqual([line["id"] for line in lines], ['bad4', 'ws1', 'ws2', 'ws3'])
+        self.assertTrue('no overlapping regions' in lines[0]["error"] and lines[0]["results"] == None)
+        for line in lines[1:]:
+            self.assertEqual((line["error"], line["results"][0]["name"]), ("", 'GlobalWatershed.shp'))
+        return set(result["pid"] for line in lines[1:] for result in line["results"])
+    def test_one_process(self):
+        self.assertEqual(self.runBatch(1), set([os.getpid()]))
+        self.assertEqual(StubAgent.Created, [(os.getpid(), True)])
+    @unittest.skipUnless(getattr(multiprocessing, 'get_start_method', lambda: 'fork')() == 'fork', 'pool processes do not inherit the stand ins')
+    def test_pool(self):
+        pids = self.runBatch(2)
+        self.assertFalse(os.getpid() in pids)
+        self.assertTrue(1 <= len(pids) <= 2)
+        # the parent builds and saves the region index once, before the workers load it
+        self.assertEqual(StubAgent.Created, [(os.getpid(), True)])
+
+if __name__ == '__main__':
+    unittest.main()
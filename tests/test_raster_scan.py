@@ -0,0 +1,69 @@
+#------------------------------------------------------------------------------
+#----- test_raster_scan.py ----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the block by block raster scan, the dtype it
+#             recommends and the nodata value picked for a new dtype
+#
+#discussion:  Rasters are NumpyRasters read in 3 x 3 blocks, so every
+#             scan crosses block edges.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import unittest
+import numpy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from ZonalStatistics import NumpyRaster
+from RasterScan import scanRaster, recommendDtype, noDataFor
+#endregion
+
+class RasterScanTests(unittest.TestCase):
+    def scan(self, array, noData=None):
+        return scanRaster(NumpyRaster(array, 0, len(array), 1, noData=noData), 3)
+    def test_integers_fit_the_smallest_type(self):
+        stats = self.scan(numpy.arange(64, dtype=numpy.int32).reshape(8, 8))
+        self.assertEqual((stats['min'], stats['max'], stats['blocks']), (0, 63, 9))
+        self.assertEqual(stats['recommendedDtype'], 'uint8')
+        self.assertEqual(self.scan(numpy.arange(-5, 59, dtype=numpy.int32).reshape(8, 8))['recommendedDtype'], 'int8')
+        self.assertEqual(self.scan(numpy.arange(0, 6400, 100, dtype=numpy.int32).reshape(8, 8))['recommendedDtype'], 'uint16')
+    def test_nodata_needs_a_free_value(self):
+        full = numpy.arange(256, dtype=numpy.uint16).reshape(16, 16)
+        self.assertEqual(self.scan(full)['recommendedDtype'], 'uint8')
+        # 0 is free for nodata
+        full[0, 0] = 1000
+        stats = self.scan(full, 1000)
+        self.assertEqual((stats['noDataCells'], stats['min'], stats['max']), (1, 1, 255))
+        self.assertEqual(stats['recommendedDtype'], 'uint8')
+        # every uint8 value is used, nodata needs the wider type
+        every = numpy.minimum(numpy.arange(272), 255).astype(numpy.uint16).reshape(16, 17)
+        every[15, 16] = 1000
+        self.assertEqual(self.scan(every, 1000)['recommendedDtype'], 'uint16')
+        self.assertEqual(recommendDtype({'dtype': 'int32', 'min': 0, 'max': 255, 'noDataCells': 1, 'integral': True}), 'uint16')
+    def test_floats(self):
+        self.assertEqual(self.scan(numpy.arange(16, dtype=numpy.float64).reshape(4, 4))['recommendedDtype'], 'uint8')
+        self.assertEqual(self.scan(numpy.full((4, 4), 0.5))['recommendedDtype'], 'float32')
+        self.assertEqual(self.scan(numpy.full((4, 4), 0.1))['recommendedDtype'], 'float64')
+        stats = self.scan(numpy.full((4, 4), numpy.nan, dtype=numpy.float32))
+        self.assertEqual((stats['min'], stats['validCells'], stats['recommendedDtype']), (None, 0, 'float32'))
+    def test_nodata_for(self):
+        self.assertEqual(noDataFor('uint8', 0, 200), 255)
+        self.assertEqual(noDataFor('uint8', 1, 255), 0)
+        self.assertEqual(noDataFor('int16', -5, None), 32767)
+        self.assertEqual(noDataFor('float32', 0, 1), float(numpy.finfo(numpy.float32).min))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#------------------------------------------------------------------------------
+#----- test_region_index.py ---------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the STR tree of region feature extents
+#
+#discussion:  Queries are checked against a brute force search of random
+#             boxes.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import random
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from RegionIndex import STRTree, boundsIntersect
+#endregion
+
+class STRTreeTests(unittest.TestCase):
+    def test_query_matches_brute_force(self):
+        rnd = random.Random(7)
+        items = []
+        for i in range(500):
+            x, y = rnd.uniform(0, 100), rnd.uniform(0, 100)
+            items.append(((x, y, x + rnd.uniform(0, 5), y + rnd.uniform(0, 5)), i))
+        tree = STRTree(items, 8)
+        for i in range(50):
+            x, y = rnd.uniform(-10, 100), rnd.uniform(-10, 100)
+            box = (x, y, x + rnd.uniform(0, 20), y + rnd.uniform(0, 20))
+            self.assertEqual(sorted(tree.Query(box)), sorted(v for b, v in items if boundsIntersect(b, box)))
+    def test_edges(self):
+        self.assertEqual(STRTree([]).Query((0, 0, 1, 1)), [])
+        tree = STRTree([((0, 0, 1, 1), 'a'), ((2, 2, 3, 3), 'b')])
+        # touching bounds meet
+        self.assertEqual(sorted(tree.Query((1, 1, 2, 2))), ['a', 'b'])
+        self.assertEqual(tree.Query((1.5, 0, 1.8, 5)), [])
+        self.assertEqual(tree.Query(None), [])
+
+if __name__ == '__main__':
+    unittest.main()
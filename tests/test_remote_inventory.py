@@ -0,0 +1,107 @@
+#------------------------------------------------------------------------------
+#----- test_remote_inventory.py -----------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the cached region listing the TransferAgent answers
+#             existence and listing lookups from
+#
+#discussion:  The backend is a LocalBackend that counts its listings, so a
+#             test can tell the cache from the bucket.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from TransferAgent import TransferAgent, LocalBackend
+from RemoteInventory import RemoteInventory
+#endregion
+
+class CountingBackend(LocalBackend):
+    def __init__(self, root):
+        LocalBackend.__init__(self, root)
+        self.Lists = 0
+    def List(self, bucket, prefix):
+        self.Lists += 1
+        return LocalBackend.List(self, bucket, prefix)
+
+class RemoteInventoryTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = os.path.join(self.folder, 'cache')
+        self.backend = CountingBackend(os.path.join(self.folder, 'bucket'))
+        for rel in ('a.txt', 'sub/b.txt', 'c.txt'):
+            self.write(rel, rel)
+        self.backend.PutFile(os.path.join(self.folder, 'a.txt'), 'bucket', 'data/xx/a.txt')
+        self.backend.PutFile(os.path.join(self.folder, 'sub', 'b.txt'), 'bucket', 'data/xx/sub/b.txt')
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def write(self, rel, text):
+        path = os.path.join(self.folder, *rel.split('/'))
+        if not os.path.isdir(os.path.dirname(path)): os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(text)
+    def agent(self, backend=None, ttl=0):
+        backend = backend or self.backend
+        return TransferAgent(backend, inventory=RemoteInventory(backend, 2, self.cache, ttl))
+    def keys(self, agent):
+        return [item['key'] for item in agent.List('s3://bucket/data/xx/')]
+    def test_one_listing_per_region(self):
+        agent = self.agent()
+        self.assertTrue(agent.Exists('s3://bucket/data/xx/a.txt'))
+        self.assertFalse(agent.Exists('s3://bucket/data/xx/a.tx0'))
+        self.assertEqual(self.keys(agent), ['data/xx/a.txt', 'data/xx/sub/b.txt'])
+        self.assertEqual(agent.Inventory.Get('bucket', 'data/xx/sub/b.txt')['size'], 9)
+        self.assertEqual((self.backend.Lists, agent.Inventory.Listings), (1, 1))
+        # an object written behind the agent's back is not seen, the listing replaces the bucket
+        self.backend.PutFile(os.path.join(self.folder, 'c.txt'), 'bucket', 'data/xx/d.txt')
+        self.assertFalse(agent.Exists('s3://bucket/data/xx/d.txt'))
+        # above the region depth the bucket is listed every time
+        agent.Exists('s3://bucket/data/')
+        self.assertEqual(self.backend.Lists, 2)
+    def test_copy_and_remove_update_the_listing(self):
+        agent = self.agent()
+        self.keys(agent)
+        agent.Copy(os.path.join(self.folder, 'c.txt'), 's3://bucket/data/xx/c.txt')
+        agent.Remove('s3://bucket/data/xx/sub', True)
+        self.assertEqual(self.keys(agent), ['data/xx/a.txt', 'data/xx/c.txt'])
+        self.assertEqual(self.backend.Lists, 1)
+        self.assertEqual(agent.Inventory.Get('bucket', 'data/xx/c.txt')['etag'],
+                         [i for i in self.backend.List('bucket', 'data/xx/c.txt')][0]['etag'])
+    def test_saved_listing_is_reused_until_it_expires(self):
+        agent = self.agent(ttl=60)
+        agent.Copy(os.path.join(self.folder, 'c.txt'), 's3://bucket/data/xx/c.txt')
+        self.keys(agent)
+        agent.Remove('s3://bucket/data/xx/a.txt')
+        agent.Close()
+        backend = CountingBackend(os.path.join(self.folder, 'bucket'))
+        self.assertEqual(self.keys(self.agent(backend, 60)), ['data/xx/c.txt', 'data/xx/sub/b.txt'])
+        self.assertEqual(backend.Lists, 0)
+        # an expired listing is listed again
+        path = os.path.join(self.cache, os.listdir(self.cache)[0])
+        with open(path) as f:
+            cached = json.load(f)
+        cached['time'] -= 120
+        with open(path, 'w') as f:
+            json.dump(cached, f)
+        self.keys(self.agent(backend, 60))
+        self.assertEqual(backend.Lists, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#------------------------------------------------------------------------------
+#----- test_spatial_inventory.py ----------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the dataset stamps a rescan compares and of the
+#             sqlite inventory rows
+#
+#discussion:  Shapefiles and gdbs are plain files in a temp folder, the
+#             stamps only look at file sizes and mtimes.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from SpatialInventory import SpatialInventory, datasetStamp
+#endregion
+
+class DatasetStampTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.gdb = os.path.join(self.folder, 'global.gdb')
+        os.makedirs(self.gdb)
+        self.write(self.gdb, 'a00000001.gdbtable', 10)
+        self.write(self.gdb, 'a00000001.gdbtablx', 5)
+        self.write(self.gdb, 'a00000009.gdbtable', 20)
+        self.write(self.gdb, 'a00000009.spx', 100)
+        self.write(self.gdb, 'timestamps', 100)
+        self.write(self.folder, 'roads.shp', 20)
+        self.write(self.folder, 'roads.prj', 2)
+        self.write(self.folder, 'roadside.shp', 7)
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def write(self, folder, name, size):
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(b'x' * size)
+    def test_gdb_datasets_share_the_table_files(self):
+        cache = {}
+        stamp = datasetStamp(os.path.join(self.gdb, 'Layers', 'Catchment'), cache)
+        self.assertEqual(stamp[0], 35)
+        self.assertEqual(datasetStamp(os.path.join(self.gdb, 'DrainageLine'), cache), stamp)
+        self.assertEqual(datasetStamp(self.gdb), stamp)
+        self.assertEqual(datasetStamp(os.path.join(self.folder, 'missing.gdb', 'x')), (None, None))
+    def test_files_and_sidecars(self):
+        self.assertEqual(datasetStamp(os.path.join(self.folder, 'roads.shp'))[0], 22)
+    def test_locks_are_left_out(self):
+        catchment = os.path.join(self.gdb, 'Layers', 'Catchment')
+        roads = os.path.join(self.folder, 'roads.shp')
+        before = (datasetStamp(catchment), datasetStamp(roads))
+        self.write(self.gdb, 'a00000009.HOST.1234.5678.sr.lock', 1)
+        self.write(self.gdb, '_gdb.HOST.1234.5678.sr.lock', 1)
+        self.write(self.folder, 'roads.shp.HOST.1234.sr.lock', 1)
+        self.assertEqual((datasetStamp(catchment), datasetStamp(roads)), before)
+
+class SpatialInventoryTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.inventory = SpatialInventory(os.path.join(self.folder, 'inventory.db'))
+    def tearDown(self):
+        self.inventory.Close()
+        shutil.rmtree(self.folder, True)
+    def record(self, path, srName, size=1):
+        return {'path': os.path.join(self.folder, *path.split('/')), 'datatype': 'FeatureClass', 'srName': srName,
+                'wkid': None, 'size': size, 'mtime': 1.0, 'error': ''}
+    def test_update_replaces_a_part(self):
+        part = os.path.join(self.folder, 'ms')
+        self.inventory.Update(part, [self.record('ms/a.shp', 'A'), self.record('ms/b.shp', 'A')])
+        self.inventory.Update(part, [self.record('ms/a.shp', 'B', 2)])
+        known = self.inventory.Known(part)
+        self.assertEqual(list(known), [os.path.join(part, 'a.shp')])
+        self.assertEqual((known[os.path.join(part, 'a.shp')]['srName'], known[os.path.join(part, 'a.shp')]['size']), ('B', 2))
+    def test_mismatched(self):
+        part = os.path.join(self.folder, 'ms')
+        self.inventory.Update(part, [self.record('ms/a.shp', 'A'), self.record('ms/b.shp', 'A'), self.record('ms/c.shp', 'B'),
+                                     self.record('ms/d.shp', 'Unknown')])
+        self.inventory.Update(os.path.join(self.folder, 'ms_2'), [self.record('ms_2/e.shp', 'C')])
+        common, others = self.inventory.Mismatched(part)
+        self.assertEqual((common, [os.path.basename(r['path']) for r in others]), ('A', ['c.shp']))
+        self.assertEqual(self.inventory.Mismatched(os.path.join(self.folder, 'al')), (None, []))
+
+if __name__ == '__main__':
+    unittest.main()
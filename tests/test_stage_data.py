@@ -0,0 +1,118 @@
+#------------------------------------------------------------------------------
+#----- test_stage_data.py -----------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of staging a state folder: which files are linked,
+#             reflinked or copied, and which are never staged
+#
+#discussion:  The state folder is a temp tree.  Hard links and reflinks are
+#             made to fail by replacing StageData's hardLink and reflink, so
+#             each step of the fallback is reached on any file system.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import errno
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import StageData as stageData
+from StageData import StageData
+from DeletePlan import KeepSet
+from FileWorkers import FileWorkers
+#endregion
+
+FILES = ('archydro/global.gdb/a1.gdbtable', 'archydro/global.gdb/backup.zip', 'archydro/global.gdb/old.mdb',
+         'archydro/old_global.gdb/a1.gdbtable', 'archydro/01010001/01010001.gdb/a1.gdbtable',
+         'archydro/01010001/fdr/w001001.adf', 'archydro/01010001/fac/w001001.adf', 'archydro/01010001/backup.zip',
+         'bc_layers/dem/hdr.adf', 'bc_layers/slope/hdr.adf', 'bc_layers/info/arc.dir', 'bc_layers/dem.tif')
+
+def unsupported(source, destination):
+    raise OSError(errno.EXDEV, 'cross-device link')
+
+class StageDataTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.state = os.path.join(self.folder, 'xx')
+        self.staged = os.path.join(self.folder, 'staged')
+        for path in FILES:
+            path = self.path(self.state, path)
+            if not os.path.isdir(os.path.dirname(path)): os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write(path)
+        self.messages = []
+        self.hardLink, self.reflink = stageData.hardLink, stageData.reflink
+    def tearDown(self):
+        stageData.hardLink, stageData.reflink = self.hardLink, self.reflink
+        shutil.rmtree(self.folder, True)
+    def path(self, root, rel):
+        return os.path.join(root, *rel.split('/'))
+    def stage(self, useLinks=True):
+        with FileWorkers(2) as workers:
+            stage = StageData(KeepSet(['dem', 'fdr'], 'xx', self.state), workers, useLinks, lambda msg, type='INFO': self.messages.append(msg))
+            for folder in ('archydro', 'bc_layers'):
+                stage.Stage(os.path.join(self.state, folder), os.path.join(self.staged, folder))
+        return stage
+    def stagedFiles(self):
+        return sorted(os.path.relpath(os.path.join(root, name), self.staged).replace(os.sep, '/')
+                      for root, dirs, names in os.walk(self.staged) for name in names)
+    def linked(self, rel):
+        return os.path.samefile(self.path(self.state, rel), self.path(self.staged, rel))
+    def assertStaged(self):
+        self.assertEqual(self.stagedFiles(), ['archydro/01010001/01010001.gdb/a1.gdbtable', 'archydro/01010001/fdr/w001001.adf',
+                                              'archydro/global.gdb/a1.gdbtable', 'bc_layers/dem.tif', 'bc_layers/dem/hdr.adf',
+                                              'bc_layers/info/arc.dir'])
+        # the folders of skipped files are not created
+        self.assertFalse(os.path.exists(self.path(self.staged, 'bc_layers/slope')))
+        for rel in self.stagedFiles():
+            with open(self.path(self.staged, rel)) as f:
+                self.assertEqual(f.read(), self.path(self.state, rel))
+    def test_hard_links(self):
+        stage = self.stage()
+        self.assertStaged()
+        self.assertEqual((stage.Linked, stage.Reflinked, stage.Copied, stage.Geodatabases), (4, 0, 0, 2))
+        self.assertTrue(self.linked('bc_layers/dem/hdr.adf') and self.linked('archydro/01010001/fdr/w001001.adf'))
+        # geodatabases are copied, arcpy edits them in place
+        self.assertFalse(self.linked('archydro/global.gdb/a1.gdbtable'))
+        self.assertFalse(self.linked('archydro/01010001/01010001.gdb/a1.gdbtable'))
+        # old_global.gdb, fac, backup.zip and slope; the .mdb and .zip in global.gdb are left out of its copy
+        self.assertEqual(stage.Skipped, 4)
+    def test_reflinks_when_hard_links_fail(self):
+        reflinked = []
+        def reflink(source, destination):
+            shutil.copyfile(source, destination)
+            reflinked.append(destination)
+        stageData.hardLink, stageData.reflink = unsupported, reflink
+        stage = self.stage()
+        self.assertStaged()
+        self.assertEqual((stage.Linked, stage.Reflinked, stage.Copied), (0, 4, 0))
+        self.assertEqual(len(reflinked), 4)
+        self.assertEqual(len([m for m in self.messages if m.startswith('not using hard links')]), 1)
+    def test_copies_when_neither_works(self):
+        stageData.hardLink, stageData.reflink = unsupported, unsupported
+        stage = self.stage()
+        self.assertStaged()
+        self.assertEqual((stage.Linked, stage.Reflinked, stage.Copied), (0, 0, 4))
+        self.assertFalse(self.linked('bc_layers/dem/hdr.adf'))
+    def test_copies_without_links(self):
+        stage = self.stage(False)
+        self.assertStaged()
+        self.assertEqual((stage.Linked, stage.Copied), (0, 4))
+        self.assertFalse(self.linked('bc_layers/dem.tif'))
+
+if __name__ == '__main__':
+    unittest.main()
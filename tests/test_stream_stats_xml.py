@@ -0,0 +1,178 @@
+#------------------------------------------------------------------------------
+#----- test_stream_stats_xml.py -----------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests that the single pass StreamStatsXML gives the same xml
+#             and layers as ParseData's __thinXML__, __replaceProjection__
+#             and __getXMLLayers__ passes it replaced
+#
+#discussion:  The three passes are kept below as they were in ParseData
+#             (ParseData itself needs arcpy), and both are run on copies of
+#             a small synthetic xml, as a tree and streamed.  The outputs
+#             are compared element by element; whitespace between elements
+#             is not compared, since minidom and ElementTree indent
+#             differently.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import xml.dom.minidom
+import xml.etree.ElementTree as ET
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from StreamStatsXML import StreamStatsXML
+#endregion
+
+NECESSARY = ['StreamStatsConfig', 'ProgParams', 'GlobalPointDelineation', 'WshParams', 'ApFields', 'ApFunctions',
+             'TempLocation', 'ApLayers', 'RASTERDATAPATH', 'VECTORDATAPATH']
+
+XML = '''<?xml version="1.0" encoding="utf-8"?>
+<!-- exported by the StreamStats admin tool -->
+<StreamStatsConfig>
+  <!-- program parameters -->
+  <ProgParams>
+    <ProgParam Name="TempLocation">d:\\temp</ProgParam>
+    <ProgParam Name="RASTERDATAPATH">d:\\data\\xx\\bc_layers</ProgParam>
+    <ProgParam Name="Debug">true</ProgParam>
+  </ProgParams>
+  <Legacy Name="Unused"><Deep><Deeper /></Deep></Legacy>
+  <ApFunctions>
+    <ApFunction TagName="GlobalPointDelineation" Name="GlobalPointDelineation">
+      <ApLayers>
+        <ApLayer Name="Catchment" AliasName="Cat" />
+        <ApLayer Name="fdr" />
+      </ApLayers>
+      <Notes>not needed</Notes>
+      <ApFields>
+        <ApField Name="SnapTolerance" AdditionalParams="PROJECTIONFILENAME=c:\\ss\\schemas\\xx.prj;UNITS=m" />
+      </ApFields>
+    </ApFunction>
+    <ApFunction TagName="WshParams" Name="WshParams">
+      <ApFields>
+        <ApField Name="DRNAREA">
+          <ApLayers><ApLayer Name="DEM" AliasName="dem" /><ApLayer Name="Slope &amp; Aspect" /></ApLayers>
+        </ApField>
+        <ApField Name="PRECIP">
+          <ApLayers><ApLayer Name="ppt" AliasName="Precip" /><ApLayer Name="FDR" /></ApLayers>
+        </ApField>
+      </ApFields>
+      <Extra Name="Other" />
+    </ApFunction>
+    <ApFunction TagName="Flows" Name="Flows" />
+    <ApFunction TagName="Other" Name="Other" />
+  </ApFunctions>
+</StreamStatsConfig>
+'''
+
+def thinXML(xmlfile, firstNode, i, attr):
+    # ParseData.__thinXML__
+    xmlDoc = xml.dom.minidom.parse(xmlfile)
+    toRemove = []
+    for child in xmlDoc.childNodes:
+        if child.nodeType == 8:
+            p = child.parentNode
+            p.removeChild(child)
+    for child in (child for child in xmlDoc.getElementsByTagName(firstNode)[i].childNodes if child.nodeType in [1,8]):
+        if child.nodeType == 8 or child.getAttribute('TagName') == 'Flows' or (child.nodeName not in attr and (not child.getAttribute('Name') or child.getAttribute('Name') not in attr)):
+            toRemove.extend((child,child.previousSibling))
+    parent = xmlDoc.getElementsByTagName(firstNode)[i]
+    for child in toRemove:
+        parent.removeChild(child)
+    with open(xmlfile, 'w') as f:
+        xmlDoc.writexml(f)
+
+def replaceProjection(xmlfile):
+    # ParseData.__replaceProjection__
+    xmlDoc = ET.parse(xmlfile)
+    root = xmlDoc.getroot()
+    for child in root.iter():
+        if 'AdditionalParams' in child.attrib and 'PROJECTIONFILENAME' in child.attrib['AdditionalParams'] and 'schemas' in child.attrib['AdditionalParams']:
+            start_sect = child.attrib['AdditionalParams'].split('PROJECTIONFILENAME')[0]
+            end_sect = child.attrib['AdditionalParams'].split('PROJECTIONFILENAME')[1].split('schemas')[1]
+            child.set('AdditionalParams', start_sect + 'PROJECTIONFILENAME=e:\\projections' + end_sect)
+    with open(xmlfile, 'wb') as f:
+        xmlDoc.write(f)
+
+def getXMLLayers(xmlfile, layerType):
+    # ParseData.__getXMLLayers__
+    layers = []
+    xmlDoc = ET.parse(xmlfile)
+    if layerType == "wsh": xPath = ".//ApFunction[@TagName='WshParams']/ApFields/ApField/ApLayers/ApLayer"
+    if layerType == "delin": xPath = ".//ApFunction[@TagName='GlobalPointDelineation']/ApLayers/ApLayer"
+    for apLayer in xmlDoc.findall(xPath):
+        if apLayer.get('AliasName') and apLayer.get('AliasName') not in layers:
+            layer = apLayer.get('AliasName').lower()
+            layers.append(layer)
+        if apLayer.get('Name') and apLayer.get('Name') not in layers:
+            layer = apLayer.get('Name').lower()
+            layers.append(layer)
+    return layers
+
+def baseline(xmlfile):
+    thinXML(xmlfile, "StreamStatsConfig", 0, NECESSARY)
+    thinXML(xmlfile, "ProgParams", 0, NECESSARY)
+    thinXML(xmlfile, "ApFunctions", 0, NECESSARY)
+    thinXML(xmlfile, "ApFunction", 0, NECESSARY)
+    thinXML(xmlfile, "ApFunction", 1, NECESSARY)
+    replaceProjection(xmlfile)
+    return unique(getXMLLayers(xmlfile, "wsh")) + unique(getXMLLayers(xmlfile, "delin"))
+
+def unique(layers):
+    # __getXMLLayers__ compared the mixed case name to the lower case list, so 'DEM' was added again after 'dem'
+    return [layer for i, layer in enumerate(layers) if layer not in layers[:i]]
+
+def shape(elem):
+    return (elem.tag, sorted(elem.items()), (elem.text or '').strip(), [shape(child) for child in elem])
+
+class StreamStatsXMLTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.expected = self.write('baseline.xml')
+        self.expectedLayers = baseline(self.expected)
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def write(self, name):
+        path = os.path.join(self.folder, name)
+        with open(path, 'w') as f:
+            f.write(XML)
+        return path
+    def process(self, streamAboveMB):
+        path = self.write('xx.xml')
+        thin = StreamStatsXML('xx', NECESSARY, streamAboveMB)
+        layers = thin.Process(path)
+        self.assertEqual(shape(ET.parse(path).getroot()), shape(ET.parse(self.expected).getroot()))
+        self.assertEqual(layers, self.expectedLayers)
+        return thin
+    def test_baseline(self):
+        # the fixture exercises every rule: Legacy, Debug, Notes, Extra, Flows and Other are dropped
+        root = ET.parse(self.expected).getroot()
+        self.assertEqual([e.get('Name') for e in root.iter('ProgParam')], ['TempLocation', 'RASTERDATAPATH'])
+        self.assertEqual([e.get('TagName') for e in root.iter('ApFunction')], ['GlobalPointDelineation', 'WshParams'])
+        self.assertEqual(root.find('.//ApField[@Name="SnapTolerance"]').get('AdditionalParams'), 'PROJECTIONFILENAME=e:\\projections\\xx.prj;UNITS=m')
+        self.assertEqual(self.expectedLayers, ['dem', 'slope & aspect', 'precip', 'ppt', 'fdr', 'cat', 'catchment', 'fdr'])
+        self.assertEqual(root.find('.//Legacy'), None)
+    def test_tree(self):
+        self.assertFalse(self.process(0).Streamed)
+        self.assertFalse(self.process(100).Streamed)
+    def test_streamed(self):
+        thin = self.process(0.0001)
+        self.assertTrue(thin.Streamed)
+        self.assertEqual(thin.Removed, 6)
+
+if __name__ == '__main__':
+    unittest.main()
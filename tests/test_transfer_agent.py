@@ -0,0 +1,103 @@
+#------------------------------------------------------------------------------
+#----- test_transfer_agent.py -------------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of TransferAgent sync, copy and multipart uploads
+#             against the LocalBackend bucket
+#
+#discussion:  The bucket is a temp folder, parts are a few KB so small
+#             files already go up in several parts.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from TransferAgent import TransferAgent, LocalBackend
+#endregion
+
+PART = 1024
+
+class FlakyBackend(LocalBackend):
+    # fails the first upload of each part number in FailParts
+    def __init__(self, root, failParts=()):
+        LocalBackend.__init__(self, root)
+        self.FailParts = set(failParts)
+        self.PartsSent = []
+    def UploadPart(self, bucket, key, uploadID, partNumber, data):
+        self.PartsSent.append(partNumber)
+        if partNumber in self.FailParts:
+            self.FailParts.remove(partNumber)
+            raise Exception('connection reset')
+        return LocalBackend.UploadPart(self, bucket, key, uploadID, partNumber, data)
+
+class TransferAgentTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.source = os.path.join(self.folder, 'source')
+        self.write('a.txt', b'a' * 10)
+        self.write('sub/b.txt', b'b' * 20)
+        self.write('big.img', os.urandom(3 * PART + 100))
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def write(self, rel, data):
+        path = os.path.join(self.source, *rel.split('/'))
+        if not os.path.isdir(os.path.dirname(path)): os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(data)
+    def agent(self, backend=None):
+        return TransferAgent(backend or LocalBackend(os.path.join(self.folder, 'bucket')), partSize=PART, partRetries=2)
+    def tree(self, agent, url):
+        prefix = len(url.split('/', 3)[3]) + 1
+        return sorted((item['key'][prefix:], item['size'], item['etag']) for item in agent.List(url + '/'))
+    def test_sync_uploads_changes_and_removes_deleted(self):
+        agent = self.agent()
+        agent.Sync(self.source, 's3://bucket/xx')
+        self.assertEqual(agent.FilesTransferred, 3)
+        self.write('a.txt', b'c' * 11)
+        self.write('sub/new.txt', b'n')
+        os.remove(os.path.join(self.source, 'sub', 'b.txt'))
+        agent.Sync(self.source, 's3://bucket/xx')
+        self.assertEqual(agent.FilesTransferred, 5)
+        self.assertEqual([(rel, size) for rel, size, etag in self.tree(agent, 's3://bucket/xx')],
+                         [('a.txt', 11), ('big.img', 3 * PART + 100), ('sub/new.txt', 1)])
+        agent.Sync(self.source, 's3://bucket/xx')
+        self.assertEqual(agent.FilesTransferred, 5)
+    def test_failed_part_is_retried(self):
+        backend = FlakyBackend(os.path.join(self.folder, 'bucket'), [2])
+        agent = self.agent(backend)
+        agent.Copy(os.path.join(self.source, 'big.img'), 's3://bucket/xx/big.img')
+        self.assertEqual((agent.PartsRetried, sorted(backend.PartsSent)), (1, [1, 2, 2, 3, 4]))
+        agent.Copy('s3://bucket/xx/big.img', os.path.join(self.folder, 'big.img'))
+        with open(os.path.join(self.folder, 'big.img'), 'rb') as a, open(os.path.join(self.source, 'big.img'), 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+    def test_remove_and_copy_match_sync(self):
+        agent = self.agent()
+        self.write('old.txt', b'o')
+        agent.Copy(self.source, 's3://bucket/copied', True)
+        agent.Sync(self.source, 's3://bucket/synced')
+        os.remove(os.path.join(self.source, 'old.txt'))
+        self.write('a.txt', b'changed')
+        agent.Remove('s3://bucket/copied', True)
+        agent.Copy(self.source, 's3://bucket/copied', True)
+        agent.Sync(self.source, 's3://bucket/synced')
+        self.assertEqual(self.tree(agent, 's3://bucket/copied'), self.tree(agent, 's3://bucket/synced'))
+        self.assertEqual(len(self.tree(agent, 's3://bucket/copied')), 3)
+
+if __name__ == '__main__':
+    unittest.main()
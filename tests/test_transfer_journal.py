@@ -0,0 +1,111 @@
+#------------------------------------------------------------------------------
+#----- test_transfer_journal.py -----------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of resuming interrupted uploads from a TransferJournal
+#
+#discussion:  A LocalBackend that fails on a chosen part stands in for the
+#             interruption; the resumed run gets a new agent and a journal
+#             reopened from the same file, as a rerun of UpdateS3 would.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from TransferAgent import TransferAgent, LocalBackend
+from TransferJournal import TransferJournal
+#endregion
+
+PART = 1024
+
+class InterruptedBackend(LocalBackend):
+    # records every part the bucket accepted, and fails every upload of part FailAt
+    def __init__(self, root, failAt=None):
+        LocalBackend.__init__(self, root)
+        self.FailAt = failAt
+        self.PartsSent = []
+    def UploadPart(self, bucket, key, uploadID, partNumber, data):
+        if partNumber == self.FailAt: raise Exception('connection reset')
+        etag = LocalBackend.UploadPart(self, bucket, key, uploadID, partNumber, data)
+        self.PartsSent.append(partNumber)
+        return etag
+
+class TransferJournalTests(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.bucket = os.path.join(self.folder, 'bucket')
+        self.journal = os.path.join(self.folder, 'journal', 'xx.jsonl')
+        self.source = os.path.join(self.folder, 'big.img')
+        with open(self.source, 'wb') as f:
+            f.write(os.urandom(4 * PART + 10))
+    def tearDown(self):
+        shutil.rmtree(self.folder, True)
+    def upload(self, backend):
+        agent = TransferAgent(backend, partSize=PART, partRetries=0, journal=TransferJournal(self.journal, 2))
+        try:
+            agent.Copy(self.source, 's3://bucket/xx/big.img')
+        finally:
+            agent.Close()
+        return agent
+    def interrupt(self):
+        backend = InterruptedBackend(self.bucket, 3)
+        self.assertRaises(Exception, self.upload, backend)
+        self.assertEqual(backend.PartsSent, [1, 2])
+        self.assertFalse(os.path.exists(os.path.join(self.bucket, 'bucket', 'xx', 'big.img')))
+    def assertUploaded(self):
+        with open(os.path.join(self.bucket, 'bucket', 'xx', 'big.img'), 'rb') as a, open(self.source, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+    def test_resume_sends_only_missing_parts(self):
+        self.interrupt()
+        backend = InterruptedBackend(self.bucket)
+        agent = self.upload(backend)
+        self.assertEqual(backend.PartsSent, [3, 4, 5])
+        self.assertUploaded()
+        # a third run finds the file complete in the journal
+        agent = self.upload(InterruptedBackend(self.bucket))
+        self.assertEqual((agent.FilesResumed, agent.FilesTransferred), (1, 0))
+        self.assertTrue(agent.WasStarted('s3://bucket/xx') and not agent.WasStarted('s3://bucket/x'))
+    def test_expired_upload_starts_over(self):
+        self.interrupt()
+        # the bucket dropped the unfinished upload (lifecycle rule or abort) since the journal was written
+        shutil.rmtree(os.path.join(self.bucket, '.multipart'))
+        backend = InterruptedBackend(self.bucket)
+        self.upload(backend)
+        self.assertEqual(backend.PartsSent, [1, 2, 3, 4, 5])
+        self.assertUploaded()
+    def test_journal_replay(self):
+        journal = TransferJournal(self.journal)
+        journal.StartMultipart('bucket/xx/big.img', 'u1', 10, 1.0, PART)
+        journal.PartDone('bucket/xx/big.img', 'u1', 1, 'e1')
+        journal.Complete('download', 'bucket/xx/a.txt', 5)
+        journal.Close()
+        with open(self.journal, 'a') as f:
+            f.write('{"event": "part", "key": "bucket/xx/big.img", "uploa')
+        journal = TransferJournal(self.journal)
+        try:
+            self.assertTrue(journal.Resumed)
+            self.assertEqual(journal.Multipart('bucket/xx/big.img', 10, 1.0, PART)['parts'], {1: 'e1'})
+            self.assertEqual(journal.Multipart('bucket/xx/big.img', 11, 1.0, PART), None)
+            self.assertTrue(journal.IsComplete('download', 'bucket/xx/a.txt', 5))
+            self.assertFalse(journal.IsComplete('download', 'bucket/xx/a.txt', 6))
+        finally:
+            journal.Close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#------------------------------------------------------------------------------
+#----- test_zonal_statistics.py -----------------------------------------------
+#------------------------------------------------------------------------------
+
+#-------1---------2---------3---------4---------5---------6---------7---------8
+#       01234567890123456789012345678901234567890123456789012345678901234567890
+#-------+---------+---------+---------+---------+---------+---------+---------+
+
+# copyright:   2026 WIM - USGS
+
+#    authors:  USGS Web Informatics and Mapping
+#
+#   purpose:  Tests of the NumPy zonal statistics engine: rasterizing basin
+#             rings and each statistic on NumpyRasters
+#
+#discussion:  Rasters are in memory NumpyRasters, nothing needs arcpy or
+#             GDAL.
+#
+
+#region "Comments"
+#10.18.2026 - Created
+#endregion
+
+#region "Imports"
+import os
+import sys
+import unittest
+import numpy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from ZonalStatistics import NumpyRaster, ZonalStatistics, rasterizeRings
+#endregion
+
+# a 10 x 10 raster of 1 unit cells from (0, 0) to (10, 10), value = column
+GRID = numpy.tile(numpy.arange(10, dtype=numpy.int32), (10, 1))
+SQUARE = [(2, 2), (6, 2), (6, 6), (2, 6)]
+HOLE = [(3, 3), (4, 3), (4, 4), (3, 4)]
+
+class ZonalStatisticsTests(unittest.TestCase):
+    def zonal(self, rings, definitions):
+        return ZonalStatistics(rings, dict((code, d) for code, d in definitions.items()))
+    def test_rasterize_uses_cell_centers_and_holes(self):
+        mask = rasterizeRings([SQUARE, HOLE], 0, 10, 1, 1, 10, 10)
+        self.assertEqual(mask.sum(), 15)
+        self.assertFalse(mask[6, 3])
+        self.assertTrue(mask[4, 2] and mask[7, 5])
+    def test_statistics(self):
+        raster = NumpyRaster(GRID, 0, 10, 1)
+        zonal = self.zonal([SQUARE], {'MEAN': {'layer': 'g', 'statistic': 'mean'}, 'SUM': {'layer': 'g', 'statistic': 'sum'},
+                                      'MIN': {'layer': 'g', 'statistic': 'min'}, 'MAX': {'layer': 'g', 'statistic': 'max'},
+                                      'CNT': {'layer': 'g', 'statistic': 'count'},
+                                      'AREA': {'layer': 'g', 'statistic': 'area', 'factor': 0.5},
+                                      'PCT': {'layer': 'g', 'statistic': 'percent', 'values': [2, 3]}})
+        # columns 2 to 5 of rows 4 to 7
+        self.assertEqual(zonal.Compute('MEAN', raster), 3.5)
+        self.assertEqual(zonal.Compute('SUM', raster), 56.0)
+        self.assertEqual((zonal.Compute('MIN', raster), zonal.Compute('MAX', raster)), (2.0, 5.0))
+        self.assertEqual(zonal.Compute('CNT', raster), 16.0)
+        self.assertEqual(zonal.Compute('AREA', raster), 8.0)
+        self.assertEqual(zonal.Compute('PCT', raster), 50.0)
+    def test_nodata_and_window(self):
+        grid = GRID.astype(numpy.float32)
+        grid[4, 2] = -9999
+        grid[5, 2] = numpy.nan
+        # the basin reaches past the raster, only the overlapping window is read
+        zonal = self.zonal([[(8, 8), (12, 8), (12, 12), (8, 12)]], {'CNT': {'layer': 'g', 'statistic': 'count'}})
+        self.assertEqual(zonal.Compute('CNT', NumpyRaster(grid, 0, 10, 1, noData=-9999)), 4.0)
+        self.assertEqual(zonal.CellsRead, 4)
+        zonal = self.zonal([SQUARE], {'CNT': {'layer': 'g', 'statistic': 'count'}})
+        self.assertEqual(zonal.Compute('CNT', NumpyRaster(grid, 0, 10, 1, noData=-9999)), 14.0)
+        outside = self.zonal([[(20, 20), (21, 20), (21, 21)]], {'CNT': {'layer': 'g', 'statistic': 'count'}})
+        self.assertEqual(outside.Compute('CNT', NumpyRaster(grid, 0, 10, 1)), None)
+    def test_characteristics_leave_the_rest_to_archydro(self):
+        zonal = self.zonal([SQUARE], {'MEAN': {'layer': 'g', 'statistic': 'mean'}, 'BAD': {'layer': 'g', 'statistic': 'median'},
+                                      'GONE': {'layer': 'missing', 'statistic': 'mean'}})
+        rasters = {'g': NumpyRaster(GRID, 0, 10, 1)}
+        parameters, remaining = zonal.Characteristics(['mean', 'BAD', 'GONE', 'OTHER'], rasters.get)
+        self.assertEqual(parameters, [{'code': 'MEAN', 'value': '3.5'}])
+        self.assertEqual(remaining, ['BAD', 'GONE', 'OTHER'])
+
+if __name__ == '__main__':
+    unittest.main()